@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from database_client import DatabaseClient
+from generate_dataset import ensure_dataset
+
+PAGE_SIZE = 50
+
+# a result may be this much (a fraction) slower than the baseline before
+# run_benchmarks.py reports it as a regression
+TOLERANCE = 0.5
+# and latencies this many milliseconds more on top of that, less is noise
+SLACK_MS = 0.1
+
+
+def percentile(samples, fraction):
+    # nearest-rank percentile of sorted samples
+    index = min(len(samples) - 1, max(0, round(fraction * len(samples)) - 1))
+    return samples[index]
+
+
+def summarize(samples, rows=None):
+    # latency percentiles in milliseconds, and rows per second if every
+    # sample processed rows rows
+    samples = sorted(samples)
+    result = {
+        "runs": len(samples),
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+    if rows is not None:
+        result["rows_per_s"] = rows / percentile(samples, 0.5)
+    return result
+
+
+def format_result(size, name, result):
+    line = (
+        f"{size:>8} {name:<28} p50 {result['p50_ms']:9.2f} ms  "
+        f"p95 {result['p95_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms"
+    )
+    if "rows_per_s" in result:
+        line += f"  {result['rows_per_s']:>12,.0f} rows/s"
+    return line
+
+
+def time_calls(function, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def benchmark_database(db_path, json_path, count, seed=0):
+    # latencies of the DatabaseClient operations on the dataset with count
+    # tasks. the large operations run fewer times, so a 1M task run stays in
+    # the minutes.
+    rng = random.Random(seed)
+    bulk_runs = 3 if count <= 100_000 else 1
+    results = {}
+
+    client = DatabaseClient(db_path)
+
+    results["count_tasks"] = summarize(
+        time_calls(lambda: client.count_tasks(complete=False), 200)
+    )
+    results["count_tasks_search"] = summarize(
+        time_calls(lambda: client.count_tasks(search="invoice"), 50)
+    )
+
+    results["lazy_load_tasks_first_page"] = summarize(
+        time_calls(lambda: client.lazy_load_tasks(0, PAGE_SIZE, False), 100),
+        PAGE_SIZE,
+    )
+    results["lazy_load_tasks_random_page"] = summarize(
+        time_calls(
+            lambda: client.lazy_load_tasks(
+                rng.randrange(count // 2), PAGE_SIZE, False
+            ),
+            50,
+        ),
+        PAGE_SIZE,
+    )
+
+    # scrolling through the first pages of the to do tab, every page resumed
+    # from the last task of the one before
+    cursor = None
+    page_samples = []
+    for _ in range(min(200, count // PAGE_SIZE)):
+        started = time.perf_counter()
+        tasks = client.lazy_load_tasks_after(cursor, PAGE_SIZE, complete=False)
+        page_samples.append(time.perf_counter() - started)
+        if not tasks:
+            break
+        cursor = tasks[-1].sort_key
+    results["lazy_load_tasks_after"] = summarize(page_samples, PAGE_SIZE)
+
+    results["get_all_tasks"] = summarize(
+        time_calls(client.get_all_tasks, bulk_runs), count
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        export_path = os.path.join(directory, "tasks.json")
+        results["export_to_file"] = summarize(
+            time_calls(lambda: client.export_to_file(export_path), bulk_runs), count
+        )
+        client.close()
+
+        import_samples = []
+        for run in range(bulk_runs):
+            imported_client = DatabaseClient(os.path.join(directory, f"{run}.db"))
+            started = time.perf_counter()
+            result = imported_client.import_from_file(json_path)
+            import_samples.append(time.perf_counter() - started)
+            imported_client.close()
+            assert result.imported == count, result.failed[:5]
+        results["import_from_file"] = summarize(import_samples, count)
+
+    return results
+
+
+def run(sizes, seed=0):
+    # results per dataset size, keyed by the size as a string like in JSON
+    results = {}
+    for count in sizes:
+        db_path, json_path = ensure_dataset(count, seed)
+        results[str(count)] = benchmark_database(db_path, json_path, count, seed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DatabaseClient latencies.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size, operations in run(args.sizes, args.seed).items():
+        for name, result in operations.items():
+            print(format_result(size, name, result))
+
+
+if __name__ == "__main__":
+    main()
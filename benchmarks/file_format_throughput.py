@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from file_formats import FILE_FORMATS, open_file
+
+
+WORDS = (
+    "buy call email write review fix clean book pay plan the a report milk car "
+    "dentist groceries meeting invoice garden"
+).split()
+
+
+def task_dicts(count):
+    # generated lazily, like the tasks of an export streamed from the database
+    random.seed(count)
+    start = date(2024, 1, 1)
+    for i in range(count):
+        yield {
+            "image_uri": f"/home/user/Pictures/{random.getrandbits(32):08x}.jpg"
+            if i % 4 == 0
+            else "",
+            "description": " ".join(random.choices(WORDS, k=random.randint(2, 8))),
+            "due_date": (start + timedelta(days=i % 730)).isoformat(),
+            "complete": i % 3 == 0,
+        }
+
+
+def measure(function):
+    # seconds and peak traced memory of function(), from separate runs as
+    # tracing slows the code down
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export and import throughput of the task file formats."
+    )
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'file':<14} {'write rows/s':>13} {'read rows/s':>12} "
+        f"{'bytes/row':>10} {'peak write':>11} {'peak read':>10}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for file_format in FILE_FORMATS.values():
+            for compression_extension in ["", ".gz", ".xz"]:
+                file_name = f"tasks{file_format.extensions[0]}{compression_extension}"
+                file_path = os.path.join(directory, file_name)
+
+                def write():
+                    with open_file(file_path, "w", newline=file_format.newline) as f:
+                        return file_format.write(f, task_dicts(args.count))
+
+                def read():
+                    with open_file(file_path, "r", newline=file_format.newline) as f:
+                        return sum(1 for _ in file_format.read(f))
+
+                written, write_time, write_peak = measure(write)
+                read_count, read_time, read_peak = measure(read)
+                assert written == read_count == args.count
+
+                print(
+                    f"{file_name:<14} {written / write_time:>13,.0f} "
+                    f"{read_count / read_time:>12,.0f} "
+                    f"{os.path.getsize(file_path) / written:>10.1f} "
+                    f"{write_peak / 1024:>9.0f}KB {read_peak / 1024:>8.0f}KB"
+                )
+
+
+if __name__ == "__main__":
+    main()
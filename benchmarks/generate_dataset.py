@@ -0,0 +1,150 @@
+import os
+import sys
+import uuid
+import random
+import argparse
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from database_client import DatabaseClient
+from file_formats import write_json_array
+
+SIZES = [10_000, 100_000, 1_000_000]
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# the date the generated tasks are spread around, fixed so a seed always
+# generates the same dataset
+TODAY = date(2025, 1, 1)
+
+VERBS = (
+    "buy call email write review fix clean book pay plan finish send prepare "
+    "check update order cancel renew schedule return pick up drop off read"
+).split()
+NOUNS = (
+    "report milk car dentist groceries meeting invoice garden taxes slides "
+    "presentation birthday present passport insurance tickets laundry kitchen "
+    "budget newsletter contract flat bike doctor appointment library books "
+    "package bills printer documentation backup website application"
+).split()
+FILLER = (
+    "the a for with to before after on at by and from about this next last "
+    "week monday friday tomorrow morning evening asap again"
+).split()
+
+
+def zipf_weights(words):
+    # a few words are used a lot, most are rare, like in real descriptions
+    return [1 / (rank + 1) for rank in range(len(words))]
+
+
+def generate_tasks(count, seed=0, today=TODAY):
+    # task dicts in the import/export format. most tasks are due within a
+    # couple of months of today, some far ahead and some long overdue. tasks
+    # in the past are mostly complete, tasks in the future mostly not.
+    rng = random.Random(seed)
+    verb_weights = zipf_weights(VERBS)
+    noun_weights = zipf_weights(NOUNS)
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.7:
+            offset = round(rng.triangular(-60, 60, 0))
+        elif kind < 0.9:
+            offset = rng.randint(61, 365)
+        else:
+            offset = -rng.randint(61, 730)
+        due_date = today + timedelta(days=offset)
+
+        words = [rng.choices(VERBS, verb_weights)[0]]
+        words += rng.choices(FILLER + NOUNS, k=min(int(rng.lognormvariate(1, 0.6)), 12))
+        words.append(rng.choices(NOUNS, noun_weights)[0])
+        if rng.random() < 0.05:
+            # a longer note every now and then
+            words += rng.choices(FILLER + NOUNS + VERBS, k=rng.randint(20, 60))
+
+        yield {
+            "image_uri": f"/home/user/Pictures/{rng.getrandbits(32):08x}.jpg"
+            if rng.random() < 0.1
+            else "",
+            "description": " ".join(words).capitalize(),
+            "due_date": due_date.isoformat(),
+            "complete": rng.random() < (0.8 if offset < 0 else 0.1),
+        }
+
+
+def dataset_paths(count, directory=DATA_DIRECTORY):
+    # the database and the JSON export of the dataset with count tasks
+    name = os.path.join(directory, f"tasks_{count}")
+    return name + ".db", name + ".json"
+
+
+def create_database(file_path, count, seed=0, batch_size=10_000):
+    # the tasks are inserted without the search triggers and indexed once at
+    # the end, like a large import
+    rng = random.Random(seed)
+    client = DatabaseClient(file_path)
+    client.drop_search_triggers(client.cur)
+    client.conn.commit()
+
+    batch = []
+    for record in generate_tasks(count, seed):
+        row = client.record_to_row(record)
+        # uuids from the seeded generator instead of uuid4
+        batch.append((str(uuid.UUID(int=rng.getrandbits(128), version=4)),) + row[1:])
+        if len(batch) >= batch_size:
+            client.cur.executemany(
+                "INSERT INTO todo (uuid, image_uri, task_desc, due_date, due_ordinal, complete) VALUES (?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            client.conn.commit()
+            batch.clear()
+    client.cur.executemany(
+        "INSERT INTO todo (uuid, image_uri, task_desc, due_date, due_ordinal, complete) VALUES (?, ?, ?, ?, ?, ?)",
+        batch,
+    )
+    client.conn.commit()
+
+    client.rebuild_search_index()
+    client.cur.execute("ANALYZE")
+    client.conn.commit()
+    client.close()
+
+
+def create_export(file_path, count, seed=0):
+    with open(file_path, "w") as f:
+        write_json_array(f, generate_tasks(count, seed))
+
+
+def ensure_dataset(count, seed=0, directory=DATA_DIRECTORY):
+    # generate the dataset unless it already exists, returns its paths.
+    # the seed is part of neither name, remove the files to regenerate them.
+    os.makedirs(directory, exist_ok=True)
+    db_path, json_path = dataset_paths(count, directory)
+    for file_path, create in [(db_path, create_database), (json_path, create_export)]:
+        if not os.path.exists(file_path):
+            # written under a temporary name, so an interrupted run doesn't
+            # leave a partial dataset behind
+            temp_path = file_path + ".tmp"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            create(temp_path, count, seed)
+            os.replace(temp_path, file_path)
+    return db_path, json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate task databases and JSON exports for the benchmarks."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default=DATA_DIRECTORY)
+    args = parser.parse_args()
+
+    for count in args.sizes:
+        for file_path in ensure_dataset(count, args.seed, args.output_dir):
+            print(f"{file_path}: {os.path.getsize(file_path) / 1024 / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
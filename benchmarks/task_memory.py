@@ -0,0 +1,78 @@
+import os
+import sys
+import uuid
+import sqlite3
+import argparse
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from task import Task
+
+
+class DictTask:
+    # the task as it was before it had slots, for comparison
+    def __init__(self, uuid_, image_uri, description, due_date, complete):
+        self.uuid = uuid_
+        self.description = description
+        self.due_date = due_date
+        self.image_uri = image_uri
+        self.complete = bool(complete)
+
+
+def create_database(count):
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "create table todo (uuid text primary key, image_uri text, task_desc text, due_date text, complete integer)"
+    )
+    start = date(2024, 1, 1)
+    conn.executemany(
+        "insert into todo values (?, ?, ?, ?, ?)",
+        (
+            (
+                str(uuid.uuid4()),
+                "",
+                f"Task number {i}",
+                (start + timedelta(days=i % 730)).isoformat(),
+                i % 3 == 0,
+            )
+            for i in range(count)
+        ),
+    )
+    conn.commit()
+    return conn
+
+
+def measure(conn, row_factory):
+    # bytes held by the loaded tasks, including their strings
+    cur = conn.cursor()
+    cur.row_factory = row_factory
+    tracemalloc.start()
+    cur.execute("select * from todo")
+    tasks = cur.fetchall()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, len(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory used per loaded task.")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    conn = create_database(args.count)
+    for name, row_factory in [
+        ("dict", lambda cursor, row: DictTask(*row)),
+        ("slots", Task.from_row),
+    ]:
+        size, count = measure(conn, row_factory)
+        print(
+            f"{name:>6}: {size / 1024 / 1024:8.1f} MiB for {count} tasks, "
+            f"{size / count:6.1f} bytes per task"
+        )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import os
+import sys
+import copy
+import time
+import shutil
+import argparse
+import tempfile
+
+# no display needed, set QT_QPA_PLATFORM to watch the benchmark run
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from PyQt6.QtCore import QEventLoop, QSignalBlocker, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from database_client import DatabaseClient
+from file_formats import write_json_array
+from main import MainWindow, SharedState
+from generate_dataset import ensure_dataset, generate_tasks
+from database_operations import summarize, format_result
+
+IMPORT_SIZE = 1000
+
+# widget timings are noisier than database ones, a result may be twice as
+# slow as the baseline before run_benchmarks.py reports it as a regression
+TOLERANCE = 1.0
+# and latencies this many milliseconds more on top of that, well within a
+# frame
+SLACK_MS = 5
+
+
+class EventLoopMonitor:
+    # times an operation together with the events it posts (layouts, paints,
+    # deferred deletes). a 1 ms heartbeat timer runs next to it, the longest
+    # gap between its ticks is the longest the event loop was blocked.
+    def __init__(self, app):
+        self.app = app
+        self.ticks = []
+        self.heartbeat = QTimer()
+        self.heartbeat.setInterval(1)
+        self.heartbeat.timeout.connect(lambda: self.ticks.append(time.perf_counter()))
+
+    def measure(self, operation):
+        # returns (wall time, longest stall) in seconds
+        self.settle()
+        self.heartbeat.start()
+        self.ticks = []
+        started = time.perf_counter()
+        operation()
+        self.settle()
+        finished = time.perf_counter()
+        self.heartbeat.stop()
+
+        ticks = [started] + self.ticks + [finished]
+        stall = max(later - earlier for earlier, later in zip(ticks, ticks[1:]))
+        return finished - started, stall
+
+    def settle(self):
+        # run the event loop until the events posted so far are handled
+        loop = QEventLoop()
+        QTimer.singleShot(0, loop.quit)
+        loop.exec()
+        self.app.sendPostedEvents()
+
+
+class Recorder:
+    # samples of every operation, and the number of loaded task widgets
+    # after it last ran
+    def __init__(self, monitor, tasks_widget):
+        self.monitor = monitor
+        self.tasks_widget = tasks_widget
+        self.samples = {}
+        self.widgets = {}
+        self.rows = {}
+
+    def record(self, name, operation, rows=None):
+        self.add(name, *self.monitor.measure(operation), rows)
+
+    def add(self, name, wall, stall, rows=None):
+        self.samples.setdefault(name, []).append((wall, stall))
+        task_widgets = self.tasks_widget.shared_state.task_widgets
+        self.widgets[name] = len(task_widgets.complete) + len(task_widgets.incomplete)
+        self.rows[name] = rows
+
+    def results(self):
+        results = {}
+        for name, samples in self.samples.items():
+            result = summarize([wall for wall, _ in samples], self.rows[name])
+            stalls = summarize([stall for _, stall in samples])
+            result["stall_p95_ms"] = stalls["p95_ms"]
+            result["stall_max_ms"] = stalls["max_ms"]
+            result["widgets"] = self.widgets[name]
+            results[name] = result
+        return results
+
+
+def benchmark_tasks_widget(app, db_path, seed=0, pages=20, runs=20):
+    # scripted use of the main window on a copy of the database
+    with tempfile.TemporaryDirectory() as directory:
+        db_copy = os.path.join(directory, "tasks.db")
+        shutil.copy(db_path, db_copy)
+        import_path = os.path.join(directory, "import.json")
+        with open(import_path, "w") as f:
+            write_json_array(f, generate_tasks(IMPORT_SIZE, seed + 1))
+
+        monitor = EventLoopMonitor(app)
+        client = shared_state = window = None
+
+        def start():
+            # opening the database, building the window and showing the
+            # first page
+            nonlocal client, shared_state, window
+            client = DatabaseClient(db_copy)
+            shared_state = SharedState(client)
+            window = MainWindow(shared_state)
+            window.resize(800, 600)
+            window.show()
+
+        # the windows are timed before there is a tasks widget to count, all
+        # but the last one are closed again
+        startups = []
+        for _ in range(5):
+            if window is not None:
+                close(monitor, window, client)
+            startups.append(monitor.measure(start))
+        tasks_widget = window.tasks_widget
+        recorder = Recorder(monitor, tasks_widget)
+        for startup in startups:
+            recorder.add("startup", *startup)
+
+        tab_widget = tasks_widget.tab_widget
+        tab_widget.setCurrentIndex(1)
+        monitor.settle()
+
+        for _ in range(runs):
+            recorder.record("reload_tasks", tasks_widget.reload_tasks)
+
+        # scrolling up through the to do tab, a page per scroll to the top
+        scroll_bar = tasks_widget.scroll_area_incomplete.verticalScrollBar()
+        for _ in range(pages):
+            if tasks_widget.scroll_area_incomplete.lazy_exhausted:
+                break
+            scroll_bar.setValue(scroll_bar.maximum())
+            monitor.settle()
+            recorder.record("scroll_to_top", lambda: scroll_bar.setValue(0))
+
+        for _ in range(runs):
+            recorder.record("load_more_tasks", tasks_widget.load_more_tasks)
+
+        for _ in range(runs):
+            recorder.record(
+                "switch_tab",
+                lambda: tab_widget.setCurrentIndex(1 - tab_widget.currentIndex()),
+            )
+        tab_widget.setCurrentIndex(1)
+        monitor.settle()
+
+        # toggling and editing the newest loaded tasks, the top of the list
+        layout = tasks_widget.content_layout(False)
+        for _ in range(runs):
+            task_widget = layout.itemAt(0).widget()
+            recorder.record("toggle_task", task_widget.checkbox.click)
+
+        for index in range(runs):
+            task = copy.copy(layout.itemAt(index % layout.count()).widget().task)
+            task.description = f"{task.description} (edited)"
+            recorder.record("edit_task", lambda: client.edit_task(task))
+
+        # the import without its message box: the same database work and
+        # the reload that follows it
+        def import_tasks():
+            with QSignalBlocker(client):
+                client.import_from_file(import_path)
+            shared_state.reload_signal.emit()
+
+        recorder.record("import_tasks", import_tasks, IMPORT_SIZE)
+
+        results = recorder.results()
+        close(monitor, window, client)
+    return results
+
+
+def close(monitor, window, client):
+    window.close()
+    window.deleteLater()
+    monitor.settle()
+    client.close()
+
+
+def run(sizes, seed=0):
+    # results per dataset size, keyed by the size as a string like in JSON
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    datasets = {count: ensure_dataset(count, seed)[0] for count in sizes}
+
+    # the first window pays for loading fonts, styles and the code of every
+    # widget, a run that is thrown away keeps that out of the first size
+    benchmark_tasks_widget(app, datasets[min(sizes)], seed, pages=2, runs=2)
+
+    return {
+        str(count): benchmark_tasks_widget(app, db_path, seed)
+        for count, db_path in datasets.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TasksWidget latencies.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size, operations in run(args.sizes, args.seed).items():
+        for name, result in operations.items():
+            print(
+                format_result(size, name, result)
+                + f"  stall {result['stall_max_ms']:9.2f} ms  {result['widgets']:>6} widgets"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import platform
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import database_operations
+import tasks_widget
+
+# the DatabaseClient operations, and the main window driven offscreen
+SUITES = {
+    "database": database_operations,
+    "gui": tasks_widget,
+}
+
+BASELINE = os.path.join("benchmarks", "baseline.json")
+RESULTS = "benchmark_results.json"
+
+# tail latencies of fewer runs are mostly one slow run, only the median of
+# those is compared
+MIN_TAIL_RUNS = 20
+
+
+def compare(results, baseline, tolerance=None):
+    # the results that are more than tolerance (a fraction) slower than the
+    # baseline, by default the tolerance of their suite, as (suite, size,
+    # operation, metric, baseline, result).
+    # suites, sizes and operations missing from either side are not compared.
+    regressions = []
+    for suite, sizes in results.items():
+        for size, operations in sizes.items():
+            for name, result in operations.items():
+                expected = baseline.get(suite, {}).get(size, {}).get(name)
+                if expected is not None:
+                    regressions.extend(
+                        (suite, size, name) + regression
+                        for regression in compare_result(
+                            result,
+                            expected,
+                            SUITES[suite].TOLERANCE if tolerance is None else tolerance,
+                            SUITES[suite].SLACK_MS,
+                        )
+                    )
+    return regressions
+
+
+def compare_result(result, expected, tolerance, slack_ms):
+    # latencies may be slack_ms slower on top of the tolerance, differences
+    # that small are noise
+    metrics = ["p50_ms"]
+    if min(result["runs"], expected["runs"]) >= MIN_TAIL_RUNS:
+        metrics += ["p95_ms", "stall_p95_ms"]
+
+    regressions = []
+    for metric in metrics:
+        if metric in result and metric in expected:
+            if result[metric] > expected[metric] * (1 + tolerance) + slack_ms:
+                regressions.append((metric, expected[metric], result[metric]))
+    if "rows_per_s" in result and "rows_per_s" in expected:
+        if result["rows_per_s"] < expected["rows_per_s"] / (1 + tolerance):
+            regressions.append(
+                ("rows_per_s", expected["rows_per_s"], result["rows_per_s"])
+            )
+    return regressions
+
+
+def run_benchmarks():
+    parser = argparse.ArgumentParser(
+        description="Run the benchmarks and compare them against the baseline."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--suites", nargs="+", choices=list(SUITES), default=list(SUITES)
+    )
+    parser.add_argument("--output", default=RESULTS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        help="fraction a result may be slower than the baseline, "
+        "by default 0.5 for the database and 1 for the gui",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    args = parser.parse_args()
+
+    results = {suite: SUITES[suite].run(args.sizes, args.seed) for suite in args.suites}
+    report = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+
+    for suite, sizes in results.items():
+        for size, operations in sizes.items():
+            for name, result in operations.items():
+                print(
+                    f"{suite:<8}"
+                    + database_operations.format_result(size, name, result)
+                )
+    print(f"Results written to {args.output}.")
+
+    if args.update_baseline:
+        if os.path.exists(args.baseline):
+            # keep the baseline of suites and sizes that weren't run this time
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            for suite, sizes in results.items():
+                baseline["results"].setdefault(suite, {}).update(sizes)
+            results = baseline["results"]
+        report["results"] = results
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Baseline written to {args.baseline}.")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against, run with --update-baseline.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for suite, size, name, metric, expected, result in regressions:
+        print(
+            f"Regression: {suite} {name} on {size} tasks, "
+            f"{metric} {expected:,.2f} -> {result:,.2f}"
+        )
+    if regressions:
+        print("Some benchmarks regressed.")
+        sys.exit(1)
+    print("No benchmarks regressed.")
+
+
+if __name__ == "__main__":
+    run_benchmarks()
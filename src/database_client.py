@@ -1,8 +1,125 @@
-import json
+import os
+import time
 import uuid
 import sqlite3
-from PyQt6.QtCore import pyqtSignal, QObject
-from task import Task
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from PyQt6.QtCore import pyqtSignal, QObject, QTimer
+from datetime import date, timedelta
+from task import Task, parse_due_date
+from file_formats import open_file, get_file_format, InvalidRecord
+import instrumentation
+
+
+# the columns Task(*row) is built from
+TASK_COLUMNS = "todo.uuid, todo.image_uri, todo.task_desc, todo.due_date, todo.complete"
+
+# PRAGMA user_version of a database with every migration applied
+SCHEMA_VERSION = 1
+
+
+# the databases this process is importing into without the search
+# triggers, by path, see import_from_file
+bulk_imports = Counter()
+bulk_imports_lock = threading.Lock()
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+def due_ordinal(due_date):
+    # the date ordinal stored next to a due date, dates are validated here
+    ordinal = parse_due_date(due_date)[1]
+    if ordinal is None:
+        raise ValueError("due_date must be a date in the format YYYY-MM-DD")
+    return ordinal
+
+
+def overdue(today=None):
+    # due date ranges for lazy_load_tasks_after and count_tasks. a task is
+    # overdue from the start of its due date, like Task.is_overdue
+    today = today or date.today()
+    return (None, today)
+
+
+def due_today(today=None):
+    today = today or date.today()
+    return (today, today)
+
+
+def due_this_week(today=None):
+    today = today or date.today()
+    monday = today - timedelta(days=today.weekday())
+    return (monday, monday + timedelta(days=6))
+
+
+def fts_query(text):
+    # turn what the user typed into an FTS5 query that matches tasks
+    # containing every word, the words as prefixes so results show up while
+    # typing. returns None if there is nothing to search for.
+    terms = ['"' + term.replace('"', '""') + '"*' for term in text.split()]
+    if not terms:
+        return None
+    return " ".join(terms)
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        # (index of the record in the file, reason) for every skipped record
+        self.failed = []
+        # set when the import was stopped early, batches committed before
+        # that are kept
+        self.cancelled = False
+
+
+class TaskBatch:
+    # the changes made inside DatabaseClient.batch() that have not been
+    # announced yet
+    def __init__(self):
+        self.added = []
+        self.edited = []
+        self.deleted = []
+
+    def __len__(self):
+        return len(self.added) + len(self.edited) + len(self.deleted)
+
+
+class ConnectionProfile:
+    # pragmas applied to every connection. WAL lets readers run while a
+    # write is committing and, together with synchronous=normal, turns a
+    # commit into an append to the log instead of a synced journal rewrite.
+    def __init__(
+        self,
+        journal_mode="wal",
+        synchronous="normal",
+        cache_size=-16000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="memory",
+        busy_timeout=5000,
+    ):
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.temp_store = temp_store
+        self.busy_timeout = busy_timeout
+
+    def apply(self, conn):
+        for pragma in [
+            "journal_mode",
+            "synchronous",
+            "cache_size",
+            "mmap_size",
+            "temp_store",
+            "busy_timeout",
+        ]:
+            value = getattr(self, pragma)
+            if value is not None:
+                conn.execute(f"PRAGMA {pragma}={value}")
 
 
 class DatabaseClient(QObject):
@@ -13,140 +130,787 @@ class DatabaseClient(QObject):
     deleted_task = pyqtSignal(str)
     cleared_tasks = pyqtSignal()
     loaded_tasks = pyqtSignal(list)
+    import_progress = pyqtSignal(int, int)
+    export_progress = pyqtSignal(int, int)
+    batched_changes = pyqtSignal(object)
+    backup_progress = pyqtSignal(int, int)
+
+    # imports of files at least this large rebuild the search index at the
+    # end instead of indexing every row as it is inserted
+    SEARCH_REBUILD_SIZE = 1024 * 1024
+    # searches with at most this many matches are paged by sorting the
+    # matches, larger ones by walking the date index
+    SEARCH_JOIN_LIMIT = 2000
 
-    def __init__(self, db_name):
+    def __init__(self, db_name, profile=None):
         super().__init__()
         self.db_name = db_name
+        self.profile = profile or ConnectionProfile()
+
+        # writes go through conn, reads through read_conn so they never wait
+        # on a commit. an in-memory database only exists on its own
+        # connection, so there both are the same.
         self.conn, self.cur = self.connect_db()
+        if self.is_in_memory():
+            self.read_conn, self.read_cur = self.conn, self.cur
+        else:
+            self.read_conn, self.read_cur = self.connect_read_db()
+
+        # task queries get their own cursor that builds Tasks straight from
+        # the rows, read_cur keeps returning plain tuples for everything else
+        self.task_cur = self.read_conn.cursor()
+        self.task_cur.row_factory = Task.from_row
+
+        # number of matches per search query, see search_size
+        self.search_sizes = {}
+
+        # state of the batch() block in progress, if any
+        self.pending_batch = None
+        self.batch_depth = 0
+        self.batch_max_size = None
+        self.batch_max_delay = None
+        self.batch_started = None
+        # flushes a batch with a max_delay whenever the event loop gets to
+        # run inside the block
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setSingleShot(True)
+        self.batch_timer.timeout.connect(self.flush_batch)
+
+    def is_in_memory(self):
+        return self.db_name in (":memory:", "")
 
     def connect_db(self):
         conn = sqlite3.connect(self.db_name)
+        self.profile.apply(conn)
+        instrumentation.trace_connection(conn, self.db_name)
         cur = conn.cursor()
+        self.create_schema(cur)
+        return conn, cur
 
+    def create_schema(self, cur):
         cur.execute(
             "create table if not exists todo (uuid text primary key, image_uri text, task_desc text, due_date text, complete integer)"
         )
+
+        self.migrate(cur)
+        self.create_counters(cur)
+        self.create_search_index(cur)
+
+    @staticmethod
+    def migrate(cur):
+        # bring the schema up to SCHEMA_VERSION, PRAGMA user_version holds
+        # the version a database is at
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute("PRAGMA user_version")
+            version = cur.fetchone()[0]
+
+            if version < 1:
+                # due dates are also stored as date ordinals, the integer
+                # sorts and compares like the date and (due_ordinal, uuid) is
+                # the paging key, so both indexes end in uuid to give keyset
+                # pagination a stable tie-break. dates that are not valid
+                # "YYYY-MM-DD" strings get an ordinal of 0.
+                cur.execute("ALTER TABLE todo ADD COLUMN due_ordinal integer")
+                cur.execute(
+                    """UPDATE todo SET due_ordinal = CASE
+                        WHEN due_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+                            AND due_date >= '0001-01-01' AND date(julianday(due_date)) = due_date
+                        THEN CAST(julianday(due_date) - 1721424.5 AS integer)
+                        ELSE 0 END"""
+                )
+                for index in [
+                    "idx_todo_complete_due_date",
+                    "idx_todo_complete_due_date_uuid",
+                    "idx_todo_due_date_uuid",
+                ]:
+                    cur.execute(f"DROP INDEX IF EXISTS {index}")
+                cur.execute(
+                    "CREATE INDEX idx_todo_complete_due_ordinal_uuid ON todo (complete, due_ordinal, uuid)"
+                )
+                cur.execute(
+                    "CREATE INDEX idx_todo_due_ordinal_uuid ON todo (due_ordinal, uuid)"
+                )
+
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except sqlite3.Error:
+            cur.execute("ROLLBACK")
+            raise
+        else:
+            cur.execute("COMMIT")
+
+    @staticmethod
+    def create_counters(cur):
+        # the number of tasks per status is kept in todo_counts by triggers,
+        # so count_tasks is a primary key lookup instead of an index scan.
+        # the triggers run on every connection, so imports from worker
+        # threads and clear_all keep the counts correct as well.
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='todo_counts'"
+            )
+            if cur.fetchone() is None:
+                cur.execute(
+                    "CREATE TABLE todo_counts (complete integer primary key, count integer not null)"
+                )
+                cur.execute(
+                    "INSERT INTO todo_counts SELECT complete, COUNT(*) FROM todo GROUP BY complete"
+                )
+
+            cur.execute(
+                """CREATE TRIGGER IF NOT EXISTS todo_counts_insert AFTER INSERT ON todo BEGIN
+                    INSERT INTO todo_counts VALUES (NEW.complete, 1)
+                    ON CONFLICT(complete) DO UPDATE SET count = count + 1;
+                END"""
+            )
+            cur.execute(
+                """CREATE TRIGGER IF NOT EXISTS todo_counts_delete AFTER DELETE ON todo BEGIN
+                    UPDATE todo_counts SET count = count - 1 WHERE complete = OLD.complete;
+                END"""
+            )
+            cur.execute(
+                """CREATE TRIGGER IF NOT EXISTS todo_counts_update AFTER UPDATE OF complete ON todo
+                WHEN OLD.complete IS NOT NEW.complete BEGIN
+                    UPDATE todo_counts SET count = count - 1 WHERE complete = OLD.complete;
+                    INSERT INTO todo_counts VALUES (NEW.complete, 1)
+                    ON CONFLICT(complete) DO UPDATE SET count = count + 1;
+                END"""
+            )
+        except sqlite3.Error:
+            cur.execute("ROLLBACK")
+            raise
+        else:
+            cur.execute("COMMIT")
+
+    def create_search_index(self, cur):
+        # full text index over the task descriptions. the index doesn't store
+        # the text itself, it points at the rows of todo by rowid and is kept
+        # in sync by triggers. bulk imports drop the triggers and rebuild the
+        # index afterwards, marking the database in todo_meta while they run.
+        # a marked database that no import of this process is working on had
+        # its import interrupted, its index is rebuilt here.
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS todo_meta (key text primary key, value)"
+            )
+            cur.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='todo_fts'"
+            )
+            missing = cur.fetchone() is None
+            cur.execute("SELECT 1 FROM todo_meta WHERE key='bulk_import'")
+            interrupted = cur.fetchone() is not None and not self.bulk_importing()
+            if missing or interrupted:
+                cur.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS todo_fts USING fts5(task_desc, content='todo', content_rowid='rowid', prefix='2 3')"
+                )
+                DatabaseClient.create_search_triggers(cur)
+                cur.execute("INSERT INTO todo_fts(todo_fts) VALUES ('rebuild')")
+                cur.execute("DELETE FROM todo_meta WHERE key='bulk_import'")
+        except sqlite3.Error:
+            cur.execute("ROLLBACK")
+            raise
+        else:
+            cur.execute("COMMIT")
+
+    def bulk_importing(self):
+        # whether an import of this process runs without the search triggers
+        with bulk_imports_lock:
+            return bulk_imports[self.db_path()] > 0
+
+    def db_path(self):
+        if self.is_in_memory():
+            # every connection to it is a database of its own
+            return id(self)
+        return os.path.realpath(self.db_name)
+
+    @staticmethod
+    def create_search_triggers(cur):
+        cur.execute(
+            """CREATE TRIGGER IF NOT EXISTS todo_fts_insert AFTER INSERT ON todo BEGIN
+                INSERT INTO todo_fts(rowid, task_desc) VALUES (NEW.rowid, NEW.task_desc);
+            END"""
+        )
+        cur.execute(
+            """CREATE TRIGGER IF NOT EXISTS todo_fts_delete AFTER DELETE ON todo BEGIN
+                INSERT INTO todo_fts(todo_fts, rowid, task_desc) VALUES ('delete', OLD.rowid, OLD.task_desc);
+            END"""
+        )
         cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_todo_complete_due_date ON todo (complete, due_date)"
+            """CREATE TRIGGER IF NOT EXISTS todo_fts_update AFTER UPDATE OF task_desc ON todo
+            WHEN OLD.task_desc IS NOT NEW.task_desc BEGIN
+                INSERT INTO todo_fts(todo_fts, rowid, task_desc) VALUES ('delete', OLD.rowid, OLD.task_desc);
+                INSERT INTO todo_fts(rowid, task_desc) VALUES (NEW.rowid, NEW.task_desc);
+            END"""
         )
 
-        return conn, cur
+    @staticmethod
+    def drop_search_triggers(cur):
+        for trigger in ["todo_fts_insert", "todo_fts_delete", "todo_fts_update"]:
+            cur.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    def start_bulk_import(self):
+        # drop the search triggers for an import, until rebuild_search_index
+        with bulk_imports_lock:
+            bulk_imports[self.db_path()] += 1
+        self.cur.execute("BEGIN IMMEDIATE")
+        try:
+            self.drop_search_triggers(self.cur)
+            self.cur.execute(
+                "INSERT OR REPLACE INTO todo_meta VALUES ('bulk_import', 1)"
+            )
+        except sqlite3.Error:
+            self.cur.execute("ROLLBACK")
+            with bulk_imports_lock:
+                bulk_imports[self.db_path()] -= 1
+            raise
+        else:
+            self.cur.execute("COMMIT")
+
+    def rebuild_search_index(self):
+        # reindex every task and put the triggers back in place
+        self.cur.execute("BEGIN IMMEDIATE")
+        try:
+            self.create_search_triggers(self.cur)
+            self.cur.execute("INSERT INTO todo_fts(todo_fts) VALUES ('rebuild')")
+            if not self.bulk_importing():
+                self.cur.execute("DELETE FROM todo_meta WHERE key='bulk_import'")
+        except sqlite3.Error:
+            self.cur.execute("ROLLBACK")
+            raise
+        else:
+            self.cur.execute("COMMIT")
+
+    def connect_read_db(self):
+        conn = sqlite3.connect(self.db_name)
+        self.profile.apply(conn)
+        instrumentation.trace_connection(conn, self.db_name)
+        conn.execute("PRAGMA query_only=ON")
+        return conn, conn.cursor()
+
+    def close(self):
+        if self.read_conn is not self.conn:
+            self.read_conn.close()
+        self.conn.close()
+
+    def iter_tasks(self, batch_size=500):
+        # stream every task from a single query on a dedicated cursor, so
+        # only one batch of rows is held in memory at a time and the shared
+        # cursor stays free for other calls while the caller iterates
+        cur = self.read_conn.cursor()
+        cur.row_factory = Task.from_row
+        try:
+            cur.execute(f"select {TASK_COLUMNS} from todo")
+            while True:
+                tasks = cur.fetchmany(batch_size)
+                if not tasks:
+                    break
+                yield from tasks
+        finally:
+            cur.close()
 
     def get_all_tasks(self):
-        self.cur.execute("select uuid from todo")
-        task_uuids = self.cur.fetchall()
-        tasks = []
-        for task_uuid in task_uuids:
-            tasks.append(self.get_task(task_uuid[0]))
-        return tasks
+        return list(self.iter_tasks())
 
     def get_task(self, task_uuid):
-        self.cur.execute("select * from todo where uuid=?", (task_uuid,))
-        task = self.cur.fetchone()
-        if task is None:
-            return None
-        return Task(
-            task[0],
-            task[1],
-            task[2],
-            task[3],
-            bool(task[4]),
+        self.task_cur.execute(
+            f"select {TASK_COLUMNS} from todo where uuid=?", (task_uuid,)
         )
+        return self.task_cur.fetchone()
 
-    def count_tasks(self, complete=None):
-        if complete is None:
-            self.cur.execute("SELECT COUNT(*) FROM todo")
+    def count_tasks(self, complete=None, search=None, due=None):
+        match = fts_query(search or "")
+        if match is None and due is None:
+            if complete is None:
+                self.read_cur.execute(
+                    "SELECT COALESCE(SUM(count), 0) FROM todo_counts"
+                )
+            else:
+                self.read_cur.execute(
+                    "SELECT COALESCE(SUM(count), 0) FROM todo_counts WHERE complete=?",
+                    (int(complete),),
+                )
+        elif complete is None and due is None:
+            # only the tasks matching the search, counted from the index
+            self.read_cur.execute(
+                "SELECT COUNT(*) FROM todo_fts WHERE todo_fts MATCH ?", (match,)
+            )
         else:
-            self.cur.execute(
-                "SELECT COUNT(*) FROM todo WHERE complete=?", (int(complete),)
+            source, conditions, params = self.filter_tasks(
+                complete, search, due, paged=False
             )
-        return self.cur.fetchone()[0]
+            self.read_cur.execute(
+                f"SELECT COUNT(*) FROM {source} WHERE " + " AND ".join(conditions),
+                params,
+            )
+        return self.read_cur.fetchone()[0]
+
+    def filter_tasks(self, complete=None, search=None, due=None, paged=True):
+        # the FROM clause, conditions and parameters that select the tasks
+        # with the given status, matching search and due within due, a
+        # (first, last) range of dates where either end may be None. dates
+        # are compared as ordinals, so the ranges are index range scans.
+        source = "todo"
+        conditions = []
+        params = []
+        match = fts_query(search or "")
+        if match is not None:
+            if not paged or self.search_size(match) <= self.SEARCH_JOIN_LIMIT:
+                # few matches: fetch them through the search index and sort
+                # them, instead of walking the whole date index to find them
+                source = "todo_fts CROSS JOIN todo ON todo.rowid = todo_fts.rowid"
+                conditions.append("todo_fts MATCH ?")
+            else:
+                conditions.append(
+                    "todo.rowid IN (SELECT rowid FROM todo_fts WHERE todo_fts MATCH ?)"
+                )
+            params.append(match)
+        if complete is not None:
+            conditions.append("complete = ?")
+            params.append(int(complete))
+        if due is not None:
+            first, last = due
+            # tasks without a valid date have an ordinal of 0 and are never due
+            conditions.append("due_ordinal >= ?")
+            params.append(1 if first is None else first.toordinal())
+            if last is not None:
+                conditions.append("due_ordinal <= ?")
+                params.append(last.toordinal())
+        return source, conditions, params
 
     def lazy_load_tasks(self, offset, limit, complete=None):
         if complete is None:
-            query = "SELECT * FROM todo ORDER BY due_date ASC LIMIT ? OFFSET ?"
+            query = f"SELECT {TASK_COLUMNS} FROM todo ORDER BY due_ordinal ASC, uuid ASC LIMIT ? OFFSET ?"
             params = (limit, offset)
         else:
-            query = "SELECT * FROM todo WHERE complete = ? ORDER BY due_date ASC LIMIT ? OFFSET ?"
+            query = f"SELECT {TASK_COLUMNS} FROM todo WHERE complete = ? ORDER BY due_ordinal ASC, uuid ASC LIMIT ? OFFSET ?"
             params = (int(complete), limit, offset)
 
-        self.cur.execute(query, params)
-        res = [Task(*row) for row in self.cur.fetchall()]
+        self.task_cur.execute(query, params)
+        res = self.task_cur.fetchall()
         self.loaded_tasks.emit(res)
         return res
 
+    def lazy_load_tasks_after(
+        self, cursor, limit, complete=None, search=None, due=None
+    ):
+        # keyset pagination: resume after the (due_ordinal, uuid) of the last
+        # task seen instead of skipping rows with OFFSET, so every page costs
+        # the same no matter how deep it is. a cursor of None starts at the
+        # beginning. search and due limit the pages like in filter_tasks.
+        source, conditions, params = self.filter_tasks(complete, search, due)
+        if cursor is not None:
+            conditions.append("(due_ordinal, uuid) > (?, ?)")
+            params.extend(cursor)
+
+        query = f"SELECT {TASK_COLUMNS} FROM {source}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY due_ordinal ASC, uuid ASC LIMIT ?"
+        params.append(limit)
+
+        self.task_cur.execute(query, params)
+        res = self.task_cur.fetchall()
+        self.loaded_tasks.emit(res)
+        return res
+
+    def search_size(self, match):
+        # roughly how many tasks match, to pick a query plan. cached per
+        # query, so every page of the same search doesn't count again.
+        size = self.search_sizes.get(match)
+        if size is None:
+            if len(self.search_sizes) >= 64:
+                self.search_sizes.clear()
+            self.read_cur.execute(
+                "SELECT COUNT(*) FROM todo_fts WHERE todo_fts MATCH ?", (match,)
+            )
+            size = self.search_sizes[match] = self.read_cur.fetchone()[0]
+        return size
+
+    def search(self, search, limit, cursor=None, complete=None):
+        # the tasks whose description matches search, best match first.
+        # returns the tasks and the cursor to pass in for the next page, which
+        # is None once there are no more results.
+        match = fts_query(search)
+        if match is None:
+            return [], None
+
+        conditions = ["todo_fts MATCH ?"]
+        params = [match]
+        if complete is not None:
+            conditions.append("todo.complete = ?")
+            params.append(int(complete))
+        if cursor is not None:
+            conditions.append("(todo_fts.rank, todo.uuid) > (?, ?)")
+            params.extend(cursor)
+        params.append(limit)
+
+        self.read_cur.execute(
+            f"SELECT {TASK_COLUMNS}, todo_fts.rank FROM todo_fts JOIN todo ON todo.rowid = todo_fts.rowid WHERE "
+            + " AND ".join(conditions)
+            + " ORDER BY todo_fts.rank, todo.uuid LIMIT ?",
+            params,
+        )
+        rows = self.read_cur.fetchall()
+        tasks = [Task(*row[:5]) for row in rows]
+        if len(rows) < limit:
+            return tasks, None
+        return tasks, (rows[-1][5], rows[-1][0])
+
+    def matches_search(self, task_uuid, search):
+        match = fts_query(search)
+        if match is None:
+            return True
+        self.read_cur.execute(
+            "SELECT 1 FROM todo_fts WHERE todo_fts MATCH ? AND rowid = (SELECT rowid FROM todo WHERE uuid = ?)",
+            (match, task_uuid),
+        )
+        return self.read_cur.fetchone() is not None
+
+    @contextmanager
+    def batch(self, max_size=None, max_delay=None):
+        # defer the commits of add_task, edit_task and delete_task until the
+        # block exits and announce all changes with a single batched_changes
+        # signal instead of one signal per row. the batch is also flushed
+        # once it holds max_size changes or is older than max_delay seconds,
+        # the age is checked on every change and by a timer that fires when
+        # the block runs the event loop, e.g. for a progress dialog.
+        # reads don't see the changes until they are flushed, except on an
+        # in-memory database, where reads share the write connection. if the
+        # block raises, the changes that were not flushed yet are rolled
+        # back. nested blocks join the outermost one.
+        outermost = self.batch_depth == 0
+        if outermost:
+            self.pending_batch = TaskBatch()
+            self.batch_max_size = max_size
+            self.batch_max_delay = max_delay
+            self.batch_started = time.monotonic()
+            if max_delay is not None:
+                self.batch_timer.start(int(max_delay * 1000))
+
+        self.batch_depth += 1
+        try:
+            yield self.pending_batch
+        except BaseException:
+            if outermost:
+                self.batch_timer.stop()
+                self.conn.rollback()
+                self.pending_batch = None
+            raise
+        finally:
+            self.batch_depth -= 1
+
+        if outermost:
+            self.flush_batch()
+            self.batch_timer.stop()
+            self.pending_batch = None
+
+    def flush_batch(self):
+        if self.pending_batch is None:
+            return
+
+        self.conn.commit()
+        changes = self.pending_batch
+        self.pending_batch = TaskBatch()
+        self.batch_started = time.monotonic()
+        if self.batch_max_delay is not None:
+            self.batch_timer.start(int(self.batch_max_delay * 1000))
+        if len(changes):
+            self.batched_changes.emit(changes)
+
+    def _commit_change(self, signal, kind, value):
+        if self.pending_batch is None:
+            self.conn.commit()
+            signal.emit(value)
+            return
+
+        getattr(self.pending_batch, kind).append(value)
+        if (
+            self.batch_max_size is not None
+            and len(self.pending_batch) >= self.batch_max_size
+        ) or (
+            self.batch_max_delay is not None
+            and time.monotonic() - self.batch_started >= self.batch_max_delay
+        ):
+            self.flush_batch()
+
     def add_task(self, new_task):
         self.cur.execute(
-            "insert into todo (uuid, image_uri, task_desc, due_date, complete) values (?, ?, ?, ?, ?)",
+            "insert into todo (uuid, image_uri, task_desc, due_date, due_ordinal, complete) values (?, ?, ?, ?, ?, ?)",
             (
                 new_task.uuid,
                 new_task.image_uri,
                 new_task.description,
                 new_task.due_date,
+                due_ordinal(new_task.due_date),
                 int(new_task.complete),
             ),
         )
-        self.conn.commit()
-        self.added_task.emit(new_task)
+        self._commit_change(self.added_task, "added", new_task)
 
     def edit_task(self, edited_task):
+        ordinal = edited_task.due_ordinal
+        if ordinal is None:
+            # older databases can hold due dates that are not valid, those
+            # tasks can still be edited as long as the date is left as is
+            self.cur.execute(
+                "select due_date from todo where uuid=?", (edited_task.uuid,)
+            )
+            row = self.cur.fetchone()
+            if row is None or row[0] != edited_task.due_date:
+                ordinal = due_ordinal(edited_task.due_date)
+            else:
+                ordinal = 0
+
         self.cur.execute(
-            "update todo set image_uri=?, task_desc=?, due_date=?, complete=? where uuid=?",
+            "update todo set image_uri=?, task_desc=?, due_date=?, due_ordinal=?, complete=? where uuid=?",
             (
                 edited_task.image_uri,
                 edited_task.description,
                 edited_task.due_date,
+                ordinal,
                 int(edited_task.complete),
                 edited_task.uuid,
             ),
         )
-        self.conn.commit()
-        self.edited_task.emit(edited_task)
+        self._commit_change(self.edited_task, "edited", edited_task)
 
     def delete_task(self, task_uuid):
         self.cur.execute("delete from todo where uuid=?", (task_uuid,))
-        self.conn.commit()
-        self.deleted_task.emit(task_uuid)
+        self._commit_change(self.deleted_task, "deleted", task_uuid)
 
     def clear_all(self):
-        self.cur.execute("delete from todo")
-        self.conn.commit()
+        self.flush_batch()
+        # empty the search index in one go instead of row by row
+        self.cur.execute("BEGIN IMMEDIATE")
+        try:
+            self.drop_search_triggers(self.cur)
+            self.cur.execute("delete from todo")
+            self.cur.execute("INSERT INTO todo_fts(todo_fts) VALUES ('delete-all')")
+            self.create_search_triggers(self.cur)
+        except sqlite3.Error:
+            self.cur.execute("ROLLBACK")
+            raise
+        else:
+            self.cur.execute("COMMIT")
         self.cleared_tasks.emit()
 
-    def import_from_file(self, file_path):
-        with open(file_path, "r") as f:
-            tasks = json.load(f)
+    def import_from_file(
+        self,
+        file_path,
+        batch_size=1000,
+        cancel_event=None,
+        rebuild_search_index=None,
+        file_format=None,
+    ):
+        # parse the file one record at a time and insert it in batches, each
+        # batch in its own transaction. invalid records are skipped and
+        # reported in the result instead of aborting the whole import.
+        # import_progress reports (imported, failed) after every batch, and
+        # setting cancel_event stops the import after the current batch.
+        # with rebuild_search_index the search index is rebuilt once at the
+        # end instead of being updated for every row, by default for files
+        # larger than SEARCH_REBUILD_SIZE bytes. the file format is picked
+        # from the extension unless it is given, see file_formats.
+        file_format = get_file_format(file_path, file_format)
+        result = ImportResult()
+        batch = []
 
-        task_objects = [
-            (
-                str(uuid.uuid4()),
-                task.get("image_uri", None),
-                task.get("description", None),
-                task.get("due_date", None),
-                int(task.get("complete", None)),
+        # the batches below run in their own transactions
+        self.flush_batch()
+
+        if rebuild_search_index is None:
+            rebuild_search_index = (
+                os.path.getsize(file_path) >= self.SEARCH_REBUILD_SIZE
             )
-            for task in tasks
-        ]
+        if rebuild_search_index:
+            self.start_bulk_import()
 
+        try:
+            with open_file(file_path, "r", newline=file_format.newline) as f:
+                for index, record in enumerate(file_format.read(f)):
+                    try:
+                        batch.append((index, self.record_to_row(record)))
+                    except ValueError as e:
+                        result.failed.append((index, str(e)))
+                        continue
+
+                    if len(batch) >= batch_size:
+                        self._insert_batch(batch, result)
+                        batch.clear()
+                        if cancel_event is not None and cancel_event.is_set():
+                            result.cancelled = True
+                            break
+
+            if batch and not result.cancelled:
+                self._insert_batch(batch, result)
+        finally:
+            if rebuild_search_index:
+                with bulk_imports_lock:
+                    bulk_imports[self.db_path()] -= 1
+                self.rebuild_search_index()
+
+        self.imported_tasks.emit(result.imported)
+        return result
+
+    def _insert_batch(self, batch, result):
         self.conn.execute("BEGIN TRANSACTION")
 
         try:
             self.cur.executemany(
-                "INSERT INTO todo (uuid, image_uri, task_desc, due_date, complete) VALUES (?, ?, ?, ?, ?)",
-                task_objects,
+                "INSERT INTO todo (uuid, image_uri, task_desc, due_date, due_ordinal, complete) VALUES (?, ?, ?, ?, ?, ?)",
+                [row for _, row in batch],
             )
         except sqlite3.Error as e:
             self.conn.rollback()
-            print(f"An error occurred: {e}")
+            result.failed.extend((index, str(e)) for index, _ in batch)
         else:
             self.conn.commit()
+            result.imported += len(batch)
+
+        self.import_progress.emit(result.imported, len(result.failed))
+
+    @staticmethod
+    def record_to_row(record):
+        if isinstance(record, InvalidRecord):
+            raise ValueError(record.reason)
+        if not isinstance(record, dict):
+            raise ValueError("record is not an object")
+
+        for key in ["image_uri", "description", "due_date"]:
+            if not isinstance(record.get(key), (str, type(None))):
+                raise ValueError(f"{key} must be a string")
+        due_date = record.get("due_date")
+        ordinal = due_ordinal(due_date)
 
-        self.imported_tasks.emit(len(tasks))
+        complete = record.get("complete")
+        if not isinstance(complete, (bool, int)):
+            raise ValueError("complete must be true or false")
 
-    def export_to_file(self, file_path):
-        tasks = self.get_all_tasks()
-        with open(file_path, "w") as f:
-            f.write(json.dumps([self.task_to_dict(task) for task in tasks], indent=4))
+        return (
+            str(uuid.uuid4()),
+            record.get("image_uri", None),
+            record.get("description", None),
+            due_date,
+            ordinal,
+            int(bool(complete)),
+        )
+
+    def export_to_file(
+        self,
+        file_path,
+        compression=None,
+        chunk_size=1000,
+        cancel_event=None,
+        file_format=None,
+    ):
+        # stream the tasks straight from the database cursor into the file,
+        # export_progress reports (exported, total) after every chunk. setting
+        # cancel_event removes the partial file and raises OperationCancelled.
+        file_format = get_file_format(file_path, file_format)
+        total = self.count_tasks()
+
+        def task_dicts():
+            for task in self.iter_tasks(chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise OperationCancelled()
+                yield self.task_to_dict(task)
+
+        try:
+            with open_file(
+                file_path, "w", compression, newline=file_format.newline
+            ) as f:
+                return file_format.write(
+                    f,
+                    task_dicts(),
+                    chunk_size,
+                    lambda exported: self.export_progress.emit(exported, total),
+                )
+        except OperationCancelled:
+            os.remove(file_path)
+            raise
+
+    def backup_to_file(self, file_path, pages=256, pause=0.005, cancel_event=None):
+        # copy the database into file_path with the sqlite backup API,
+        # pages at a time with a pause in between, so a large database
+        # doesn't hog the disk. the copy is taken from a single read
+        # transaction: in WAL mode that doesn't block writers, and their
+        # commits don't restart the backup. backup_progress reports (copied,
+        # total) pages after every step. the file is only replaced once the
+        # backup is complete, setting cancel_event leaves it untouched and
+        # raises OperationCancelled.
+        self.flush_batch()
+        temporary_path = file_path + ".tmp"
+        target = sqlite3.connect(temporary_path)
+        source = self.read_conn
+
+        def progress(status, remaining, total):
+            self.backup_progress.emit(total - remaining, total)
+            if cancel_event is not None and cancel_event.is_set():
+                raise OperationCancelled()
+            time.sleep(pause)
+
+        try:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=pages, progress=progress)
+            # the copy has the WAL header of the source, opening it would
+            # leave -wal and -shm files next to it
+            target.execute("PRAGMA journal_mode=DELETE")
+            pages_copied = target.execute("PRAGMA page_count").fetchone()[0]
+        except BaseException:
+            target.close()
+            os.remove(temporary_path)
+            raise
+        finally:
+            source.rollback()
+
+        target.close()
+        os.replace(temporary_path, file_path)
+        return pages_copied
+
+    def restore_from_file(self, file_path, pages=256, pause=0.005, cancel_event=None):
+        # replace the contents of the database with a backup made by
+        # backup_to_file, pages at a time like the backup. the backup is
+        # checked before anything is overwritten, older backups are migrated
+        # after the restore. a cancelled restore is rolled back, as the
+        # pages are only committed once all of them are copied.
+        if not os.path.exists(file_path):
+            raise ValueError(f"{file_path} does not exist")
+        # quoted, so characters like ? and # in the path aren't read as part
+        # of the URI
+        source = sqlite3.connect(
+            f"file:{pathname2url(os.path.abspath(file_path))}?mode=ro", uri=True
+        )
+        try:
+            try:
+                tables = {
+                    row[0]
+                    for row in source.execute(
+                        "SELECT name FROM sqlite_master WHERE type='table'"
+                    )
+                }
+                integrity = source.execute("PRAGMA quick_check").fetchone()[0]
+            except sqlite3.DatabaseError as e:
+                raise ValueError(f"{file_path} is not a backup: {e}") from e
+            if "todo" not in tables or integrity != "ok":
+                raise ValueError(f"{file_path} is not a backup of the task database")
+
+            def progress(status, remaining, total):
+                self.backup_progress.emit(total - remaining, total)
+                if cancel_event is not None and cancel_event.is_set():
+                    raise OperationCancelled()
+                time.sleep(pause)
+
+            self.flush_batch()
+            source.backup(self.conn, pages=pages, progress=progress)
+        finally:
+            source.close()
+
+        self.create_schema(self.cur)
+        self.search_sizes.clear()
+        self.cleared_tasks.emit()
 
     @staticmethod
     def task_to_dict(task):
@@ -0,0 +1,275 @@
+import csv
+import gzip
+import functools
+import json
+import lzma
+
+COMPRESSIONS = {
+    "gzip": gzip.open,
+    "lzma": lzma.open,
+}
+
+COMPRESSION_EXTENSIONS = {
+    ".gz": "gzip",
+    ".xz": "lzma",
+    ".lzma": "lzma",
+}
+
+
+def compression_for_path(file_path):
+    for extension, compression in COMPRESSION_EXTENSIONS.items():
+        if file_path.lower().endswith(extension):
+            return compression
+    return None
+
+
+def open_file(file_path, mode="r", compression=None, newline=None):
+    # open a text file, transparently (de)compressing it. the compression is
+    # picked from the file extension unless it is given explicitly.
+    if compression is None:
+        compression = compression_for_path(file_path)
+    if compression is None:
+        return open(file_path, mode, newline=newline)
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    return COMPRESSIONS[compression](file_path, mode + "t", newline=newline)
+
+
+def write_json_array(f, items, chunk_size=1000, progress=None):
+    # write items as a JSON array without building the whole document in
+    # memory. the output is byte for byte what json.dumps(items, indent=4)
+    # would produce. progress is called with the number of items written
+    # after every chunk.
+    count = 0
+    chunk = []
+    for item in items:
+        chunk.append(
+            ("[\n    " if count == 0 else ",\n    ")
+            + json.dumps(item, indent=4).replace("\n", "\n    ")
+        )
+        count += 1
+        if len(chunk) >= chunk_size:
+            f.write("".join(chunk))
+            chunk.clear()
+            if progress is not None:
+                progress(count)
+
+    f.write("".join(chunk))
+    f.write("\n]" if count else "[]")
+    if progress is not None:
+        progress(count)
+    return count
+
+
+# characters that may follow the prefix of a JSON number
+NUMBER_CONTINUATIONS = frozenset("0123456789.eE+-")
+
+
+def iter_json_array(f, chunk_size=65536):
+    # parse a JSON array one element at a time, reading the file in chunks so
+    # memory use is bounded by the largest single element
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    def expect(characters):
+        nonlocal position
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] not in characters:
+            raise ValueError(f"Expected one of {characters!r} in JSON array")
+        position += 1
+        return buffer[position - 1]
+
+    expect("[")
+    skip_whitespace()
+    if position < len(buffer) and buffer[position] == "]":
+        return
+
+    while True:
+        skip_whitespace()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # a number cut off by the end of the chunk still decodes, "2" of
+            # "2.5" or "1" of "1e3" as well, so only trust a match that is
+            # followed by something that can't continue it
+            if not eof and (
+                end == len(buffer) or buffer[end] in NUMBER_CONTINUATIONS
+            ):
+                fill()
+                continue
+            position = end
+            break
+        yield item
+        if expect(",]") == "]":
+            return
+
+
+class InvalidRecord:
+    # stands in for a record that couldn't be parsed, so the reader can go on
+    # with the next one and the import reports this one as failed
+    def __init__(self, reason):
+        self.reason = reason
+
+
+def iter_ndjson(f):
+    # one JSON value per line, blank lines are skipped. lines that are not
+    # valid JSON are yielded as InvalidRecords
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield InvalidRecord(f"Invalid JSON on line {line_number}: {e}")
+
+
+def write_ndjson(f, items, chunk_size=1000, progress=None):
+    count = 0
+    chunk = []
+    for item in items:
+        chunk.append(json.dumps(item, separators=(",", ":")) + "\n")
+        count += 1
+        if len(chunk) >= chunk_size:
+            f.write("".join(chunk))
+            chunk.clear()
+            if progress is not None:
+                progress(count)
+
+    f.write("".join(chunk))
+    if progress is not None:
+        progress(count)
+    return count
+
+
+CSV_BOOLEANS = {"true": True, "false": False, "1": True, "0": False}
+
+
+def iter_csv(f, boolean_fields=()):
+    # rows as dicts keyed by the header. values are strings, except for the
+    # boolean fields, which are read back from true/false. values that are
+    # neither are left as they are for the caller to reject.
+    for row in csv.DictReader(f):
+        for field in boolean_fields:
+            value = row.get(field)
+            if isinstance(value, str) and value.lower() in CSV_BOOLEANS:
+                row[field] = CSV_BOOLEANS[value.lower()]
+        yield row
+
+
+def write_csv(f, items, chunk_size=1000, progress=None):
+    # the header is taken from the keys of the first item, None is written
+    # as an empty field and booleans as true/false
+    count = 0
+    writer = None
+    for item in items:
+        if writer is None:
+            writer = csv.DictWriter(f, fieldnames=list(item))
+            writer.writeheader()
+        writer.writerow(
+            {
+                key: ("true" if value else "false")
+                if isinstance(value, bool)
+                else value
+                for key, value in item.items()
+            }
+        )
+        count += 1
+        if progress is not None and count % chunk_size == 0:
+            progress(count)
+
+    if progress is not None:
+        progress(count)
+    return count
+
+
+class FileFormat:
+    # how tasks are read from and written to a file. read(f) yields the
+    # records one at a time and write(f, items, chunk_size, progress) writes
+    # them as they come, so neither holds more than a chunk in memory.
+    def __init__(self, description, extensions, read, write, newline=None):
+        self.description = description
+        self.extensions = extensions
+        self.read = read
+        self.write = write
+        # passed to open_file, the csv module does its own newline handling
+        self.newline = newline
+
+
+FILE_FORMATS = {
+    "json": FileFormat("JSON Files", [".json"], iter_json_array, write_json_array),
+    "ndjson": FileFormat(
+        "NDJSON Files", [".ndjson", ".jsonl"], iter_ndjson, write_ndjson
+    ),
+    "csv": FileFormat(
+        "CSV Files",
+        [".csv"],
+        functools.partial(iter_csv, boolean_fields=["complete"]),
+        write_csv,
+        newline="",
+    ),
+}
+
+
+def format_for_path(file_path):
+    # the name of the file format, picked from the extension in front of
+    # the compression extension if there is one. anything else is JSON.
+    file_path = file_path.lower()
+    for extension in COMPRESSION_EXTENSIONS:
+        if file_path.endswith(extension):
+            file_path = file_path[: -len(extension)]
+            break
+    for name, file_format in FILE_FORMATS.items():
+        if any(file_path.endswith(extension) for extension in file_format.extensions):
+            return name
+    return "json"
+
+
+def get_file_format(file_path, file_format=None):
+    if file_format is None:
+        file_format = format_for_path(file_path)
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unknown file format: {file_format}")
+    return FILE_FORMATS[file_format]
+
+
+def dialog_filters(combined=None):
+    # name filters for file dialogs, one per format, each listing the plain
+    # and the compressed extensions. with combined, they are preceded by a
+    # filter of that name for all formats.
+    filters = []
+    all_patterns = []
+    for file_format in FILE_FORMATS.values():
+        patterns = [
+            f"*{extension}{compression_extension}"
+            for extension in file_format.extensions
+            for compression_extension in ["", *COMPRESSION_EXTENSIONS]
+        ]
+        filters.append(f"{file_format.description} ({' '.join(patterns)})")
+        all_patterns.extend(patterns)
+    if combined is not None:
+        filters.insert(0, f"{combined} ({' '.join(all_patterns)})")
+    return filters
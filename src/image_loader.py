@@ -0,0 +1,91 @@
+import itertools
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class ImageRequest:
+    def __init__(self, image_path, size, callback):
+        self.image_path = image_path
+        self.size = size
+        self.callback = callback
+        # read by the worker thread before it starts decoding
+        self.cancelled = False
+
+
+class DecodeJob(QRunnable):
+    def __init__(self, loader, owner_key, request):
+        super().__init__()
+        self.loader = loader
+        self.owner_key = owner_key
+        self.request = request
+
+    def run(self):
+        if self.request.cancelled:
+            return
+        image = self.loader.thumbnail_cache.get(
+            self.request.image_path, self.request.size
+        )
+        self.loader.decoded.emit(self.owner_key, self.request, image)
+
+
+class ImageLoader(QObject):
+    # decodes images on a thread pool through the thumbnail cache and hands
+    # them to a callback on the GUI thread. every owner (usually a widget)
+    # has at most one request in flight: a new request replaces the old one
+    # and cancel() drops it, so results never reach a widget that has been
+    # rebound to another task or deleted in the meantime.
+    decoded = pyqtSignal(object, object, object)
+
+    def __init__(self, thumbnail_cache, max_threads=2):
+        super().__init__()
+        self.thumbnail_cache = thumbnail_cache
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self.owner_keys = itertools.count()
+        self.requests = {}
+
+        # emitted from the workers, delivered on the thread of the loader
+        self.decoded.connect(self.deliver)
+
+    def new_owner_key(self):
+        return next(self.owner_keys)
+
+    def load(self, owner_key, image_path, size, callback):
+        # returns the image right away if it is in the memory cache,
+        # otherwise None and the callback gets the image (or None if it
+        # can't be read) once it is decoded
+        pending = self.requests.get(owner_key)
+        if (
+            pending is not None
+            and pending.image_path == image_path
+            and pending.size == size
+        ):
+            # already on its way, just point it at the new callback
+            pending.callback = callback
+            return None
+        self.cancel(owner_key)
+
+        image = self.thumbnail_cache.lookup(image_path, size)
+        if image is not None:
+            return image
+
+        request = ImageRequest(image_path, size, callback)
+        self.requests[owner_key] = request
+        self.thread_pool.start(DecodeJob(self, owner_key, request))
+        return None
+
+    def cancel(self, owner_key):
+        request = self.requests.pop(owner_key, None)
+        if request is not None:
+            request.cancelled = True
+
+    def deliver(self, owner_key, request, image):
+        if self.requests.get(owner_key) is not request:
+            return
+        del self.requests[owner_key]
+
+        # the owner may have been deleted without cancelling
+        owner = getattr(request.callback, "__self__", None)
+        if isinstance(owner, sip.simplewrapper) and sip.isdeleted(owner):
+            return
+        request.callback(image)
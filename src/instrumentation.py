@@ -0,0 +1,294 @@
+import os
+import re
+import json
+import time
+import inspect
+import sqlite3
+import datetime
+import functools
+import threading
+from urllib.request import pathname2url
+
+# opt-in timings of methods and a trace of the SQL statements run, for
+# finding out where the time goes on a user's machine. nothing is recorded
+# until enable() is called, main.py does that for TODOLIST_INSTRUMENT=1 or
+# --instrument. everything here may be called from worker threads.
+
+# most distinct statements traced, others are only counted
+MAX_STATEMENTS = 1000
+
+enabled = False
+lock = threading.Lock()
+timings = {}
+statements = {}
+untracked_statements = 0
+
+# the values spliced into traced statements, so statements that only differ
+# in their parameters are counted together
+LITERALS = re.compile(
+    r"""[xX]'[0-9a-fA-F]*'|'(?:[^']|'')*'|(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w.])"""
+)
+
+
+class LatencyHistogram:
+    # call count, total and extremes of a latency, and a histogram with a
+    # bucket per power of two microseconds. percentiles are read from the
+    # buckets, so they are upper bounds within a factor of two.
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        self.max = max(self.max, seconds)
+        bucket = int(seconds * 1_000_000).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction):
+        # in seconds, the upper bound of the bucket holding the percentile
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1_000_000, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "min_ms": (self.min or 0.0) * 1000,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            # calls per "< upper bound" in microseconds
+            "histogram_us": {
+                f"<{1 << bucket}": count
+                for bucket, count in sorted(self.buckets.items())
+            },
+        }
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def reset():
+    global untracked_statements
+    with lock:
+        timings.clear()
+        statements.clear()
+        untracked_statements = 0
+
+
+def record(name, seconds):
+    with lock:
+        histogram = timings.get(name)
+        if histogram is None:
+            histogram = timings[name] = LatencyHistogram()
+        histogram.add(seconds)
+
+
+def timed(name, function):
+    # function, recording how long every call takes under name. generator
+    # functions are timed until they are exhausted or closed. like a Qt slot,
+    # the wrapper drops positional arguments the function doesn't take, so
+    # methods connected to signals with more arguments keep working.
+    parameters = inspect.signature(function).parameters.values()
+    if any(parameter.kind == parameter.VAR_POSITIONAL for parameter in parameters):
+        max_args = None
+    else:
+        max_args = sum(
+            parameter.kind
+            in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)
+            for parameter in parameters
+        )
+
+    if inspect.isgeneratorfunction(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return (yield from function(*args[:max_args], **kwargs))
+            finally:
+                record(name, time.perf_counter() - started)
+
+    else:
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args[:max_args], **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+def instrument_methods(cls, names=None):
+    # time the given methods of cls, by default all of the methods defined on
+    # it. the class is patched, so this has to happen before the methods are
+    # bound, e.g. connected to signals.
+    for name, attribute in list(vars(cls).items()):
+        if names is None:
+            if name.startswith("__"):
+                continue
+        elif name not in names:
+            continue
+
+        label = f"{cls.__name__}.{name}"
+        if isinstance(attribute, staticmethod):
+            setattr(cls, name, staticmethod(timed(label, attribute.__func__)))
+        elif isinstance(attribute, classmethod):
+            setattr(cls, name, classmethod(timed(label, attribute.__func__)))
+        elif inspect.isfunction(attribute):
+            setattr(cls, name, timed(label, attribute))
+
+
+def instrument_property(cls, name):
+    # time the setter of a property of cls, getters are rarely worth it
+    attribute = vars(cls)[name]
+    setattr(
+        cls,
+        name,
+        attribute.setter(timed(f"{cls.__name__}.{name}.setter", attribute.fset)),
+    )
+
+
+def trace_connection(conn, db_name):
+    # count the statements run on conn, if enabled. the query plans are
+    # looked up when the report is made, on a connection of its own. a
+    # statement is traced again for every statement of the triggers it
+    # fires, so writes to todo count several times per execution.
+    if enabled:
+        conn.set_trace_callback(functools.partial(trace_statement, db_name))
+
+
+def normalize_statement(statement):
+    return " ".join(LITERALS.sub("?", statement).split())
+
+
+def trace_statement(db_name, statement):
+    global untracked_statements
+    statement = normalize_statement(statement)
+    with lock:
+        traced = statements.get(statement)
+        if traced is None:
+            if len(statements) >= MAX_STATEMENTS:
+                untracked_statements += 1
+                return
+            traced = statements[statement] = {"count": 0, "db_name": db_name}
+        traced["count"] += 1
+
+
+def query_plan(db_name, statement):
+    # the EXPLAIN QUERY PLAN rows of statement. None for statements that
+    # have no plan worth showing, like the internal ones of the search index
+    # starting with "--", or are run on an in-memory database no other
+    # connection can see.
+    if db_name in (":memory:", "") or not re.match(
+        r"\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", statement, re.IGNORECASE
+    ):
+        return None
+    try:
+        conn = sqlite3.connect(
+            f"file:{pathname2url(os.path.abspath(db_name))}?mode=ro", uri=True
+        )
+    except sqlite3.Error as e:
+        return [str(e)]
+    try:
+        # the literals were replaced by parameters, bound as NULL
+        rows = conn.execute(
+            f"EXPLAIN QUERY PLAN {statement}", (None,) * statement.count("?")
+        ).fetchall()
+    except sqlite3.Error as e:
+        return [str(e)]
+    finally:
+        conn.close()
+
+    # rows come after their parent, indent them one level deeper
+    levels = {0: -1}
+    plan = []
+    for id_, parent, _, detail in rows:
+        levels[id_] = levels.get(parent, -1) + 1
+        plan.append("  " * levels[id_] + detail)
+    return plan
+
+
+def report():
+    # everything recorded so far, slowest methods and most run statements
+    # first
+    with lock:
+        methods = {name: histogram.to_dict() for name, histogram in timings.items()}
+        traced = [
+            (statement, dict(values)) for statement, values in statements.items()
+        ]
+        untracked = untracked_statements
+
+    traced.sort(key=lambda item: item[1]["count"], reverse=True)
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "methods": dict(
+            sorted(methods.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        ),
+        "statements": [
+            {
+                "statement": statement,
+                "count": values["count"],
+                "plan": query_plan(values["db_name"], statement),
+            }
+            for statement, values in traced
+        ],
+        "untracked_statements": untracked,
+    }
+
+
+def summary(data, limit=20):
+    # a human readable version of a report
+    lines = [f"Instrumentation report, {data['created']}", "", "Methods by total time:"]
+    lines.append(
+        f"{'method':<50} {'calls':>8} {'total ms':>10} {'mean ms':>9} "
+        f"{'p95 ms':>9} {'max ms':>9}"
+    )
+    for name, values in list(data["methods"].items())[:limit]:
+        lines.append(
+            f"{name:<50} {values['count']:>8} {values['total_ms']:>10.1f} "
+            f"{values['mean_ms']:>9.3f} {values['p95_ms']:>9.3f} {values['max_ms']:>9.3f}"
+        )
+
+    lines += ["", "Statements by count:"]
+    for values in data["statements"][:limit]:
+        lines.append(f"{values['count']:>8}  {values['statement']}")
+        for step in values["plan"] or []:
+            lines.append(f"{'':>10}{step}")
+    if data["untracked_statements"]:
+        lines.append(f"{data['untracked_statements']:>8}  (other statements)")
+    return "\n".join(lines) + "\n"
+
+
+def dump(directory):
+    # write the report as JSON and as a summary next to it, returns the path
+    # of the JSON file
+    data = report()
+    os.makedirs(directory, exist_ok=True)
+    file_path = os.path.join(
+        directory,
+        f"instrumentation_{datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S')}",
+    )
+    with open(file_path + ".json", "w") as f:
+        json.dump(data, f, indent=4)
+    with open(file_path + ".txt", "w") as f:
+        f.write(summary(data))
+    return file_path + ".json"
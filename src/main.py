@@ -1,12 +1,40 @@
+import time
+
+# when the imports started, the start of the startup --measure-startup reports
+IMPORT_STARTED = time.perf_counter()
+
 import sys
 import os
+import json
+import argparse
 import datetime
-from widgets.TasksWidget import TasksWidget
+from widgets.TasksWidget import TasksWidget, TaskWidget
+from widgets.TaskListView import VirtualTasksWidget
 from widgets.ConfigureTaskWidget import EditTaskWidget, AddTaskWidget
 from widgets.AboutDialog import AboutDialog
 from database_client import DatabaseClient
-from PyQt6.QtGui import QAction, QIcon
-from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from workers import (
+    ImportWorker,
+    ExportWorker,
+    BackupWorker,
+    RestoreWorker,
+    BackupScheduler,
+)
+from thumbnail_cache import ThumbnailCache
+from image_loader import ImageLoader
+from file_formats import dialog_filters
+from task_index import SortedTaskIndex
+import instrumentation
+from PyQt6.QtGui import QAction, QIcon, QKeySequence
+from PyQt6.QtCore import (
+    Qt,
+    QEvent,
+    QObject,
+    QThreadPool,
+    QTimer,
+    QStandardPaths,
+    pyqtSignal,
+)
 from PyQt6.QtWidgets import (
     QLineEdit,
     QInputDialog,
@@ -17,6 +45,7 @@ from PyQt6.QtWidgets import (
     QMainWindow,
     QFileDialog,
     QDialog,
+    QProgressDialog,
 )
 
 
@@ -25,12 +54,19 @@ class TaskWidgets(QObject):
 
     def __init__(self):
         super().__init__()
-        self.complete = []
-        self.incomplete = []
+        # loaded task widgets per status, sorted by due date
+        self.complete = SortedTaskIndex()
+        self.incomplete = SortedTaskIndex()
 
     def forward_edit_task_signal(self, task_uuid):
         self.edit_task_signal.emit(task_uuid)
 
+    def index_of(self, complete):
+        return self.complete if complete else self.incomplete
+
+    def index_for(self, task):
+        return self.index_of(task.complete)
+
     def add(self, task_widgets):
         if not isinstance(task_widgets, list):
             task_widgets = [task_widgets]
@@ -38,40 +74,55 @@ class TaskWidgets(QObject):
         for task_widget in task_widgets:
             task_widget.edit_task_signal.connect(self.forward_edit_task_signal)
 
-            if task_widget.task.complete:
-                self.complete.append(task_widget)
-            else:
-                self.incomplete.append(task_widget)
+            task = task_widget.task
+            self.index_for(task).add(task.uuid, task.sort_key, task_widget)
 
-        self.complete.sort(
-            key=lambda task_widget: task_widget.task.due_date, reverse=True
-        )
-        self.incomplete.sort(
-            key=lambda task_widget: task_widget.task.due_date, reverse=True
-        )
+    def get(self, task_uuid):
+        task_widget = self.incomplete.get(task_uuid)
+        if task_widget is None:
+            task_widget = self.complete.get(task_uuid)
+        return task_widget
 
     def edit(self, new_task):
         # replace old task with new task
-        for task_list in [self.complete, self.incomplete]:
-            for task_widget in task_list:
-                if task_widget.task.uuid == new_task.uuid:
-                    task_widget.task = new_task
-                    break
+        task_widget = self.get(new_task.uuid)
+        if task_widget is None:
+            return
+
+        old_task = task_widget.task
+        task_widget.task = new_task
+        if (
+            old_task.complete != new_task.complete
+            or old_task.sort_key != new_task.sort_key
+        ):
+            self.index_for(old_task).remove(old_task.uuid)
+            self.index_for(new_task).add(new_task.uuid, new_task.sort_key, task_widget)
 
     def delete(self, task_uuid):
-        for task_list in [self.complete, self.incomplete]:
-            for task_widget in task_list[:]:
-                if task_widget.task.uuid == task_uuid:
-                    try:
-                        task_widget.edit_task_signal.disconnect()
-                    except:
-                        pass
-                    task_list.remove(task_widget)
-                    break
+        # returns the status and ascending position the widget had, or None
+        # if it was not loaded
+        task_widget = self.get(task_uuid)
+        if task_widget is None:
+            return None
+
+        try:
+            task_widget.edit_task_signal.disconnect(self.forward_edit_task_signal)
+        except:
+            pass
+        task = task_widget.task
+        return task.complete, self.index_for(task).remove(task_uuid)
 
     def clear(self):
-        self.complete.clear()
-        self.incomplete.clear()
+        # task widgets are reused, so drop the connections made in add
+        for index in [self.complete, self.incomplete]:
+            for task_widget in index:
+                try:
+                    task_widget.edit_task_signal.disconnect(
+                        self.forward_edit_task_signal
+                    )
+                except:
+                    pass
+            index.clear()
 
 
 class SharedState(QObject):
@@ -85,6 +136,11 @@ class SharedState(QObject):
         # represents the currently loaded task widgets
         self.task_widgets = TaskWidgets()
 
+        # thumbnails of the task images, shared by all task widgets and
+        # decoded off the GUI thread
+        self.thumbnail_cache = ThumbnailCache()
+        self.image_loader = ImageLoader(self.thumbnail_cache)
+
         # connect signals from database
         self.database_client.added_task.connect(self.handle_added_task)
         self.database_client.imported_tasks.connect(self.handle_imported_tasks)
@@ -92,6 +148,7 @@ class SharedState(QObject):
         self.database_client.deleted_task.connect(self.handle_deleted_task)
         self.database_client.cleared_tasks.connect(self.handle_cleared_tasks)
         self.database_client.loaded_tasks.connect(self.handle_loaded_tasks)
+        self.database_client.batched_changes.connect(self.handle_batched_changes)
 
         # forward signals from task widget
         self.task_widgets.edit_task_signal.connect(self.forward_edit_signal)
@@ -106,10 +163,16 @@ class SharedState(QObject):
         pass
 
     def handle_edited_task(self, new_task):
-        self.reload_signal.emit()
+        pass
 
     def handle_deleted_task(self, task_uuid):
-        self.task_widgets.delete(task_uuid)
+        # the tasks widget takes the task widget out of task_widgets, it
+        # needs its position to find it in the layout
+        pass
+
+    def handle_batched_changes(self, changes):
+        # one reload for the whole batch instead of one update per task
+        self.reload_signal.emit()
 
     def handle_imported_tasks(self, num_tasks):
         # emit the reload signal
@@ -128,17 +191,36 @@ class SharedState(QObject):
                 f"{num_tasks} Tasks imported successfully.",
             )
 
+    def handle_finished_import(self, result):
+        if not result.cancelled:
+            self.handle_imported_tasks(result.imported)
+            return
+
+        self.reload_signal.emit()
+        QMessageBox.information(
+            self.parent(),
+            "Import Tasks",
+            f"Import cancelled. {result.imported} Tasks were imported before it stopped.",
+        )
+
     def handle_cleared_tasks(self):
         self.reload_signal.emit()
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, shared_state):
+    def __init__(self, shared_state, load_tasks=True):
         super().__init__()
         self.shared_state = shared_state
         self.setWindowTitle("Todo App")
 
-        self.tasks_widget = TasksWidget(self.shared_state)
+        # TODOLIST_LIST_VIEW=virtual paints the lists with item views instead
+        # of one widget per task, for very large task lists
+        # without load_tasks the tasks are loaded by calling
+        # tasks_widget.load(), e.g. once the window is on screen
+        if os.environ.get("TODOLIST_LIST_VIEW") == "virtual":
+            self.tasks_widget = VirtualTasksWidget(self.shared_state, load_tasks)
+        else:
+            self.tasks_widget = TasksWidget(self.shared_state, load=load_tasks)
         self.setCentralWidget(self.tasks_widget)
 
         self.stacked_widget = QStackedWidget()
@@ -160,17 +242,29 @@ class MainWindow(QMainWindow):
         file_menu.addSeparator()
 
         # import button
-        button_action = QAction("&Import Tasks", self)
-        button_action.setStatusTip("import tasks from .json file")
-        button_action.triggered.connect(self.import_tasks)
-        file_menu.addAction(button_action)
+        self.import_action = QAction("&Import Tasks", self)
+        self.import_action.setStatusTip("import tasks from .json file")
+        self.import_action.triggered.connect(self.import_tasks)
+        file_menu.addAction(self.import_action)
         file_menu.addSeparator()
 
         # export button
-        button_action = QAction("&Export Tasks", self)
-        button_action.setStatusTip("Import Tasks from .json file")
-        button_action.triggered.connect(self.export_tasks)
-        file_menu.addAction(button_action)
+        self.export_action = QAction("&Export Tasks", self)
+        self.export_action.setStatusTip("Import Tasks from .json file")
+        self.export_action.triggered.connect(self.export_tasks)
+        file_menu.addAction(self.export_action)
+        file_menu.addSeparator()
+
+        # backup buttons
+        self.backup_action = QAction("&Back Up Tasks", self)
+        self.backup_action.setStatusTip("Back up the task database")
+        self.backup_action.triggered.connect(self.backup_tasks)
+        file_menu.addAction(self.backup_action)
+
+        self.restore_action = QAction("&Restore Tasks", self)
+        self.restore_action.setStatusTip("Restore the task database from a backup")
+        self.restore_action.triggered.connect(self.restore_tasks)
+        file_menu.addAction(self.restore_action)
         file_menu.addSeparator()
 
         # clear button
@@ -200,53 +294,211 @@ class MainWindow(QMainWindow):
         # add connections
         self.shared_state.add_edit_task_signal.connect(self.add_edit_task)
 
+        # import, export, backup and restore run on a worker thread, one job
+        # at a time
+        self.worker = None
+        self.progress_dialog = None
+        self.worker_actions = [
+            self.import_action,
+            self.export_action,
+            self.backup_action,
+            self.restore_action,
+        ]
+
+        # TODOLIST_BACKUP_INTERVAL=<minutes> backs the database up in the
+        # background, keeping the last few backups
+        self.backup_scheduler = None
+        backup_interval = os.environ.get("TODOLIST_BACKUP_INTERVAL")
+        if backup_interval:
+            self.backup_scheduler = BackupScheduler(
+                self.shared_state.database_client.db_name,
+                os.path.join(
+                    QStandardPaths.writableLocation(
+                        QStandardPaths.StandardLocation.AppDataLocation
+                    ),
+                    "backups",
+                ),
+                float(backup_interval) * 60,
+                parent=self,
+            )
+            self.backup_scheduler.backed_up.connect(
+                lambda file_path: self.statusBar().showMessage(
+                    f"Tasks backed up to {file_path}", 5000
+                )
+            )
+            self.backup_scheduler.failed.connect(
+                lambda error: self.statusBar().showMessage(
+                    f"Failed to back up tasks: {error}", 5000
+                )
+            )
+            self.backup_scheduler.start()
+
+        # with instrumentation enabled, ctrl+shift+i dumps what it recorded
+        # so far. the action is not in a menu, only its shortcut works.
+        if instrumentation.enabled:
+            dump_action = QAction("Dump Instrumentation", self)
+            dump_action.setShortcut(QKeySequence("Ctrl+Shift+I"))
+            dump_action.triggered.connect(self.dump_instrumentation)
+            self.addAction(dump_action)
+
+    def dump_instrumentation(self):
+        file_path = instrumentation.dump(instrumentation_dir())
+        QMessageBox.information(
+            self, "Instrumentation", f"Instrumentation written to {file_path}."
+        )
+
     def resizeEvent(self, event):
         # Update the position of the button when the window is resized
         self.addButton.setGeometry(self.width() - 80, 20, 50, 50)
 
     def import_tasks(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Import Tasks", "", "JSON Files (*.json)"
+            self, "Import Tasks", "", ";;".join(dialog_filters("Task Files"))
         )
         if file_path:
-            # warn user if the file is very large
-            if os.path.getsize(file_path) > 10000:
-                if (
-                    QMessageBox.question(
-                        self,
-                        "Import Tasks",
-                        "The file you are importing is very large. This may take a while and the UI might become unresponsive until everything is loaded. Do you want to continue?",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                    )
-                    == QMessageBox.StandardButton.No
-                ):
-                    return
-            try:
-                task_num_before = self.shared_state.database_client.count_tasks()
-
-                self.shared_state.database_client.import_from_file(file_path)
-            except Exception as e:
-                QMessageBox.critical(
-                    self, "Import Tasks", f"Failed to import tasks: {e}"
-                )
+            self.start_worker(
+                ImportWorker(self.shared_state.database_client.db_name, file_path),
+                "Import Tasks",
+                "Importing Tasks...",
+                self.update_import_progress,
+                self.import_finished,
+            )
+
+    def update_import_progress(self, imported, failed):
+        self.progress_dialog.setLabelText(f"Imported {imported} Tasks...")
+
+    def import_finished(self, result):
+        self.shared_state.handle_finished_import(result)
+        self.show_failed_records(result)
 
     def export_tasks(self, s):
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Export Tasks",
             f"todo_export_{datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S')}.json",
-            "JSON Files (*.json)",
+            ";;".join(dialog_filters()),
         )
         if file_path:
-            try:
-                self.shared_state.database_client.export_to_file(file_path)
-                QMessageBox.information(
-                    self, "Export Tasks", "Tasks exported successfully."
-                )
-            except Exception as e:
-                QMessageBox.critical(
-                    self, "Export Tasks", f"Failed to export tasks: {e}"
-                )
+            self.start_worker(
+                ExportWorker(self.shared_state.database_client.db_name, file_path),
+                "Export Tasks",
+                "Exporting Tasks...",
+                self.update_export_progress,
+                self.export_finished,
+            )
+
+    def update_export_progress(self, exported, total):
+        self.progress_dialog.setMaximum(total)
+        self.progress_dialog.setValue(exported)
+
+    def export_finished(self, num_tasks):
+        QMessageBox.information(self, "Export Tasks", "Tasks exported successfully.")
+
+    def backup_tasks(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Back Up Tasks",
+            f"todo_backup_{datetime.datetime.now().strftime('%Y-%m-%d_%H_%M_%S')}.db",
+            "Database Backups (*.db)",
+        )
+        if file_path:
+            self.start_worker(
+                BackupWorker(self.shared_state.database_client.db_name, file_path),
+                "Back Up Tasks",
+                "Backing up Tasks...",
+                self.update_backup_progress,
+                self.backup_finished,
+            )
+
+    def update_backup_progress(self, copied, total):
+        self.progress_dialog.setMaximum(total)
+        self.progress_dialog.setValue(copied)
+
+    def backup_finished(self, pages):
+        QMessageBox.information(self, "Back Up Tasks", "Tasks backed up successfully.")
+
+    def restore_tasks(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Restore Tasks", "", "Database Backups (*.db)"
+        )
+        if not file_path:
+            return
+        if (
+            QMessageBox.question(
+                self,
+                "Restore Tasks",
+                "Restoring the backup replaces all current tasks. Continue?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            != QMessageBox.StandardButton.Yes
+        ):
+            return
+        self.start_worker(
+            RestoreWorker(self.shared_state.database_client.db_name, file_path),
+            "Restore Tasks",
+            "Restoring Tasks...",
+            self.update_backup_progress,
+            self.restore_finished,
+        )
+
+    def restore_finished(self, result):
+        self.shared_state.reload_signal.emit()
+        QMessageBox.information(self, "Restore Tasks", "Tasks restored successfully.")
+
+    def start_worker(self, worker, title, label, on_progress, on_finished):
+        # the progress dialog is not modal, so the task list stays usable
+        # while the job is running
+        self.progress_dialog = QProgressDialog(label, "Cancel", 0, 0, self)
+        self.progress_dialog.setWindowTitle(title)
+        self.progress_dialog.setWindowModality(Qt.WindowModality.NonModal)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.canceled.connect(worker.cancel)
+
+        # close the dialog before any message box from the handlers shows up
+        for signal in [
+            worker.signals.finished,
+            worker.signals.failed,
+            worker.signals.cancelled,
+        ]:
+            signal.connect(self.worker_done)
+
+        worker.signals.progress.connect(on_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.failed.connect(
+            lambda error: QMessageBox.critical(
+                self, title, f"Failed to {title.lower()}: {error}"
+            )
+        )
+
+        for action in self.worker_actions:
+            action.setEnabled(False)
+
+        self.worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def worker_done(self):
+        self.progress_dialog.close()
+        self.progress_dialog = None
+        self.worker = None
+
+        for action in self.worker_actions:
+            action.setEnabled(True)
+
+    def show_failed_records(self, result):
+        if not result.failed:
+            return
+
+        # only list the first few failures, the rest are summarized
+        lines = [f"Record {index + 1}: {reason}" for index, reason in result.failed[:10]]
+        if len(result.failed) > 10:
+            lines.append(f"... and {len(result.failed) - 10} more")
+        QMessageBox.warning(
+            self,
+            "Import Tasks",
+            f"{len(result.failed)} records could not be imported:\n\n"
+            + "\n".join(lines),
+        )
 
     def clear_tasks(self, s):
         if self.shared_state.database_client.count_tasks() == 0:
@@ -295,31 +547,143 @@ class MainWindow(QMainWindow):
         self.configure_task_widget = None
 
 
-app = QApplication(sys.argv)
-
-# ask for password
-db_name = "tasks.db"
-database_client = DatabaseClient(db_name)
-
-# setup shared state
-shared_state = SharedState(database_client)
+def instrumentation_dir():
+    return os.path.join(
+        QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation),
+        "instrumentation",
+    )
+
+
+def instrument():
+    # time every database client method and the hot spots of the task list,
+    # and trace the SQL statements. has to run before anything is created.
+    instrumentation.enable()
+    instrumentation.instrument_methods(DatabaseClient)
+    instrumentation.instrument_property(TaskWidget, "task")
+    instrumentation.instrument_methods(
+        TasksWidget,
+        [
+            "update_tab_labels_and_completed_image",
+            "reload_tasks",
+            "load_more_tasks",
+            "insert_task",
+            "edit_task",
+            "delete_task_widget",
+        ],
+    )
+
+
+class FirstPaintWatcher(QObject):
+    # emits painted once the watched widget has been painted for the first
+    # time, on the event loop turn after the paint
+    painted = pyqtSignal()
+
+    def __init__(self, widget):
+        super().__init__(widget)
+        self.widget = widget
+        self.widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is self.widget and event.type() == QEvent.Type.Paint:
+            self.widget.removeEventFilter(self)
+            QTimer.singleShot(0, self.painted.emit)
+        return False
+
+
+def report_startup(timings, file_path):
+    # print the startup timings, or write them to file_path as JSON
+    if file_path != "-":
+        with open(file_path, "w") as f:
+            json.dump(timings, f, indent=4)
+        return
+    print("Startup timings:")
+    for name, milliseconds in timings.items():
+        label = name[: -len("_ms")].replace("_", " ")
+        print(f"  {label:<16} {milliseconds:9.1f} ms")
+
+
+def main(argv=None):
+    main_started = time.perf_counter()
+
+    parser = argparse.ArgumentParser(description="Manage your tasks.")
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="record timings and the SQL run, see also TODOLIST_INSTRUMENT",
+    )
+    parser.add_argument(
+        "--measure-startup",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="print how long the startup took, or write it to FILE as JSON, and quit",
+    )
+    # everything else is left to Qt
+    args, qt_args = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    # TODOLIST_INSTRUMENT=1 or --instrument records timings and the SQL run,
+    # written to the app data directory on exit
+    if args.instrument or os.environ.get("TODOLIST_INSTRUMENT"):
+        instrument()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    if instrumentation.enabled:
+        app.aboutToQuit.connect(
+            lambda: print(
+                f"Instrumentation written to {instrumentation.dump(instrumentation_dir())}."
+            )
+        )
 
+    # ask for password
+    db_started = time.perf_counter()
+    db_name = "tasks.db"
+    database_client = DatabaseClient(db_name)
+
+    # setup shared state
+    shared_state = SharedState(database_client)
+    window_started = time.perf_counter()
+
+    # start main window, the tasks are loaded once it is on screen
+    window = MainWindow(shared_state, load_tasks=False)
+    window.resize(800, 600)
+
+    # Set the window icon
+    if os.path.exists("assets/icon.png"):
+        icon_path = "assets/icon.png"
+    else:
+        bundle_dir = getattr(sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__)))
+        icon_path = os.path.join(bundle_dir, "assets", "icon.png")
+    if os.path.exists(icon_path):
+        window.setWindowIcon(QIcon(icon_path))
+    else:
+        print(f"Icon file {icon_path} does not exist.")
+    window_finished = time.perf_counter()
+
+    def load_tasks():
+        painted = time.perf_counter()
+        window.tasks_widget.load()
+        loaded = time.perf_counter()
+
+        if args.measure_startup is not None:
+            report_startup(
+                {
+                    "imports_ms": (main_started - IMPORT_STARTED) * 1000,
+                    "database_open_ms": (window_started - db_started) * 1000,
+                    "main_window_ms": (window_finished - window_started) * 1000,
+                    "first_paint_ms": (painted - IMPORT_STARTED) * 1000,
+                    "first_page_ms": (loaded - painted) * 1000,
+                    "total_ms": (loaded - IMPORT_STARTED) * 1000,
+                },
+                args.measure_startup,
+            )
+            QTimer.singleShot(0, app.quit)
 
-# start main window
-window = MainWindow(shared_state)
-window.resize(800, 600)
+    first_paint_watcher = FirstPaintWatcher(window)
+    first_paint_watcher.painted.connect(load_tasks)
+    window.show()
 
-# Set the window icon
-if os.path.exists("assets/icon.png"):
-    icon_path = "assets/icon.png"
-else:
-    bundle_dir = getattr(sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__)))
-    icon_path = os.path.join(bundle_dir, "assets", "icon.png")
-if os.path.exists(icon_path):
-    window.setWindowIcon(QIcon(icon_path))
-else:
-    print(f"Icon file {icon_path} does not exist.")
+    return app.exec()
 
-window.show()
 
-app.exec()
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,87 @@
 import uuid
-from datetime import datetime
+import functools
+from datetime import date
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_due_date(due_date):
+    # returns the date string and its ordinal, or None as the ordinal if the
+    # string is not a "YYYY-MM-DD" date. cached, so tasks due on the same day
+    # share one string and one int instead of holding copies of their own.
+    try:
+        parsed = date.fromisoformat(due_date)
+    except (TypeError, ValueError):
+        return due_date, None
+    if parsed.isoformat() != due_date:
+        return due_date, None
+    return due_date, parsed.toordinal()
+
+
+# default due date of a new task. None is a due date of its own, rows of
+# older databases can have one, it sorts first with an ordinal of 0 like
+# the database does.
+TODAY = object()
 
 
 class Task:
+    # slotted, there can be a lot of these in memory. the due date is kept as
+    # the "YYYY-MM-DD" string it is stored as and as a date ordinal, parsed
+    # once when it is set, for comparisons against today.
+    __slots__ = (
+        "uuid",
+        "image_uri",
+        "description",
+        "_due_date",
+        "_due_ordinal",
+        "complete",
+    )
+
     def __init__(
         self,
         uuid_=None,
         image_uri="",
         description="Unnamed Task",
-        due_date=datetime.now().strftime("%Y-%m-%d"),
+        due_date=TODAY,
         complete=False,
     ):
         if uuid_ is None:
             uuid_ = str(uuid.uuid4())
+        if due_date is TODAY:
+            due_date = date.today().isoformat()
         self.uuid = uuid_
         self.description = description
         self.due_date = due_date
         self.image_uri = image_uri
         self.complete = bool(complete)
+
+    @staticmethod
+    def from_row(cursor, row):
+        # sqlite3 row factory for the TASK_COLUMNS of database_client
+        return Task(*row)
+
+    @property
+    def due_date(self):
+        return self._due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        self._due_date, self._due_ordinal = parse_due_date(value)
+
+    @property
+    def due_ordinal(self):
+        return self._due_ordinal
+
+    def is_overdue(self, today=None):
+        # a task is overdue from the start of its due date
+        if self._due_ordinal is None:
+            return False
+        if today is None:
+            today = date.today()
+        return self._due_ordinal <= today.toordinal()
+
+    @property
+    def sort_key(self):
+        # tasks are ordered by due date, ties are broken by uuid. this is the
+        # (due_ordinal, uuid) paging key of the database, where tasks without
+        # a valid date have an ordinal of 0.
+        return (self._due_ordinal or 0, self.uuid)
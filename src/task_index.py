@@ -0,0 +1,62 @@
+import bisect
+
+
+class SortedTaskIndex:
+    # items (tasks or task widgets) kept in ascending sort key order, with a
+    # uuid lookup next to the sorted keys. finding an item by uuid is O(1),
+    # finding its position and inserting or removing it is a binary search
+    # plus a list insert or delete.
+    def __init__(self):
+        self.keys = []
+        self.items = []
+        self.keys_by_uuid = {}
+        self.items_by_uuid = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, task_uuid):
+        return task_uuid in self.items_by_uuid
+
+    def get(self, task_uuid):
+        return self.items_by_uuid.get(task_uuid)
+
+    def position(self, task_uuid):
+        # index of the item in ascending order, or None if it is not indexed
+        key = self.keys_by_uuid.get(task_uuid)
+        if key is None:
+            return None
+        return bisect.bisect_left(self.keys, key)
+
+    def insertion_point(self, key):
+        return bisect.bisect_left(self.keys, key)
+
+    def add(self, task_uuid, key, item):
+        if task_uuid in self.items_by_uuid:
+            self.remove(task_uuid)
+        position = bisect.bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.items.insert(position, item)
+        self.keys_by_uuid[task_uuid] = key
+        self.items_by_uuid[task_uuid] = item
+        return position
+
+    def remove(self, task_uuid):
+        # returns the position the item had, or None if it is not indexed
+        key = self.keys_by_uuid.pop(task_uuid, None)
+        if key is None:
+            return None
+        del self.items_by_uuid[task_uuid]
+        position = bisect.bisect_left(self.keys, key)
+        del self.keys[position]
+        del self.items[position]
+        return position
+
+    def clear(self):
+        self.keys.clear()
+        self.items.clear()
+        self.keys_by_uuid.clear()
+        self.items_by_uuid.clear()
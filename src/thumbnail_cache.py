@@ -0,0 +1,178 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QStandardPaths
+from PyQt6.QtGui import QImage, QImageReader
+
+
+class ThumbnailCache:
+    # thumbnails of task images, keyed by the image path, its mtime and size
+    # and the thumbnail size, so an image that changes on disk gets a new
+    # thumbnail. recently used thumbnails are kept in memory, all of them are
+    # kept on disk. both layers drop the least recently used entries once
+    # they grow past their byte budget. thumbnails are QImages so the cache
+    # can be used from worker threads.
+    def __init__(
+        self,
+        cache_dir=None,
+        memory_budget=32 * 1024 * 1024,
+        disk_budget=256 * 1024 * 1024,
+    ):
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                QStandardPaths.writableLocation(
+                    QStandardPaths.StandardLocation.CacheLocation
+                ),
+                "thumbnails",
+            )
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.memory_usage = 0
+        # computed on the first write
+        self.disk_usage = None
+
+        # metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, image_path, size):
+        stat = os.stat(image_path)
+        return hashlib.sha1(
+            f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{size}".encode()
+        ).hexdigest()
+
+    def get(self, image_path, size=100):
+        # returns the thumbnail, or None if the image can't be read
+        try:
+            key = self.key(image_path, size)
+        except OSError:
+            return None
+
+        with self.lock:
+            image = self.memory.get(key)
+            if image is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return image
+
+        disk_path = os.path.join(self.cache_dir, key + ".png")
+        image = QImage(disk_path)
+        if not image.isNull():
+            # bump the mtime, the disk layer evicts by it
+            try:
+                os.utime(disk_path)
+            except OSError:
+                pass
+            with self.lock:
+                self.disk_hits += 1
+                self._put_memory(key, image)
+            return image
+
+        image = self.decode(image_path, size)
+        if image is None:
+            return None
+        with self.lock:
+            self.misses += 1
+            self._put_memory(key, image)
+        self._put_disk(disk_path, image)
+        return image
+
+    def lookup(self, image_path, size=100):
+        # memory layer only, cheap enough to call on the GUI thread
+        try:
+            key = self.key(image_path, size)
+        except OSError:
+            return None
+        with self.lock:
+            image = self.memory.get(key)
+            if image is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+            return image
+
+    def decode(self, image_path, size):
+        # let the image plugin decode straight to the thumbnail size, which
+        # for jpegs skips most of the work of decoding the full image
+        reader = QImageReader(image_path)
+        reader.setAutoTransform(True)
+        original_size = reader.size()
+        if original_size.isValid() and (
+            original_size.width() > size or original_size.height() > size
+        ):
+            reader.setScaledSize(
+                original_size.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio)
+            )
+
+        image = reader.read()
+        if image.isNull():
+            return None
+        if image.width() > size or image.height() > size:
+            # formats that can't decode scaled still have to be scaled here
+            image = image.scaled(
+                size,
+                size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        return image
+
+    def _put_memory(self, key, image):
+        if key in self.memory:
+            self.memory_usage -= self.memory.pop(key).sizeInBytes()
+        self.memory[key] = image
+        self.memory_usage += image.sizeInBytes()
+
+        while self.memory_usage > self.memory_budget and len(self.memory) > 1:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_usage -= evicted.sizeInBytes()
+
+    def _put_disk(self, disk_path, image):
+        # write to a temporary file first, so a thumbnail that is being
+        # written by another thread is never read half finished
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary_path = f"{disk_path}.{threading.get_ident()}.tmp"
+        if not image.save(temporary_path, "PNG"):
+            return
+        os.replace(temporary_path, disk_path)
+
+        with self.lock:
+            if self.disk_usage is None:
+                self.disk_usage = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self.disk_usage += os.path.getsize(disk_path)
+
+            if self.disk_usage > self.disk_budget:
+                self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def _evict_disk(self):
+        # drop the least recently used thumbnails until there is some room
+        # below the budget again, so this doesn't run on every write
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        self.disk_usage = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.disk_usage <= self.disk_budget * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.disk_usage -= size
+
+    def clear_memory(self):
+        with self.lock:
+            self.memory.clear()
+            self.memory_usage = 0
@@ -5,8 +5,8 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('../assets/icon.png', './assets'), ('../assets/no_tasks_message.png', './assets'), ('task.py', '.'), ('database_client.py', '.'), ('widgets', './widgets')],
-    hiddenimports=['uuid', 'json', 'sqlite3'],
+    datas=[('../assets/icon.png', './assets'), ('../assets/no_tasks_message.png', './assets'), ('task.py', '.'), ('database_client.py', '.'), ('file_formats.py', '.'), ('workers.py', '.'), ('thumbnail_cache.py', '.'), ('image_loader.py', '.'), ('task_index.py', '.'), ('instrumentation.py', '.'), ('widgets', './widgets')],
+    hiddenimports=['uuid', 'json', 'csv', 'sqlite3', 'gzip', 'lzma'],
     hookspath=[],
     runtime_hooks=[],
     excludes=[],
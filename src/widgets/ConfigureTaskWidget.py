@@ -1,6 +1,7 @@
 import os
 import sys
 import copy
+import functools
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -27,6 +28,12 @@ class ConfigureTaskWidget(QWidget):
     def __init__(self, shared_state):
         super().__init__()
         self.shared_state = shared_state
+        self.image_owner_key = self.shared_state.image_loader.new_owner_key()
+        self.destroyed.connect(
+            functools.partial(
+                self.shared_state.image_loader.cancel, self.image_owner_key
+            )
+        )
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Return or event.key() == Qt.Key.Key_Enter:
@@ -81,17 +88,28 @@ class ConfigureTaskWidget(QWidget):
 
     def update_image(self):
         if self.image_path != "":
-            pixmap = QPixmap(self.image_path)
-            scaled_pixmap = pixmap.scaled(512, 512, Qt.AspectRatioMode.KeepAspectRatio)
-            self.image_label.setPixmap(scaled_pixmap)
+            image = self.shared_state.image_loader.load(
+                self.image_owner_key, self.image_path, 512, self.set_image
+            )
+            if image is not None:
+                self.set_image(image)
+            else:
+                self.image_label.setText("Loading Image...")
             self.add_change_image_button.setText("Change Image")
         else:
+            self.shared_state.image_loader.cancel(self.image_owner_key)
             self.image_label.clear()
             self.add_change_image_button.setText("Add Image")
 
         self.image_label.setVisible(bool(self.image_path))
         self.remove_image_button.setEnabled(bool(self.image_path))
 
+    def set_image(self, image):
+        if image is None:
+            self.image_label.setText("Failed to load Image.")
+            return
+        self.image_label.setPixmap(QPixmap.fromImage(image))
+
     def add_change_image(self):
         image_path, _ = QFileDialog.getOpenFileName(
             self, "Open Image", "", "Image Files (*.png *.jpg *.bmp)"
@@ -0,0 +1,381 @@
+import os
+import sys
+import copy
+from collections import OrderedDict
+from PyQt6.QtCore import (
+    Qt,
+    QAbstractListModel,
+    QModelIndex,
+    QEvent,
+    QRect,
+    QSize,
+    pyqtSignal,
+)
+from PyQt6.QtGui import QPixmap, QColor, QFont
+from PyQt6.QtWidgets import (
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QApplication,
+    QListView,
+    QAbstractItemView,
+    QMessageBox,
+    QStackedWidget,
+    QVBoxLayout,
+    QWidget,
+    QLabel,
+    QTabWidget,
+)
+
+TaskRole = Qt.ItemDataRole.UserRole + 1
+
+
+class TaskListModel(QAbstractListModel):
+    # a list of all tasks with one status, newest due date first, that only
+    # loads the pages of rows that are actually looked at. the row count is
+    # the real number of tasks, so the scroll bar covers the whole list.
+    def __init__(self, shared_state, complete, page_size=100, max_pages=20):
+        super().__init__()
+        self.shared_state = shared_state
+        self.complete = complete
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        # page number -> tasks, in ascending due date order
+        self.pages = OrderedDict()
+        self.total = self.shared_state.database_client.count_tasks(self.complete)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.total
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        task = self.task_at(index.row())
+        if task is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return task.description
+        if role == TaskRole:
+            return task
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.thumbnail(task)
+        return None
+
+    def task_at(self, row):
+        if row < 0 or row >= self.total:
+            return None
+        # row 0 is the task that is due last
+        position = self.total - 1 - row
+        page = self.load_page(position // self.page_size)
+        offset = position % self.page_size
+        if offset >= len(page):
+            return None
+        return page[offset]
+
+    def load_page(self, page_number):
+        page = self.pages.get(page_number)
+        if page is not None:
+            self.pages.move_to_end(page_number)
+            return page
+
+        # continue from the previous page with the keyset cursor when it is
+        # loaded, which is the usual case while scrolling, and only seek
+        # with an offset when jumping into the middle of the list
+        database_client = self.shared_state.database_client
+        previous_page = self.pages.get(page_number - 1)
+        if page_number == 0 or (
+            previous_page is not None and len(previous_page) == self.page_size
+        ):
+            cursor = None if page_number == 0 else previous_page[-1].sort_key
+            page = database_client.lazy_load_tasks_after(
+                cursor, self.page_size, self.complete
+            )
+        else:
+            page = database_client.lazy_load_tasks(
+                page_number * self.page_size, self.page_size, self.complete
+            )
+
+        self.pages[page_number] = page
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return page
+
+    def thumbnail(self, task):
+        if not task.image_uri:
+            return None
+        image = self.shared_state.image_loader.load(
+            (id(self), task.uuid),
+            task.image_uri,
+            100,
+            lambda image, task_uuid=task.uuid: self.thumbnail_loaded(task_uuid),
+        )
+        if image is None:
+            return None
+        return QPixmap.fromImage(image)
+
+    def thumbnail_loaded(self, task_uuid):
+        row = self.row_of(task_uuid)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def row_of(self, task_uuid):
+        # only loaded rows can be found
+        for page_number, page in self.pages.items():
+            for offset, task in enumerate(page):
+                if task.uuid == task_uuid:
+                    return self.total - 1 - (page_number * self.page_size + offset)
+        return None
+
+    def reload(self):
+        self.beginResetModel()
+        self.pages.clear()
+        self.total = self.shared_state.database_client.count_tasks(self.complete)
+        self.endResetModel()
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    # paints a task row the way TaskWidget lays it out: checkbox, due date,
+    # due badge, image, description and the edit and delete buttons
+    toggle_requested = pyqtSignal(object)
+    edit_requested = pyqtSignal(str)
+    delete_requested = pyqtSignal(str)
+
+    ROW_HEIGHT = 100
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def rects(self, rect):
+        middle = rect.center().y()
+        left = rect.left() + 10
+        right = rect.right() - 10
+        return {
+            "checkbox": QRect(left, middle - 10, 20, 20),
+            "due_date": QRect(left + 30, rect.top(), 90, rect.height()),
+            "due_badge": QRect(left + 125, rect.top(), 40, rect.height()),
+            "image": QRect(left + 170, rect.top() + 5, 90, rect.height() - 10),
+            "description": QRect(
+                left + 270, rect.top(), right - left - 440, rect.height()
+            ),
+            "edit": QRect(right - 160, middle - 15, 75, 30),
+            "delete": QRect(right - 75, middle - 15, 75, 30),
+        }
+
+    def paint(self, painter, option, index):
+        task = index.data(TaskRole)
+        if task is None:
+            return
+
+        style = option.widget.style() if option.widget else QApplication.style()
+        rects = self.rects(option.rect)
+        painter.save()
+
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        checkbox = QStyleOptionButton()
+        checkbox.rect = rects["checkbox"]
+        checkbox.state = QStyle.StateFlag.State_Enabled | (
+            QStyle.StateFlag.State_On if task.complete else QStyle.StateFlag.State_Off
+        )
+        style.drawControl(QStyle.ControlElement.CE_CheckBox, checkbox, painter)
+
+        painter.drawText(
+            rects["due_date"], Qt.AlignmentFlag.AlignVCenter, task.due_date
+        )
+        if task.is_overdue():
+            painter.setPen(QColor("red"))
+            painter.drawText(rects["due_badge"], Qt.AlignmentFlag.AlignVCenter, "Due")
+            painter.setPen(option.palette.text().color())
+
+        description_rect = rects["description"]
+        pixmap = index.data(Qt.ItemDataRole.DecorationRole)
+        if pixmap is not None:
+            image_rect = rects["image"]
+            scaled = pixmap.scaled(
+                image_rect.size(), Qt.AspectRatioMode.KeepAspectRatio
+            )
+            painter.drawPixmap(
+                image_rect.left(),
+                image_rect.center().y() - scaled.height() // 2,
+                scaled,
+            )
+        else:
+            description_rect = description_rect.adjusted(-100, 0, 0, 0)
+
+        font = QFont(option.font)
+        font.setPixelSize(20)
+        painter.setFont(font)
+        description = task.description
+        if len(description) > 30:
+            description = description[:30] + "..."
+        painter.drawText(description_rect, Qt.AlignmentFlag.AlignVCenter, description)
+
+        for name, text in [("edit", "Edit"), ("delete", "Delete")]:
+            button = QStyleOptionButton()
+            button.rect = rects[name]
+            button.text = text
+            button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.Type.MouseButtonRelease:
+            return False
+        task = index.data(TaskRole)
+        if task is None:
+            return False
+
+        rects = self.rects(option.rect)
+        position = event.position().toPoint()
+        if rects["checkbox"].contains(position):
+            self.toggle_requested.emit(task)
+        elif rects["edit"].contains(position):
+            self.edit_requested.emit(task.uuid)
+        elif rects["delete"].contains(position):
+            self.delete_requested.emit(task.uuid)
+        else:
+            return False
+        return True
+
+
+class VirtualTasksWidget(QWidget):
+    # drop-in replacement for TasksWidget that shows the tasks in list
+    # views, so only the rows on screen are painted and no widgets are
+    # created per task
+    add_task_signal = pyqtSignal()
+
+    def __init__(self, shared_state, load=True):
+        super().__init__()
+        self.shared_state = shared_state
+
+        self.setup_ui()
+
+        # reload the lists when tasks are changed
+        self.shared_state.reload_signal.connect(self.reload_tasks)
+        database_client = self.shared_state.database_client
+        database_client.added_task.connect(lambda task: self.reload_tasks())
+        database_client.edited_task.connect(lambda task: self.reload_tasks())
+        database_client.deleted_task.connect(lambda task_uuid: self.reload_tasks())
+
+        # load initial tasks, unless the caller does once the window is shown
+        if load:
+            self.load()
+
+    def load(self):
+        # the parts of the widget that can wait until it is on screen
+        self.load_no_tasks_image()
+        self.reload_tasks()
+        self.scroll_to_bottom()
+
+    def load_no_tasks_image(self):
+        if os.path.exists("../assets/no_tasks_message.png"):
+            pixmap = QPixmap("../assets/no_tasks_message.png")
+        else:
+            bundle_dir = getattr(
+                sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__))
+            )
+            pixmap = QPixmap(os.path.join(bundle_dir, "assets", "no_tasks_message.png"))
+        self.all_tasks_finished_message.setPixmap(pixmap)
+
+    def setup_ui(self):
+        self.tab_widget = QTabWidget()
+
+        self.model_complete = TaskListModel(self.shared_state, True)
+        self.model_incomplete = TaskListModel(self.shared_state, False)
+
+        self.delegate = TaskItemDelegate(self)
+        self.delegate.toggle_requested.connect(self.toggle_complete)
+        self.delegate.edit_requested.connect(self.shared_state.forward_edit_signal)
+        self.delegate.delete_requested.connect(self.delete_task)
+
+        self.list_view_complete = self.create_list_view(self.model_complete)
+        self.list_view_incomplete = self.create_list_view(self.model_incomplete)
+
+        # all tasks finished message
+        self.stacked_widget_incomplete = QStackedWidget()
+        self.all_tasks_finished_message = QLabel()
+        self.all_tasks_finished_message.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.stacked_widget_incomplete.addWidget(self.list_view_incomplete)
+        self.stacked_widget_incomplete.addWidget(self.all_tasks_finished_message)
+
+        self.tab_widget.addTab(self.list_view_complete, "Finished")
+        self.tab_widget.addTab(self.stacked_widget_incomplete, "To Do")
+        self.tab_widget.setCurrentIndex(1)
+
+        main_layout = QVBoxLayout(self)
+        main_layout.addWidget(self.tab_widget)
+
+    def create_list_view(self, model):
+        list_view = QListView()
+        list_view.setModel(model)
+        list_view.setItemDelegate(self.delegate)
+        # every row has the same height, which lets the view compute the
+        # scroll range from the row count alone
+        list_view.setUniformItemSizes(True)
+        list_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        list_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        return list_view
+
+    def toggle_complete(self, task):
+        new_task = copy.copy(task)
+        new_task.complete = not task.complete
+        self.shared_state.database_client.edit_task(new_task)
+
+    def delete_task(self, task_uuid):
+        if (
+            QMessageBox.question(
+                self,
+                "Delete Task",
+                "Are you sure you want to delete this task?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            == QMessageBox.StandardButton.Yes
+        ):
+            self.shared_state.database_client.delete_task(task_uuid)
+
+    def reload_tasks(self):
+        # keep the scroll positions, the models start over empty
+        for list_view, model in [
+            (self.list_view_complete, self.model_complete),
+            (self.list_view_incomplete, self.model_incomplete),
+        ]:
+            scroll_bar = list_view.verticalScrollBar()
+            from_bottom = scroll_bar.maximum() - scroll_bar.value()
+            model.reload()
+            list_view.doItemsLayout()
+            scroll_bar.setValue(scroll_bar.maximum() - from_bottom)
+
+        self.update_tab_labels_and_completed_image()
+
+    def update_tab_labels_and_completed_image(self):
+        total_complete_tasks = self.model_complete.total
+        total_incomplete_tasks = self.model_incomplete.total
+
+        self.tab_widget.setTabText(
+            0, f"Finished ({self._format_task_count(total_complete_tasks)})"
+        )
+        self.tab_widget.setTabText(
+            1, f"To Do ({self._format_task_count(total_incomplete_tasks)})"
+        )
+
+        if total_incomplete_tasks == 0:
+            self.stacked_widget_incomplete.setCurrentWidget(
+                self.all_tasks_finished_message
+            )
+        else:
+            self.stacked_widget_incomplete.setCurrentWidget(self.list_view_incomplete)
+
+    def _format_task_count(self, count):
+        if count == 0:
+            return "no Tasks"
+        if count == 1:
+            return "1 Task"
+        return f"{count} Tasks"
+
+    def scroll_to_bottom(self):
+        self.list_view_complete.scrollToBottom()
+        self.list_view_incomplete.scrollToBottom()
@@ -1,7 +1,13 @@
 import os
 import sys
-from datetime import datetime
-from PyQt6.QtCore import Qt, pyqtSignal
+import copy
+import time
+import functools
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workers import TaskPrefetcher
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QPixmap, QPalette, QBrush, QColor, QTransform
 from PyQt6.QtWidgets import (
     QPushButton,
@@ -14,12 +20,17 @@ from PyQt6.QtWidgets import (
     QLabel,
     QTabWidget,
     QCheckBox,
+    QLineEdit,
 )
 
 
 class TaskWidget(QWidget):
     edit_task_signal = pyqtSignal(str)
 
+    HEIGHT = 100
+
+    _placeholder_pixmap = None
+
     def __init__(
         self,
         task,
@@ -30,6 +41,15 @@ class TaskWidget(QWidget):
         # set the shared state
         self.shared_state = shared_state
 
+        # images are decoded in the background, drop any pending request
+        # when the widget goes away
+        self.image_owner_key = self.shared_state.image_loader.new_owner_key()
+        self.destroyed.connect(
+            functools.partial(
+                self.shared_state.image_loader.cancel, self.image_owner_key
+            )
+        )
+
         # setup the ui
         self.setup_ui()
 
@@ -40,7 +60,7 @@ class TaskWidget(QWidget):
         # Create the main layout
         self.layout = QHBoxLayout()
 
-        self.setFixedHeight(100)
+        self.setFixedHeight(self.HEIGHT)
 
         # Create the left, middle, and right layouts
         left_layout = QHBoxLayout()
@@ -106,22 +126,23 @@ class TaskWidget(QWidget):
 
         self.due_date_label.setText(self.task.due_date)
 
-        if datetime.strptime(self.task.due_date, "%Y-%m-%d") < datetime.now():
+        if self.task.is_overdue():
             self.due_badge.show()
         else:
             self.due_badge.hide()
 
-        if self.task.image_uri != "" and os.path.exists(self.task.image_uri):
-            image = QPixmap(self.task.image_uri)
-            image = image.scaled(
-                100,
-                100,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation,
+        if self.task.image_uri:
+            image = self.shared_state.image_loader.load(
+                self.image_owner_key, self.task.image_uri, 100, self.set_image
             )
-            self.image_label.setPixmap(image)
-            self.image_label.show()
+            if image is not None:
+                self.set_image(image)
+            else:
+                # show a placeholder until the image is decoded
+                self.image_label.setPixmap(self.placeholder_pixmap())
+                self.image_label.show()
         else:
+            self.shared_state.image_loader.cancel(self.image_owner_key)
             self.image_label.hide()
 
         if len(self.task.description) > 30:
@@ -129,12 +150,28 @@ class TaskWidget(QWidget):
         else:
             self.label.setText(self.task.description)
 
+    def set_image(self, image):
+        if image is None:
+            self.image_label.hide()
+            return
+        self.image_label.setPixmap(QPixmap.fromImage(image))
+        self.image_label.show()
+
+    @classmethod
+    def placeholder_pixmap(cls):
+        if cls._placeholder_pixmap is None:
+            cls._placeholder_pixmap = QPixmap(100, 100)
+            cls._placeholder_pixmap.fill(QColor("lightgray"))
+        return cls._placeholder_pixmap
+
     def emit_edit_task_signal(self):
         self.edit_task_signal.emit(self.task.uuid)
 
     def toggle_complete(self, state):
-        self.task.complete = not self.task.complete
-        self.shared_state.database_client.edit_task(self.task)
+        # edit a copy, so the tasks widget can still see the old status
+        new_task = copy.copy(self.task)
+        new_task.complete = not new_task.complete
+        self.shared_state.database_client.edit_task(new_task)
 
     def delete(self):
         if (
@@ -149,13 +186,73 @@ class TaskWidget(QWidget):
             self.shared_state.database_client.delete_task(self.task.uuid)
 
 
+class TaskWidgetPool:
+    # keeps detached task widgets around so reloads can rebind them to new
+    # tasks through the task setter instead of building new ones
+    def __init__(self, shared_state, max_size=200):
+        self.shared_state = shared_state
+        self.max_size = max_size
+        self.widgets = []
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, task):
+        if self.widgets:
+            self.hits += 1
+            task_widget = self.widgets.pop()
+            task_widget.task = task
+            return task_widget
+
+        self.misses += 1
+        return TaskWidget(task, self.shared_state)
+
+    def release(self, task_widget):
+        # the widget stays a hidden child of its content widget until it is
+        # inserted into a layout again
+        task_widget.hide()
+        self.shared_state.image_loader.cancel(task_widget.image_owner_key)
+        if len(self.widgets) < self.max_size:
+            self.widgets.append(task_widget)
+        else:
+            task_widget.deleteLater()
+
+    @property
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
 class TasksWidget(QWidget):
     add_task_signal = pyqtSignal()
 
-    def __init__(self, shared_state):
+    # milliseconds without typing before the search runs
+    SEARCH_DELAY = 250
+    # shorter searches match nearly everything, they show all tasks instead
+    SEARCH_MIN_LENGTH = 2
+    # scrolling toward unloaded tasks prefetches this many seconds of
+    # scrolling at the current speed, at least a page and at most this many
+    PREFETCH_AHEAD = 1.0
+    PREFETCH_MAX_TASKS = 150
+
+    def __init__(self, shared_state, pool_size=200, load=True):
         super().__init__()
         self.shared_state = shared_state
 
+        # task widgets are recycled instead of rebuilt on every reload
+        self.widget_pool = TaskWidgetPool(self.shared_state, pool_size)
+
+        # only tasks matching the search are loaded while it is set
+        self.search_text = ""
+
+        # the next pages are fetched in the background while scrolling, an
+        # in-memory database can't be opened from another thread
+        database_client = self.shared_state.database_client
+        self.prefetcher = None
+        if not database_client.is_in_memory():
+            self.prefetcher = TaskPrefetcher(database_client.db_name, parent=self)
+
         # setup the ui
         self.setup_ui()
 
@@ -175,15 +272,66 @@ class TasksWidget(QWidget):
             lambda task: self.insert_task(task)
         )
 
+        # update task widget in place when task is edited
+        self.shared_state.database_client.edited_task.connect(
+            lambda task: self.edit_task(task)
+        )
+
+        # prefetched tasks may be out of date once tasks are changed
+        if self.prefetcher is not None:
+            for signal in [
+                self.shared_state.database_client.added_task,
+                self.shared_state.database_client.edited_task,
+                self.shared_state.database_client.deleted_task,
+                self.shared_state.database_client.cleared_tasks,
+                self.shared_state.database_client.batched_changes,
+            ]:
+                signal.connect(lambda *args: self.prefetcher.invalidate())
+
+        # search once the user stops typing
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.apply_search)
+
         # load more tasks when the scroll bar reaches the top
         self.tab_widget.currentWidget().verticalScrollBar().valueChanged.connect(
             self.check_scrollbar
         )
 
-        # load initial tasks
+        # load initial tasks, unless the caller does once the window is shown
+        if load:
+            self.load()
+
+    def load(self):
+        # the parts of the widget that can wait until it is on screen
+        self.load_no_tasks_image()
         self.reload_tasks()
 
+    def load_no_tasks_image(self):
+        if os.path.exists("../assets/no_tasks_message.png"):
+            pixmap = QPixmap("../assets/no_tasks_message.png")
+        else:
+            bundle_dir = getattr(
+                sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__))
+            )
+            pixmap = QPixmap(os.path.join(bundle_dir, "assets", "no_tasks_message.png"))
+
+        pixmap = pixmap.scaled(
+            self.size(),
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+        self.complete_image_label.setPixmap(pixmap)
+
     def setup_ui(self):
+        # Create the search box
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search tasks")
+        self.search_box.setClearButtonEnabled(True)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY)
+
         # Create a QTabWidget
         self.tab_widget = QTabWidget()
 
@@ -201,21 +349,8 @@ class TasksWidget(QWidget):
         self.all_tasks_finished_message = QWidget()
         self.all_tasks_finished_message.setLayout(QVBoxLayout())
 
-        if os.path.exists("../assets/no_tasks_message.png"):
-            pixmap = QPixmap("../assets/no_tasks_message.png")
-        else:
-            bundle_dir = getattr(
-                sys, "_MEIPASS", os.path.abspath(os.path.dirname(__file__))
-            )
-            pixmap = QPixmap(os.path.join(bundle_dir, "assets", "no_tasks_message.png"))
-
-        pixmap = pixmap.scaled(
-            self.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
+        # the image is set in load_no_tasks_image
         self.complete_image_label = QLabel(self.all_tasks_finished_message)
-        self.complete_image_label.setPixmap(pixmap)
         self.complete_image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.all_tasks_finished_message.layout().addWidget(self.complete_image_label)
 
@@ -232,11 +367,16 @@ class TasksWidget(QWidget):
         self.scroll_area_incomplete.setWidgetResizable(True)
         self.scroll_area_incomplete.setWidget(self.stacked_widget_incomplete)
 
-        # lazy loading variables
-        self.scroll_area_complete.lazy_offset = 0
+        # lazy loading variables: the cursor is the sort key of the last
+        # loaded task, exhausted is set once a page comes back short
+        self.scroll_area_complete.lazy_cursor = None
+        self.scroll_area_complete.lazy_exhausted = False
         self.scroll_area_complete.lazy_limit = 30
-        self.scroll_area_incomplete.lazy_offset = 0
+        self.scroll_area_complete.last_scroll = None
+        self.scroll_area_incomplete.lazy_cursor = None
+        self.scroll_area_incomplete.lazy_exhausted = False
         self.scroll_area_incomplete.lazy_limit = 30
+        self.scroll_area_incomplete.last_scroll = None
 
         # Add the scroll areas to the tab widget
         self.tab_widget.addTab(self.scroll_area_complete, "Finished")
@@ -247,8 +387,17 @@ class TasksWidget(QWidget):
 
         # Create a QVBoxLayout for the main widget and add the tab widget to it
         main_layout = QVBoxLayout(self)
+        main_layout.addWidget(self.search_box)
         main_layout.addWidget(self.tab_widget)
 
+    def apply_search(self):
+        search_text = self.search_box.text().strip()
+        if len(search_text) < self.SEARCH_MIN_LENGTH:
+            search_text = ""
+        if search_text != self.search_text:
+            self.search_text = search_text
+            self.reload_tasks()
+
     def toggle_completed_image(self, visible):
         if visible:
             self.stacked_widget_incomplete.setCurrentWidget(
@@ -266,10 +415,10 @@ class TasksWidget(QWidget):
 
         # get the total number of tasks in each category
         total_complete_tasks = self.shared_state.database_client.count_tasks(
-            complete=True
+            complete=True, search=self.search_text
         )
         total_incomplete_tasks = self.shared_state.database_client.count_tasks(
-            complete=False
+            complete=False, search=self.search_text
         )
 
         # update the tab text
@@ -301,8 +450,9 @@ class TasksWidget(QWidget):
                     1, f"To Do ({self._format_task_count(total_incomplete_tasks)})"
                 )
 
-        # update the no tasks message
-        if num_incomplete_tasks_loaded == 0:
+        # update the no tasks message, a search without results doesn't mean
+        # that everything is done
+        if num_incomplete_tasks_loaded == 0 and not self.search_text:
             self.toggle_completed_image(True)
         else:
             self.toggle_completed_image(False)
@@ -315,104 +465,165 @@ class TasksWidget(QWidget):
         return f"{count} Tasks"
 
     def edit_task(self, new_task):
-        # Choose the correct layout based on the task's completion status
-        layout = (
+        task_widget = self.shared_state.task_widgets.get(new_task.uuid)
+        if self.search_text and not self.shared_state.database_client.matches_search(
+            new_task.uuid, self.search_text
+        ):
+            # edited out of the search results
+            if task_widget is not None:
+                self.delete_task_widget(new_task.uuid)
+            else:
+                self.update_tab_labels_and_completed_image()
+            return
+
+        if task_widget is None:
+            # the task was not loaded, but may belong into a loaded range now
+            self.insert_task(new_task)
+            return
+
+        old_task = task_widget.task
+        if (
+            old_task.complete == new_task.complete
+            and old_task.sort_key == new_task.sort_key
+        ):
+            # same tab and position, just rebind the widget
+            self.shared_state.task_widgets.edit(new_task)
+            return
+
+        # moved to another position or tab
+        self.delete_task_widget(new_task.uuid)
+        self.insert_task(new_task)
+
+    def content_layout(self, complete):
+        return (
             self.content_widget_complete.layout()
-            if new_task.complete
+            if complete
             else self.content_widget_incomplete.layout()
         )
 
-        for i in range(layout.count()):
-            task_widget = layout.itemAt(i).widget()
-            if task_widget and task_widget.task.uuid == new_task.uuid:
-                complete_toggled = task_widget.task.complete != new_task.complete
-                task_widget.task = new_task
-                if complete_toggled:
-                    self.delete_task_widget(task_widget)
-                    self.shared_state.task_widgets.delete(task_widget.task.uuid)
-                    self.insert_task(new_task)
-                return
-
     def delete_task_widget(self, task_uuid):
-        for layout in [
-            self.content_widget_complete.layout(),
-            self.content_widget_incomplete.layout(),
-        ]:
-            for i in range(layout.count()):
-                task_widget = layout.itemAt(i).widget()
-                if task_widget and task_widget.task.uuid == task_uuid:
-                    layout.removeWidget(
-                        task_widget
-                    )  # Remove the widget from the layout
-                    task_widget.hide()  # Hide the widget
-                    task_widget.deleteLater()  # Schedule the widget for deletion
-
-                    self.update_tab_labels_and_completed_image()
-                    return
+        removed = self.shared_state.task_widgets.delete(task_uuid)
+        if removed is None:
+            return
+
+        # the layouts list the task widgets of task_widgets in descending
+        # order. the index no longer holds the widget, so its layout index is
+        # counted from the new length
+        complete, position = removed
+        index = self.shared_state.task_widgets.index_of(complete)
+        child = self.content_layout(complete).takeAt(len(index) - position)
+        self.widget_pool.release(child.widget())  # Keep it for reuse
+
+        self.update_tab_labels_and_completed_image()
 
     def insert_task(self, task):
-        task_widget = TaskWidget(task, self.shared_state)
-        layout = (
-            self.content_widget_complete.layout()
-            if task.complete
-            else self.content_widget_incomplete.layout()
+        if self.search_text and not self.shared_state.database_client.matches_search(
+            task.uuid, self.search_text
+        ):
+            self.update_tab_labels_and_completed_image()
+            return
+
+        scroll_area = (
+            self.scroll_area_complete if task.complete else self.scroll_area_incomplete
         )
 
-        # Find the correct index to insert the new task
-        index = 0
-        for i in range(layout.count()):
-            existing_task_widget = layout.itemAt(i).widget()
-            if (
-                existing_task_widget
-                and existing_task_widget.task.due_date < task.due_date
-            ):
-                break
-            index += 1
+        # a task past the cursor of a tab that still has pages to load, or of
+        # a tab that has none loaded yet, will be picked up by the next page,
+        # inserting it now would load it twice
+        cursor = scroll_area.lazy_cursor
+        if cursor is None or task.sort_key > cursor:
+            if not scroll_area.lazy_exhausted:
+                self.update_tab_labels_and_completed_image()
+                return
+            scroll_area.lazy_cursor = task.sort_key
+
+        task_widget = self.widget_pool.acquire(task)
+        index = self.shared_state.task_widgets.index_for(task)
 
-        layout.insertWidget(index, task_widget)
+        # the widgets above the new one are the ones with a larger sort key
+        layout_index = len(index) - index.insertion_point(task.sort_key)
+        self.content_layout(task.complete).insertWidget(layout_index, task_widget)
+        task_widget.show()
 
         # add to shared state
         self.shared_state.task_widgets.add(task_widget)
         self.update_tab_labels_and_completed_image()
 
+    def load_page(self, scroll_area, complete):
+        # the page is taken from the prefetched tasks, whatever they are
+        # short of is queried here
+        limit = scroll_area.lazy_limit
+        tasks = []
+        if self.prefetcher is not None:
+            tasks = self.prefetcher.take(complete, self.search_text, limit)
+        if self.prefetcher is not None and self.prefetcher.exhausted(complete):
+            scroll_area.lazy_exhausted = True
+        elif len(tasks) < limit:
+            cursor = tasks[-1].sort_key if tasks else scroll_area.lazy_cursor
+            missing = limit - len(tasks)
+            more_tasks = self.shared_state.database_client.lazy_load_tasks_after(
+                cursor, missing, complete, self.search_text
+            )
+            tasks += more_tasks
+            scroll_area.lazy_exhausted = len(more_tasks) < missing
+            if self.prefetcher is not None:
+                self.prefetcher.reset(
+                    complete,
+                    self.search_text,
+                    tasks[-1].sort_key if tasks else cursor,
+                    scroll_area.lazy_exhausted,
+                )
+        if tasks:
+            scroll_area.lazy_cursor = tasks[-1].sort_key
+        return tasks
+
+    def prefetch(self, scroll_area, complete, value):
+        # scrolling up, toward the tasks that are not loaded yet, prefetches
+        # as many of them as the current speed scrolls through in
+        # PREFETCH_AHEAD seconds
+        now = time.perf_counter()
+        last_scroll = scroll_area.last_scroll
+        scroll_area.last_scroll = (now, value)
+        if self.prefetcher is None or last_scroll is None or scroll_area.lazy_exhausted:
+            return
+        last_time, last_value = last_scroll
+        if value >= last_value:
+            return
+
+        row_height = TaskWidget.HEIGHT + self.content_layout(complete).spacing()
+        tasks_per_second = (last_value - value) / row_height / max(now - last_time, 0.001)
+        count = int(tasks_per_second * self.PREFETCH_AHEAD)
+        self.prefetcher.prefetch(
+            complete, min(max(count, scroll_area.lazy_limit), self.PREFETCH_MAX_TASKS)
+        )
+
     def load_more_tasks(self, all_tabs=False):
         tasks = []
         if all_tabs:
-            complete_tasks = self.shared_state.database_client.lazy_load_tasks(
-                self.scroll_area_complete.lazy_offset,
-                self.scroll_area_complete.lazy_limit,
-                True,
-            )
-            self.scroll_area_complete.lazy_offset += len(complete_tasks)
-            incomplete_tasks = self.shared_state.database_client.lazy_load_tasks(
-                self.scroll_area_incomplete.lazy_offset,
-                self.scroll_area_incomplete.lazy_limit,
-                False,
-            )
-            self.scroll_area_incomplete.lazy_offset += len(incomplete_tasks)
+            complete_tasks = self.load_page(self.scroll_area_complete, True)
+            incomplete_tasks = self.load_page(self.scroll_area_incomplete, False)
             tasks = complete_tasks + incomplete_tasks
         else:
-            current_tab = self.tab_widget.currentWidget()
-            tasks = self.shared_state.database_client.lazy_load_tasks(
-                current_tab.lazy_offset,
-                current_tab.lazy_limit,
+            tasks = self.load_page(
+                self.tab_widget.currentWidget(),
                 True if self.tab_widget.currentIndex() == 0 else False,
             )
-            current_tab.lazy_offset += len(tasks)
 
-        task_widgets = [TaskWidget(task, self.shared_state) for task in tasks]
+        task_widgets = [self.widget_pool.acquire(task) for task in tasks]
         complete_widgets = [widget for widget in task_widgets if widget.task.complete]
         incomplete_widgets = [
             widget for widget in task_widgets if not widget.task.complete
         ]
 
-        complete_layout = self.content_widget_complete.layout()
-        for widget in complete_widgets:
-            complete_layout.insertWidget(0, widget)
-
-        incomplete_layout = self.content_widget_incomplete.layout()
-        for widget in incomplete_widgets:
-            incomplete_layout.insertWidget(0, widget)
+        # a page continues after the last loaded task, so it goes on top
+        for complete, widgets in [
+            (True, complete_widgets),
+            (False, incomplete_widgets),
+        ]:
+            layout = self.content_layout(complete)
+            for widget in widgets:
+                layout.insertWidget(0, widget)
+                widget.show()
 
         # update shared state with new widgets
         self.shared_state.task_widgets.add(task_widgets)
@@ -433,29 +644,20 @@ class TasksWidget(QWidget):
         while layout.count():
             child = layout.takeAt(0)
             if child.widget():
-                child.widget().deleteLater()
+                self.widget_pool.release(child.widget())
 
     def check_scrollbar(self, value):
+        self.prefetch(
+            self.tab_widget.currentWidget(), self.tab_widget.currentIndex() == 0, value
+        )
+
         # If the scrollbar's value is within 5% of the minimum value, check if there are still tasks to load
         if (
             value
             <= self.tab_widget.currentWidget().verticalScrollBar().maximum() * 0.05
         ):
-            # Check the current tab and use the appropriate list for the count
-            if (
-                self.tab_widget.currentIndex() == 0
-            ):  # Assuming the "Complete" tab is at index 0
-                loaded_widgets_count = len(self.shared_state.task_widgets.complete)
-                total_tasks = self.shared_state.database_client.count_tasks(
-                    complete=True
-                )
-            else:  # Assuming the "Incomplete" tab is at index 1
-                loaded_widgets_count = len(self.shared_state.task_widgets.incomplete)
-                total_tasks = self.shared_state.database_client.count_tasks(
-                    complete=False
-                )
-
-            if loaded_widgets_count < total_tasks:
+            # load the next page unless the tab has loaded all of its tasks
+            if not self.tab_widget.currentWidget().lazy_exhausted:
                 # Save the current maximum value of the scrollbar
                 old_max = self.tab_widget.currentWidget().verticalScrollBar().maximum()
 
@@ -473,8 +675,13 @@ class TasksWidget(QWidget):
 
     def reload_tasks(self):
         # reset the lazy loading variables
-        self.scroll_area_complete.lazy_offset = 0
-        self.scroll_area_incomplete.lazy_offset = 0
+        for scroll_area in [self.scroll_area_complete, self.scroll_area_incomplete]:
+            scroll_area.lazy_cursor = None
+            scroll_area.lazy_exhausted = False
+            scroll_area.last_scroll = None
+        if self.prefetcher is not None:
+            for complete in [True, False]:
+                self.prefetcher.reset(complete, self.search_text, None)
 
         # clear the list of task widgets
         self.__clear_layout(self.content_widget_complete.layout())
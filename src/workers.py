@@ -0,0 +1,340 @@
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from PyQt6.QtCore import (
+    QCoreApplication,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    QTimer,
+    pyqtSignal,
+)
+from database_client import DatabaseClient, OperationCancelled
+
+
+class WorkerSignals(QObject):
+    # the signals live on a QObject owned by the GUI thread, so slots
+    # connected to them run there even though they are emitted by the worker
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class DatabaseWorker(QRunnable):
+    def __init__(self, db_name):
+        super().__init__()
+        self.db_name = db_name
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        # sqlite connections can't be shared between threads, so every job
+        # opens its own database client. failing to open it fails the job
+        # like any other error, so the caller hears about it
+        database_client = None
+        try:
+            database_client = DatabaseClient(self.db_name)
+            result = self.work(database_client)
+        except OperationCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+        finally:
+            if database_client is not None:
+                database_client.close()
+
+    def work(self, database_client):
+        raise NotImplementedError
+
+
+class ImportWorker(DatabaseWorker):
+    def __init__(self, db_name, file_path):
+        super().__init__(db_name)
+        self.file_path = file_path
+
+    def work(self, database_client):
+        database_client.import_progress.connect(self.signals.progress)
+        return database_client.import_from_file(
+            self.file_path, cancel_event=self.cancel_event
+        )
+
+
+class ExportWorker(DatabaseWorker):
+    def __init__(self, db_name, file_path):
+        super().__init__(db_name)
+        self.file_path = file_path
+
+    def work(self, database_client):
+        database_client.export_progress.connect(self.signals.progress)
+        return database_client.export_to_file(
+            self.file_path, cancel_event=self.cancel_event
+        )
+
+
+class BackupWorker(DatabaseWorker):
+    def __init__(self, db_name, file_path):
+        super().__init__(db_name)
+        self.file_path = file_path
+
+    def work(self, database_client):
+        database_client.backup_progress.connect(self.signals.progress)
+        return database_client.backup_to_file(
+            self.file_path, cancel_event=self.cancel_event
+        )
+
+
+class RestoreWorker(DatabaseWorker):
+    def __init__(self, db_name, file_path):
+        super().__init__(db_name)
+        self.file_path = file_path
+
+    def work(self, database_client):
+        database_client.backup_progress.connect(self.signals.progress)
+        return database_client.restore_from_file(
+            self.file_path, cancel_event=self.cancel_event
+        )
+
+
+class BackupScheduler(QObject):
+    # backs the database up into backup_dir every interval seconds, keeping
+    # the newest keep backups. a backup is skipped while the previous one is
+    # still running.
+    backed_up = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, db_name, backup_dir, interval=60 * 60, keep=5, parent=None):
+        super().__init__(parent)
+        if keep < 1:
+            # the backup just made is always kept
+            raise ValueError("keep must be at least 1")
+        self.db_name = db_name
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.worker = None
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(interval * 1000))
+        self.timer.timeout.connect(self.backup)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def backup(self):
+        if self.worker is not None:
+            return
+        os.makedirs(self.backup_dir, exist_ok=True)
+        file_path = os.path.join(
+            self.backup_dir, f"tasks_{datetime.now().strftime('%Y-%m-%d_%H_%M_%S')}.db"
+        )
+        self.worker = BackupWorker(self.db_name, file_path)
+        self.worker.signals.finished.connect(lambda _: self.backup_done(file_path))
+        self.worker.signals.failed.connect(self.backup_failed)
+        self.worker.signals.cancelled.connect(self.backup_failed)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def backup_done(self, file_path):
+        self.worker = None
+        self.prune()
+        self.backed_up.emit(file_path)
+
+    def backup_failed(self, error="cancelled"):
+        self.worker = None
+        self.failed.emit(error)
+
+    def backups(self):
+        # oldest first, the timestamps in the names sort by time
+        return sorted(
+            os.path.join(self.backup_dir, name)
+            for name in os.listdir(self.backup_dir)
+            if name.startswith("tasks_") and name.endswith(".db")
+        )
+
+    def prune(self):
+        for file_path in self.backups()[: -self.keep]:
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+
+class PrefetchStream:
+    # the prefetched tasks of one tab: buffered tasks follow the loaded ones,
+    # cursor is the sort key of the last task loaded or buffered
+    def __init__(self, search, cursor):
+        self.search = search
+        self.cursor = cursor
+        self.loaded_cursor = cursor
+        self.buffer = deque()
+        self.exhausted = False
+        self.pending = False
+        self.generation = 0
+
+
+class PrefetchThread:
+    # a daemon thread loading the pages of a TaskPrefetcher. not a pool, the
+    # database client opened on it has to stay on it, and it must not keep
+    # the app from quitting. not a QObject either, so it can still be
+    # stopped while its prefetcher is being deleted.
+    def __init__(self, db_name, deliver):
+        self.db_name = db_name
+        self.deliver = deliver
+        self.requests = queue.Queue()
+        self.thread = None
+        # pages are delivered under the lock, once stop holds it nothing is
+        # delivered anymore
+        self.lock = threading.Lock()
+        self.stopped = False
+
+    def request(self, request):
+        if self.thread is None:
+            self.stopped = False
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.requests.put(request)
+
+    def run(self):
+        # until stop puts None in the queue
+        database_client = None
+        try:
+            while True:
+                request = self.requests.get()
+                if request is None:
+                    break
+                complete, search, generation, cursor, limit = request
+                try:
+                    if database_client is None:
+                        database_client = DatabaseClient(self.db_name)
+                    tasks = database_client.lazy_load_tasks_after(
+                        cursor, limit, complete, search
+                    )
+                except Exception:
+                    tasks = None
+                with self.lock:
+                    if self.stopped:
+                        break
+                    try:
+                        self.deliver((complete, generation, limit, tasks))
+                    except RuntimeError:
+                        # the prefetcher was deleted without stopping the thread
+                        break
+        finally:
+            if database_client is not None:
+                database_client.close()
+
+    def stop(self, *args):
+        # drop the page being loaded, then wait for the client to close
+        if self.thread is not None:
+            with self.lock:
+                self.stopped = True
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+
+class TaskPrefetcher(QObject):
+    # fetches the pages after the loaded tasks ahead of time, so loading the
+    # next page only has to build the widgets. the pages are loaded one at a
+    # time on a PrefetchThread, and at most max_buffered tasks are kept per
+    # tab. the tasks of a tab are identified by complete, like in
+    # lazy_load_tasks_after.
+    prefetched = pyqtSignal(bool)
+    # (complete, generation, limit, tasks) from the prefetch thread, tasks is
+    # None if the page couldn't be loaded
+    fetched_page = pyqtSignal(object)
+
+    def __init__(self, db_name, max_buffered=300, parent=None):
+        super().__init__(parent)
+        self.db_name = db_name
+        self.max_buffered = max_buffered
+        self.streams = {}
+
+        self.thread = PrefetchThread(db_name, self.fetched_page.emit)
+        self.fetched_page.connect(self.fetched)
+
+        # the thread is stopped with the prefetcher, e.g. when its widget is
+        # deleted, or when the app quits
+        self.destroyed.connect(self.thread.stop)
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.close)
+
+    def reset(self, complete, search, cursor, exhausted=False):
+        # the tab now has the tasks up to cursor loaded, drop everything
+        # buffered and any page still being fetched
+        stream = self.streams.get(complete)
+        generation = stream.generation + 1 if stream is not None else 0
+        stream = self.streams[complete] = PrefetchStream(search, cursor)
+        stream.generation = generation
+        stream.exhausted = exhausted
+
+    def invalidate(self):
+        # tasks were changed, the buffered ones may be out of date
+        for complete, stream in list(self.streams.items()):
+            self.reset(complete, stream.search, stream.loaded_cursor)
+
+    def prefetch(self, complete, count):
+        # fetch up to count more tasks in the background, unless a page is
+        # already on its way, the buffer is full or there is nothing left
+        stream = self.streams.get(complete)
+        if stream is None or stream.pending or stream.exhausted:
+            return
+        limit = min(count, self.max_buffered - len(stream.buffer))
+        if limit <= 0:
+            return
+
+        stream.pending = True
+        self.thread.request(
+            (complete, stream.search, stream.generation, stream.cursor, limit)
+        )
+
+    def fetched(self, page):
+        complete, generation, limit, tasks = page
+        stream = self.streams.get(complete)
+        if stream is None or stream.generation != generation:
+            # the tab was reloaded or the tasks changed in the meantime
+            return
+        stream.pending = False
+        if tasks is None:
+            # loading the page falls back to querying it directly
+            return
+        stream.buffer.extend(tasks)
+        if tasks:
+            stream.cursor = tasks[-1].sort_key
+        stream.exhausted = len(tasks) < limit
+        self.prefetched.emit(complete)
+
+    def take(self, complete, search, limit):
+        # up to limit buffered tasks that follow the loaded ones, in order
+        stream = self.streams.get(complete)
+        if stream is None or stream.search != search:
+            return []
+        tasks = [
+            stream.buffer.popleft() for _ in range(min(limit, len(stream.buffer)))
+        ]
+        if tasks:
+            stream.loaded_cursor = tasks[-1].sort_key
+        return tasks
+
+    def exhausted(self, complete):
+        # whether every task after the loaded ones has been taken
+        stream = self.streams.get(complete)
+        return stream is not None and stream.exhausted and not stream.buffer
+
+    def close(self):
+        # stop the thread, its client is closed once it is done with the
+        # page it is loading
+        self.streams.clear()
+        self.thread.stop()
@@ -4,10 +4,31 @@ import os
 import unittest
 import sqlite3
 import json
+import io
+import threading
+import time
+from datetime import date
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
 
-from database_client import DatabaseClient, Task
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtWidgets import QApplication
+
+from database_client import (
+    DatabaseClient,
+    Task,
+    OperationCancelled,
+    ConnectionProfile,
+    SCHEMA_VERSION,
+    overdue,
+    due_today,
+    due_this_week,
+    bulk_imports,
+)
+from file_formats import iter_json_array
+
+app = QApplication.instance() or QApplication([])
 
 
 class TestDatabaseClient(unittest.TestCase):
@@ -20,16 +41,61 @@ class TestDatabaseClient(unittest.TestCase):
         self.assertIsInstance(conn, sqlite3.Connection)
         self.assertIsInstance(cur, sqlite3.Cursor)
 
+    def test_connection_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            client = DatabaseClient(os.path.join(directory, "tasks.db"))
+
+            # Check that both connections use WAL and the reader is read-only
+            for conn in [client.conn, client.read_conn]:
+                self.assertEqual(
+                    conn.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+                )
+                self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertIsNot(client.read_conn, client.conn)
+            with self.assertRaises(sqlite3.OperationalError):
+                client.read_conn.execute("delete from todo")
+
+            # Check that committed writes are visible to the reader
+            client.add_task(Task("uuid1", "", "description1", "2024-01-01", False))
+            self.assertEqual(client.count_tasks(), 1)
+            self.assertEqual(client.get_task("uuid1").description, "description1")
+            client.close()
+
+            # Check that a custom profile is applied
+            client = DatabaseClient(
+                os.path.join(directory, "tasks.db"),
+                ConnectionProfile(journal_mode="delete", synchronous="full"),
+            )
+            self.assertEqual(
+                client.conn.execute("PRAGMA journal_mode").fetchone()[0], "delete"
+            )
+            self.assertEqual(client.conn.execute("PRAGMA synchronous").fetchone()[0], 2)
+            client.close()
+
     def test_get_all_tasks(self):
         tasks = self.client.get_all_tasks()
         self.assertIsInstance(tasks, list)
         for task in tasks:
             self.assertIsInstance(task, Task)
 
+    def test_iter_tasks(self):
+        # Setup: Add more tasks than fit into one batch
+        for i in range(5):
+            self.client.add_task(Task(f"uuid{i}", "", f"description{i}", "2024-01-01"))
+
+        # Stream the tasks in batches of two
+        tasks = list(self.client.iter_tasks(batch_size=2))
+
+        # Check that every task was streamed exactly once
+        self.assertEqual(len(tasks), 5)
+        self.assertEqual({task.uuid for task in tasks}, {f"uuid{i}" for i in range(5)})
+        for task in tasks:
+            self.assertIsInstance(task, Task)
+
     def test_get_task_when_task_is_in_database(self):
         # Setup: Add a task to the database
         task_uuid = "task_uuid"
-        original_task = Task(task_uuid, "image_uri", "description", "due_date", False)
+        original_task = Task(task_uuid, "image_uri", "description", "2024-01-01", False)
         self.client.add_task(original_task)
 
         # Fetch the task from the database
@@ -55,6 +121,156 @@ class TestDatabaseClient(unittest.TestCase):
         count = self.client.count_tasks()
         self.assertIsInstance(count, int)
 
+    def test_count_tasks_kept_in_sync(self):
+        # Add, toggle and delete tasks
+        for i in range(4):
+            self.client.add_task(Task(f"uuid{i}", "", f"description{i}", "2024-01-01", i == 0))
+        self.client.edit_task(Task("uuid1", "", "description1", "2024-01-01", True))
+        self.client.edit_task(Task("uuid2", "", "edited", "2024-01-02", False))
+        self.client.delete_task("uuid3")
+        self.assertEqual(self.client.count_tasks(True), 2)
+        self.assertEqual(self.client.count_tasks(False), 1)
+        self.assertEqual(self.client.count_tasks(), 3)
+
+        # Import more tasks
+        file_path = os.path.join(tempfile.gettempdir(), "test_counted_tasks.json")
+        with open(file_path, "w") as f:
+            json.dump(
+                [
+                    {"description": "a", "due_date": "2024-01-01", "complete": True},
+                    {"description": "b", "due_date": "2024-01-01", "complete": 0},
+                ],
+                f,
+            )
+        self.client.import_from_file(file_path)
+        os.remove(file_path)
+        self.assertEqual(self.client.count_tasks(True), 3)
+        self.assertEqual(self.client.count_tasks(False), 2)
+
+        # Clear everything
+        self.client.clear_all()
+        self.assertEqual(self.client.count_tasks(True), 0)
+        self.assertEqual(self.client.count_tasks(False), 0)
+        self.assertEqual(self.client.count_tasks(), 0)
+
+    def test_count_tasks_existing_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Setup: A database created before the counters existed
+            db_name = os.path.join(directory, "tasks.db")
+            conn = sqlite3.connect(db_name)
+            conn.execute(
+                "create table todo (uuid text primary key, image_uri text, task_desc text, due_date text, complete integer)"
+            )
+            conn.executemany(
+                "insert into todo values (?, '', 'description', '2024-01-01', ?)",
+                [("uuid1", 1), ("uuid2", 0), ("uuid3", 0)],
+            )
+            conn.commit()
+            conn.close()
+
+            # Check that the counters and the search index are seeded from
+            # the existing rows
+            client = DatabaseClient(db_name)
+            self.assertEqual(client.count_tasks(True), 1)
+            self.assertEqual(client.count_tasks(False), 2)
+            self.assertEqual(client.count_tasks(search="description"), 3)
+            client.close()
+
+    def test_migrate_due_dates(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Setup: A database from before due dates were stored as ordinals
+            db_name = os.path.join(directory, "tasks.db")
+            conn = sqlite3.connect(db_name)
+            conn.execute(
+                "create table todo (uuid text primary key, image_uri text, task_desc text, due_date text, complete integer)"
+            )
+            conn.executemany(
+                "insert into todo values (?, '', 'description', ?, 0)",
+                [
+                    ("uuid1", "2024-03-01"),
+                    ("uuid2", "not a date"),
+                    ("uuid3", "2024-02-30"),
+                ],
+            )
+            conn.commit()
+            conn.close()
+
+            # Check that the ordinals were filled in and the schema is current
+            client = DatabaseClient(db_name)
+            self.assertEqual(
+                client.conn.execute("PRAGMA user_version").fetchone()[0],
+                SCHEMA_VERSION,
+            )
+            self.assertEqual(
+                dict(client.conn.execute("select uuid, due_ordinal from todo")),
+                {"uuid1": date(2024, 3, 1).toordinal(), "uuid2": 0, "uuid3": 0},
+            )
+
+            # Check that tasks without a valid date still page in order
+            tasks = client.lazy_load_tasks_after(None, 10)
+            self.assertEqual(
+                [task.uuid for task in tasks], ["uuid2", "uuid3", "uuid1"]
+            )
+            self.assertEqual(
+                [
+                    task.uuid
+                    for task in client.lazy_load_tasks_after(tasks[1].sort_key, 10)
+                ],
+                ["uuid1"],
+            )
+            client.close()
+
+            # Check that opening the migrated database again keeps it as is
+            client = DatabaseClient(db_name)
+            self.assertEqual(client.count_tasks(), 3)
+
+            # Check that tasks with a date that is not valid can be edited
+            # as long as the date is kept
+            task = client.get_task("uuid2")
+            task.complete = True
+            client.edit_task(task)
+            self.assertTrue(client.get_task("uuid2").complete)
+            self.assertEqual(
+                client.conn.execute(
+                    "select due_ordinal from todo where uuid='uuid2'"
+                ).fetchone()[0],
+                0,
+            )
+            task.due_date = "2024-02-31"
+            with self.assertRaises(ValueError):
+                client.edit_task(task)
+            client.close()
+
+    def test_lazy_load_tasks_after_null_due_date(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Setup: An older database with a task stored without a due date
+            db_name = os.path.join(directory, "tasks.db")
+            conn = sqlite3.connect(db_name)
+            conn.execute(
+                "create table todo (uuid text primary key, image_uri text, task_desc text, due_date text, complete integer)"
+            )
+            conn.executemany(
+                "insert into todo values (?, '', 'description', ?, 0)",
+                [("a", None)] + [(f"b{i}", f"2024-01-0{i + 1}") for i in range(5)],
+            )
+            conn.commit()
+            conn.close()
+
+            # Check that paging a task at a time reaches every task
+            client = DatabaseClient(db_name)
+            uuids = []
+            cursor = None
+            while True:
+                page = client.lazy_load_tasks_after(cursor, 1, False)
+                if not page:
+                    break
+                uuids.append(page[0].uuid)
+                cursor = page[-1].sort_key
+            self.assertEqual(uuids, ["a"] + [f"b{i}" for i in range(5)])
+            self.assertEqual(len(uuids), client.count_tasks(False))
+            self.assertIsNone(client.get_task("a").due_date)
+            client.close()
+
     def test_lazy_load_tasks(self):
         offset = 0
         limit = 10
@@ -63,9 +279,141 @@ class TestDatabaseClient(unittest.TestCase):
         for task in tasks:
             self.assertIsInstance(task, Task)
 
+    def test_lazy_load_tasks_after(self):
+        # Setup: Add tasks sharing due dates so the uuid tie-break matters
+        for i in range(7):
+            self.client.add_task(
+                Task(f"uuid{i}", "", f"description{i}", f"2024-01-0{i % 3 + 1}", i % 2 == 0)
+            )
+
+        # Page through all tasks three at a time
+        pages = []
+        cursor = None
+        while True:
+            page = self.client.lazy_load_tasks_after(cursor, 3)
+            if not page:
+                break
+            pages.append(page)
+            cursor = page[-1].sort_key
+
+        # Check that every task was returned exactly once, in order
+        tasks = [task for page in pages for task in page]
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(len({task.uuid for task in tasks}), 7)
+        self.assertEqual(
+            [task.sort_key for task in tasks],
+            sorted(task.sort_key for task in tasks),
+        )
+
+        # Check that filtering by status only returns matching tasks
+        complete_tasks = self.client.lazy_load_tasks_after(None, 10, True)
+        self.assertEqual(len(complete_tasks), 4)
+        self.assertTrue(all(task.complete for task in complete_tasks))
+        self.assertEqual(
+            self.client.lazy_load_tasks_after(complete_tasks[-1].sort_key, 10, True),
+            [],
+        )
+
+    def test_search(self):
+        # Setup: Add tasks with overlapping descriptions
+        for i, description in enumerate(
+            ["buy milk", "milk milk milk", "call mom", "buy bread", "millet"]
+        ):
+            self.client.add_task(
+                Task(f"uuid{i}", "", description, f"2024-01-0{i + 1}", i == 3)
+            )
+
+        # Check that the best match comes first and words match as prefixes
+        tasks, cursor = self.client.search("milk", 10)
+        self.assertEqual([task.uuid for task in tasks], ["uuid1", "uuid0"])
+        self.assertIsNone(cursor)
+        tasks, _ = self.client.search("mil", 10)
+        self.assertEqual({task.uuid for task in tasks}, {"uuid0", "uuid1", "uuid4"})
+
+        # Check that every word has to match
+        tasks, _ = self.client.search("buy milk", 10)
+        self.assertEqual([task.uuid for task in tasks], ["uuid0"])
+
+        # Check that results can be paged through
+        first_page, cursor = self.client.search("mil", 2)
+        second_page, cursor = self.client.search("mil", 2, cursor)
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(len(second_page), 1)
+        self.assertIsNone(cursor)
+        self.assertEqual(
+            {task.uuid for task in first_page + second_page},
+            {"uuid0", "uuid1", "uuid4"},
+        )
+
+        # Check filtering by status, empty searches and query syntax
+        tasks, _ = self.client.search("buy", 10, complete=True)
+        self.assertEqual([task.uuid for task in tasks], ["uuid3"])
+        self.assertEqual(self.client.search("   ", 10), ([], None))
+        self.assertEqual(self.client.search('"milk AND', 10), ([], None))
+
+    def test_search_kept_in_sync(self):
+        task = Task("uuid1", "", "buy milk", "2024-01-01", False)
+        self.client.add_task(task)
+        self.assertTrue(self.client.matches_search("uuid1", "milk"))
+
+        # Check that edits and deletions update the search index
+        task.description = "buy bread"
+        self.client.edit_task(task)
+        self.assertFalse(self.client.matches_search("uuid1", "milk"))
+        self.assertTrue(self.client.matches_search("uuid1", "bread"))
+        self.client.delete_task("uuid1")
+        self.assertEqual(self.client.search("bread", 10), ([], None))
+
+        self.client.add_task(Task("uuid2", "", "buy bread", "2024-01-01", False))
+        self.client.clear_all()
+        self.assertEqual(self.client.search("bread", 10), ([], None))
+        self.client.add_task(Task("uuid3", "", "buy bread", "2024-01-01", False))
+        self.assertEqual(self.client.count_tasks(search="bread"), 1)
+
+    def test_lazy_load_tasks_after_search(self):
+        # Setup: Add tasks where every other one matches
+        for i in range(10):
+            self.client.add_task(
+                Task(
+                    f"uuid{i}",
+                    "",
+                    "buy milk" if i % 2 == 0 else "call mom",
+                    f"2024-01-{10 - i:02d}",
+                    i % 4 == 0,
+                )
+            )
+        self.assertEqual(self.client.count_tasks(search="milk"), 5)
+        self.assertEqual(self.client.count_tasks(True, "milk"), 3)
+        self.assertEqual(self.client.count_tasks(False, "milk"), 2)
+
+        # Check both query plans, sorting the matches and walking the index
+        for join_limit in [self.client.SEARCH_JOIN_LIMIT, 0]:
+            self.client.SEARCH_JOIN_LIMIT = join_limit
+            pages = []
+            cursor = None
+            while True:
+                page = self.client.lazy_load_tasks_after(cursor, 2, search="milk")
+                if not page:
+                    break
+                pages.append(page)
+                cursor = page[-1].sort_key
+            self.assertEqual(
+                [task.uuid for page in pages for task in page],
+                ["uuid8", "uuid6", "uuid4", "uuid2", "uuid0"],
+            )
+            self.assertEqual(
+                [
+                    task.uuid
+                    for task in self.client.lazy_load_tasks_after(
+                        None, 10, True, "milk"
+                    )
+                ],
+                ["uuid8", "uuid4", "uuid0"],
+            )
+
     def test_add_task(self):
         # Create a new task and add it to the database
-        new_task = Task("uuid", "image_uri", "description", "due_date", True)
+        new_task = Task("uuid", "image_uri", "description", "2024-01-01", True)
         self.client.add_task(new_task)
 
         # Fetch the task from the database
@@ -78,14 +426,59 @@ class TestDatabaseClient(unittest.TestCase):
         self.assertEqual(fetched_task.due_date, new_task.due_date)
         self.assertEqual(fetched_task.complete, new_task.complete)
 
+    def test_add_task_invalid_due_date(self):
+        for due_date in ["due_date", "2024-02-30", "20240101"]:
+            with self.assertRaises(ValueError):
+                self.client.add_task(Task("uuid", "", "description", due_date))
+        self.assertEqual(self.client.count_tasks(), 0)
+
+    def test_due_date_ranges(self):
+        # Setup: Add tasks due every day of a week, Monday 2024-01-01 first
+        today = date(2024, 1, 3)
+        for i in range(7):
+            self.client.add_task(
+                Task(f"uuid{i}", "", "description", f"2024-01-0{i + 1}", i == 0)
+            )
+        self.client.add_task(Task("uuid7", "", "description", "2024-01-08"))
+
+        # Check the counts of the ranges
+        # a task due today is overdue, like for Task.is_overdue
+        self.assertEqual(self.client.count_tasks(due=overdue(today)), 3)
+        self.assertEqual(self.client.count_tasks(False, due=overdue(today)), 2)
+        self.assertEqual(
+            self.client.count_tasks(due=overdue(today)),
+            sum(task.is_overdue(today) for task in self.client.get_all_tasks()),
+        )
+        self.assertEqual(self.client.count_tasks(due=due_today(today)), 1)
+        self.assertEqual(self.client.count_tasks(due=due_this_week(today)), 7)
+        self.assertEqual(
+            self.client.count_tasks(due=(date(2024, 1, 7), None)), 2
+        )
+
+        # Check that pages of a range are in order and stay inside it
+        page = self.client.lazy_load_tasks_after(None, 2, due=due_this_week(today))
+        self.assertEqual([task.uuid for task in page], ["uuid0", "uuid1"])
+        page = self.client.lazy_load_tasks_after(
+            page[-1].sort_key, 10, False, due=due_this_week(today)
+        )
+        self.assertEqual(
+            [task.uuid for task in page], [f"uuid{i}" for i in range(2, 7)]
+        )
+
+        # Check that the range queries are index range scans
+        plan = self.client.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM todo WHERE complete = 0 AND due_ordinal >= 1 AND due_ordinal <= 2"
+        ).fetchall()
+        self.assertIn("USING COVERING INDEX", plan[0][3])
+
     def test_edit_task(self):
         # Setup: Add a task to the database
-        original_task = Task("uuid", "image_uri", "description", "due_date", False)
+        original_task = Task("uuid", "image_uri", "description", "2024-01-01", False)
         self.client.add_task(original_task)
 
         # Edit the task
         edited_task = Task(
-            "uuid", "new_image_uri", "new_description", "new_due_date", False
+            "uuid", "new_image_uri", "new_description", "2024-02-01", False
         )
         self.client.edit_task(edited_task)
 
@@ -96,6 +489,79 @@ class TestDatabaseClient(unittest.TestCase):
         self.assertEqual(task.due_date, edited_task.due_date)
         self.assertEqual(task.complete, edited_task.complete)
 
+    def test_batch(self):
+        signals = []
+        self.client.added_task.connect(lambda task: signals.append("added"))
+        self.client.edited_task.connect(lambda task: signals.append("edited"))
+        self.client.deleted_task.connect(lambda task_uuid: signals.append("deleted"))
+        self.client.batched_changes.connect(lambda changes: signals.append(changes))
+
+        with self.client.batch():
+            for i in range(3):
+                self.client.add_task(Task(f"uuid{i}", "", f"description{i}", "2024-01-01"))
+            self.client.edit_task(Task("uuid0", "", "edited", "2024-01-01", True))
+            self.client.delete_task("uuid1")
+
+            # Nested blocks join the outer batch
+            with self.client.batch():
+                self.client.add_task(Task("uuid3", "", "description3", "2024-01-01"))
+
+            # Nothing is announced before the block exits
+            self.assertEqual(signals, [])
+
+        # Check that the changes were committed and announced once
+        self.assertEqual(len(signals), 1)
+        changes = signals[0]
+        self.assertEqual([task.uuid for task in changes.added], ["uuid0", "uuid1", "uuid2", "uuid3"])
+        self.assertEqual([task.uuid for task in changes.edited], ["uuid0"])
+        self.assertEqual(changes.deleted, ["uuid1"])
+        self.assertEqual(self.client.count_tasks(), 3)
+        self.assertFalse(self.client.conn.in_transaction)
+
+    def test_batch_flushes_on_size(self):
+        batches = []
+        self.client.batched_changes.connect(lambda changes: batches.append(len(changes)))
+
+        with self.client.batch(max_size=2):
+            for i in range(5):
+                self.client.add_task(Task(f"uuid{i}", "", f"description{i}", "2024-01-01"))
+
+        self.assertEqual(batches, [2, 2, 1])
+
+    def test_batch_flushes_on_delay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            client = DatabaseClient(os.path.join(directory, "tasks.db"))
+            batches = []
+            client.batched_changes.connect(lambda changes: batches.append(len(changes)))
+
+            with client.batch(max_delay=0.01):
+                client.add_task(Task("uuid1", "", "description1", "2024-01-01"))
+                self.assertIsNone(client.get_task("uuid1"))
+
+                # Check that a batch that goes quiet is flushed by the timer
+                # once the event loop runs
+                deadline = time.monotonic() + 5
+                while not batches and time.monotonic() < deadline:
+                    QCoreApplication.processEvents()
+                self.assertEqual(batches, [1])
+                self.assertIsNotNone(client.get_task("uuid1"))
+
+                # Check that the age is also checked on every change
+                time.sleep(0.02)
+                client.add_task(Task("uuid2", "", "description2", "2024-01-01"))
+                self.assertEqual(batches, [1, 1])
+
+            self.assertEqual(batches, [1, 1])
+            client.close()
+
+    def test_batch_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.client.batch():
+                self.client.add_task(Task("uuid1", "", "description1", "2024-01-01"))
+                raise RuntimeError()
+
+        self.assertIsNone(self.client.get_task("uuid1"))
+
     def test_delete_task(self):
         task_uuid = "task_uuid"
         self.client.delete_task(task_uuid)
@@ -114,14 +580,14 @@ class TestDatabaseClient(unittest.TestCase):
                 "uuid": "uuid1",
                 "image_uri": "image_uri1",
                 "description": "description1",
-                "due_date": "due_date1",
+                "due_date": "2024-01-01",
                 "complete": True,
             },
             {
                 "uuid": "uuid2",
                 "image_uri": "image_uri2",
                 "description": "description2",
-                "due_date": "due_date2",
+                "due_date": "2024-01-02",
                 "complete": False,
             },
         ]
@@ -133,6 +599,244 @@ class TestDatabaseClient(unittest.TestCase):
 
         os.remove(file_path)
 
+    def test_import_from_file_in_batches(self):
+        file_path = os.path.join(tempfile.gettempdir(), "test_batched_tasks.json")
+        tasks = [
+            {
+                "image_uri": "",
+                "description": f"description{i}",
+                "due_date": "2024-01-01",
+                "complete": i % 2 == 0,
+            }
+            for i in range(5)
+        ]
+        with open(file_path, "w") as f:
+            json.dump(tasks, f, indent=4)
+
+        progress = []
+        self.client.import_progress.connect(
+            lambda imported, failed: progress.append((imported, failed))
+        )
+        result = self.client.import_from_file(file_path, batch_size=2)
+
+        # Check that every batch was committed and reported
+        self.assertEqual(result.imported, 5)
+        self.assertEqual(result.failed, [])
+        self.assertEqual(progress, [(2, 0), (4, 0), (5, 0)])
+        self.assertEqual(self.client.count_tasks(), 5)
+
+        os.remove(file_path)
+
+    def test_import_from_file_rebuilds_search_index(self):
+        file_path = os.path.join(tempfile.gettempdir(), "test_search_tasks.json")
+        tasks = [
+            {
+                "image_uri": "",
+                "description": f"description{i} milk",
+                "due_date": "2024-01-01",
+                "complete": False,
+            }
+            for i in range(5)
+        ]
+        with open(file_path, "w") as f:
+            json.dump(tasks, f)
+
+        self.client.import_from_file(
+            file_path, batch_size=2, rebuild_search_index=True
+        )
+
+        # Check that the imported tasks are searchable and the triggers are back
+        self.assertEqual(self.client.count_tasks(search="milk"), 5)
+        self.client.add_task(Task("uuid", "", "more milk", "2024-01-01", False))
+        self.assertEqual(self.client.count_tasks(search="milk"), 6)
+
+        os.remove(file_path)
+
+    def test_import_from_file_search_index_other_clients(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_name = os.path.join(directory, "tasks.db")
+            client = DatabaseClient(db_name)
+            file_path = os.path.join(directory, "tasks.json")
+            with open(file_path, "w") as f:
+                json.dump(
+                    [
+                        {"description": f"milk {i}", "due_date": "2024-01-01", "complete": False}
+                        for i in range(5)
+                    ],
+                    f,
+                )
+
+            def search_triggers():
+                return client.conn.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type='trigger' AND name LIKE 'todo_fts_%'"
+                ).fetchone()[0]
+
+            # Check that clients opened during the import leave the triggers
+            # dropped instead of rebuilding the index
+            triggers = []
+
+            def open_client(*args):
+                DatabaseClient(db_name).close()
+                triggers.append(search_triggers())
+
+            client.import_progress.connect(open_client)
+            client.import_from_file(file_path, batch_size=2, rebuild_search_index=True)
+            self.assertEqual(triggers, [0, 0, 0])
+            self.assertEqual(search_triggers(), 3)
+            self.assertEqual(client.count_tasks(search="milk"), 5)
+
+            # Setup: An import of an earlier run that was interrupted before it
+            # rebuilt the index
+            client.start_bulk_import()
+            client.conn.execute(
+                "insert into todo values ('uuid', '', 'more milk', '2024-01-01', 0, ?)",
+                (date(2024, 1, 1).toordinal(),),
+            )
+            client.conn.commit()
+            client.close()
+            bulk_imports.clear()
+
+            # Check that the next client rebuilds the index
+            client = DatabaseClient(db_name)
+            self.assertEqual(search_triggers(), 3)
+            self.assertEqual(client.count_tasks(search="milk"), 6)
+            client.close()
+
+    def test_import_from_file_reports_invalid_records(self):
+        file_path = os.path.join(tempfile.gettempdir(), "test_invalid_tasks.json")
+        tasks = [
+            {"description": "valid", "due_date": "2024-01-01", "complete": True},
+            "not a task",
+            {"description": "missing complete", "due_date": "2024-01-01"},
+            {"description": 42, "due_date": "2024-01-01", "complete": False},
+            {"description": "bad date", "due_date": "2024-02-30", "complete": False},
+            {"description": "list date", "due_date": ["x"], "complete": False},
+            {"description": "dict date", "due_date": {"x": 1}, "complete": False},
+            {"description": "valid too", "due_date": "2024-01-02", "complete": False},
+        ]
+        with open(file_path, "w") as f:
+            json.dump(tasks, f)
+
+        result = self.client.import_from_file(file_path, batch_size=1)
+
+        # Check that only the invalid records were skipped
+        self.assertEqual(result.imported, 2)
+        self.assertEqual([index for index, _ in result.failed], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(result.failed[4][1], "due_date must be a string")
+        self.assertEqual(
+            sorted(task.description for task in self.client.get_all_tasks()),
+            ["valid", "valid too"],
+        )
+
+        os.remove(file_path)
+
+    def test_import_from_file_cancelled(self):
+        file_path = os.path.join(tempfile.gettempdir(), "test_cancelled_tasks.json")
+        tasks = [
+            {"description": f"description{i}", "due_date": "2024-01-01", "complete": False}
+            for i in range(5)
+        ]
+        with open(file_path, "w") as f:
+            json.dump(tasks, f)
+
+        # Cancel as soon as the first batch is committed
+        cancel_event = threading.Event()
+        self.client.import_progress.connect(lambda imported, failed: cancel_event.set())
+        result = self.client.import_from_file(
+            file_path, batch_size=2, cancel_event=cancel_event
+        )
+
+        # Check that the committed batch is kept and the rest is skipped
+        self.assertTrue(result.cancelled)
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(self.client.count_tasks(), 2)
+
+        os.remove(file_path)
+
+    def test_export_to_file_cancelled(self):
+        self.client.add_task(Task("uuid1", "", "description1", "2024-01-01", True))
+        file_path = os.path.join(tempfile.gettempdir(), "test_cancelled_export.json")
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+        with self.assertRaises(OperationCancelled):
+            self.client.export_to_file(file_path, cancel_event=cancel_event)
+
+        # Check that the partial file was removed
+        self.assertFalse(os.path.exists(file_path))
+
+    def test_backup_and_restore(self):
+        with tempfile.TemporaryDirectory() as directory:
+            client = DatabaseClient(os.path.join(directory, "tasks.db"))
+            for i in range(3):
+                client.add_task(Task(f"uuid{i}", "", f"description{i}", "2024-01-01"))
+            progress = []
+            client.backup_progress.connect(
+                lambda copied, total: progress.append((copied, total))
+            )
+
+            # characters that mean something in a URI
+            backup_path = os.path.join(directory, "backup ?#%.db")
+            pages = client.backup_to_file(backup_path, pages=1, pause=0)
+
+            # Check that the backup was copied a page at a time
+            self.assertEqual(len(progress), pages)
+            self.assertEqual(progress[-1], (pages, pages))
+            self.assertFalse(os.path.exists(backup_path + ".tmp"))
+
+            # Check that the backup is a single file, not in WAL mode
+            with open(backup_path, "rb") as f:
+                self.assertEqual(f.read(20)[18:20], b"\x01\x01")
+
+            # Check that a cancelled restore leaves the database as it is
+            client.delete_task("uuid0")
+            cancel_event = threading.Event()
+            cancel_event.set()
+            with self.assertRaises(OperationCancelled):
+                client.restore_from_file(
+                    backup_path, pages=1, pause=0, cancel_event=cancel_event
+                )
+            self.assertEqual(client.count_tasks(), 2)
+
+            # Check that the restore brings back the tasks, counts and index
+            client.restore_from_file(backup_path, pages=1, pause=0)
+            self.assertEqual(client.count_tasks(), 3)
+            self.assertEqual(client.count_tasks(search="description0"), 1)
+            self.assertIsNotNone(client.get_task("uuid0"))
+            self.assertEqual(
+                client.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+            )
+            self.assertEqual(
+                sorted(name for name in os.listdir(directory) if "backup" in name),
+                ["backup ?#%.db"],
+            )
+
+            # Check that files that are not backups are rejected
+            with open(os.path.join(directory, "not_a_backup.db"), "w") as f:
+                f.write("not a database" * 100)
+            with self.assertRaises(ValueError):
+                client.restore_from_file(os.path.join(directory, "not_a_backup.db"))
+            client.close()
+
+    def test_iter_json_array_small_chunks(self):
+        # Parse with a chunk size that splits every value across reads
+        tasks = [{"a": [1, 2.5, 'x"y'], "b": None}, 12345, "text", [], {}]
+        f = io.StringIO(json.dumps(tasks, indent=4))
+        self.assertEqual(list(iter_json_array(f, chunk_size=3)), tasks)
+        self.assertEqual(list(iter_json_array(io.StringIO(" [ ] "))), [])
+
+    def test_iter_json_array_every_chunk_size(self):
+        # Check that a chunk boundary anywhere, also inside the numbers,
+        # parses the same
+        doc = '[1, 2.5, 12.5, -3e2, 4E+1, 0.25e-1, true, null, "7.5", {"a": 1.5}]'
+        expected = json.loads(doc)
+        for chunk_size in range(1, len(doc) + 1):
+            self.assertEqual(
+                list(iter_json_array(io.StringIO(doc), chunk_size=chunk_size)),
+                expected,
+                chunk_size,
+            )
+
     def test_export_to_file(self):
         file_path = os.path.join(tempfile.gettempdir(), "test_exported_tasks.json")
         self.client.export_to_file(file_path)
@@ -143,6 +847,58 @@ class TestDatabaseClient(unittest.TestCase):
             self.assertIsInstance(task, dict)
         os.remove(file_path)
 
+    def test_export_to_file_matches_json_dumps(self):
+        # Setup: Add tasks with characters that need escaping
+        tasks = [
+            Task("uuid1", "image_uri1", 'say "hi"\n', "2024-01-01", True),
+            Task("uuid2", "", "café", "2024-01-02", False),
+            Task("uuid3", None, "description3", "2024-01-03", False),
+        ]
+        for task in tasks:
+            self.client.add_task(task)
+
+        # Export in chunks smaller than the number of tasks
+        file_path = os.path.join(tempfile.gettempdir(), "test_streamed_tasks.json")
+        progress = []
+        self.client.export_progress.connect(
+            lambda exported, total: progress.append((exported, total))
+        )
+        self.client.export_to_file(file_path, chunk_size=2)
+
+        # Check that the file is identical to the old in-memory export
+        expected = json.dumps(
+            [self.client.task_to_dict(task) for task in self.client.get_all_tasks()],
+            indent=4,
+        )
+        with open(file_path, "r") as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(progress[-1], (3, 3))
+        os.remove(file_path)
+
+    def test_export_to_file_empty(self):
+        file_path = os.path.join(tempfile.gettempdir(), "test_empty_tasks.json")
+        self.client.export_to_file(file_path)
+        with open(file_path, "r") as f:
+            self.assertEqual(f.read(), json.dumps([], indent=4))
+        os.remove(file_path)
+
+    def test_export_and_import_compressed(self):
+        self.client.add_task(Task("uuid1", "", "description1", "2024-01-01", True))
+        for extension in [".json.gz", ".json.xz"]:
+            file_path = os.path.join(
+                tempfile.gettempdir(), "test_compressed_tasks" + extension
+            )
+            self.client.export_to_file(file_path)
+
+            # Import into a fresh database and compare
+            other_client = DatabaseClient(":memory:")
+            other_client.import_from_file(file_path)
+            imported_tasks = other_client.get_all_tasks()
+            self.assertEqual(len(imported_tasks), 1)
+            self.assertEqual(imported_tasks[0].description, "description1")
+            other_client.conn.close()
+            os.remove(file_path)
+
     def tearDown(self):
         self.client.conn.close()
 
@@ -0,0 +1,155 @@
+import sys
+import tempfile
+import os
+import io
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from database_client import DatabaseClient, Task
+from file_formats import (
+    FILE_FORMATS,
+    open_file,
+    format_for_path,
+    iter_ndjson,
+    InvalidRecord,
+    iter_csv,
+    write_csv,
+    dialog_filters,
+)
+
+
+class TestFileFormats(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.items = [
+            {
+                "image_uri": None,
+                "description": 'quotes " and, commas\nand newlines',
+                "due_date": "2024-01-01",
+                "complete": True,
+            },
+            {
+                "image_uri": "image.png",
+                "description": "ünïcödé",
+                "due_date": "2024-01-02",
+                "complete": False,
+            },
+        ]
+
+    def test_format_for_path(self):
+        self.assertEqual(format_for_path("tasks.json"), "json")
+        self.assertEqual(format_for_path("tasks.ndjson.gz"), "ndjson")
+        self.assertEqual(format_for_path("tasks.JSONL"), "ndjson")
+        self.assertEqual(format_for_path("tasks.csv.xz"), "csv")
+        self.assertEqual(format_for_path("tasks.txt"), "json")
+
+    def test_round_trip(self):
+        for name, file_format in FILE_FORMATS.items():
+            for extension in ["", ".gz", ".xz"]:
+                file_name = f"tasks{file_format.extensions[0]}{extension}"
+                file_path = os.path.join(self.directory.name, file_name)
+                with open_file(file_path, "w", newline=file_format.newline) as f:
+                    self.assertEqual(file_format.write(f, iter(self.items)), 2)
+                with open_file(file_path, "r", newline=file_format.newline) as f:
+                    items = list(file_format.read(f))
+
+                # Check that everything but None survives, csv has no None
+                expected = self.items
+                if name == "csv":
+                    expected = [
+                        {
+                            key: "" if value is None else value
+                            for key, value in item.items()
+                        }
+                        for item in self.items
+                    ]
+                self.assertEqual(items, expected, file_path)
+
+    def test_iter_ndjson(self):
+        f = io.StringIO('{"a": 1}\n\n{"a": 2}\n')
+        self.assertEqual(list(iter_ndjson(f)), [{"a": 1}, {"a": 2}])
+
+        # Check that a line that is not valid JSON doesn't end the file
+        records = list(iter_ndjson(io.StringIO('{"a": 1}\n{"a": \n{"a": 3}\n')))
+        self.assertEqual(records[0], {"a": 1})
+        self.assertIsInstance(records[1], InvalidRecord)
+        self.assertIn("line 2", records[1].reason)
+        self.assertEqual(records[2], {"a": 3})
+
+    def test_import_ndjson_invalid_line(self):
+        file_path = os.path.join(self.directory.name, "tasks.ndjson")
+        with open(file_path, "w") as f:
+            f.write(
+                '{"description": "valid", "due_date": "2024-01-01", "complete": false}\n'
+                '{"description": "cut off", \n'
+                '{"description": "valid too", "due_date": "2024-01-02", "complete": true}\n'
+            )
+
+        # Check that the invalid line is reported and the import goes on
+        client = DatabaseClient(":memory:")
+        result = client.import_from_file(file_path)
+        self.assertEqual(result.imported, 2)
+        self.assertEqual([index for index, _ in result.failed], [1])
+        self.assertIn("line 2", result.failed[0][1])
+        client.close()
+
+    def test_csv_booleans(self):
+        f = io.StringIO()
+        write_csv(f, [{"complete": True}, {"complete": False}])
+        self.assertEqual(f.getvalue(), "complete\r\ntrue\r\nfalse\r\n")
+
+        # Check that only the boolean fields are converted
+        f = io.StringIO("description,complete\ntrue,1\nfalse,maybe\n")
+        self.assertEqual(
+            list(iter_csv(f, boolean_fields=["complete"])),
+            [
+                {"description": "true", "complete": True},
+                {"description": "false", "complete": "maybe"},
+            ],
+        )
+
+    def test_export_and_import(self):
+        client = DatabaseClient(":memory:")
+        for i in range(5):
+            client.add_task(
+                Task(
+                    f"uuid{i}", "", f"description {i}", f"2024-01-0{i + 1}", i % 2 == 0
+                )
+            )
+        exported = sorted(
+            (task.description, task.due_date, task.complete)
+            for task in client.get_all_tasks()
+        )
+
+        for file_name in ["tasks.ndjson", "tasks.csv.gz", "tasks.jsonl.xz"]:
+            file_path = os.path.join(self.directory.name, file_name)
+            self.assertEqual(client.export_to_file(file_path), 5)
+
+            imported_client = DatabaseClient(":memory:")
+            result = imported_client.import_from_file(file_path)
+            self.assertEqual((result.imported, result.failed), (5, []))
+            self.assertEqual(
+                sorted(
+                    (task.description, task.due_date, task.complete)
+                    for task in imported_client.get_all_tasks()
+                ),
+                exported,
+                file_name,
+            )
+            imported_client.close()
+        client.close()
+
+    def test_dialog_filters(self):
+        filters = dialog_filters("Task Files")
+        self.assertEqual(len(filters), len(FILE_FORMATS) + 1)
+        self.assertTrue(filters[0].startswith("Task Files (*.json "))
+        self.assertIn("*.csv.gz", filters[0])
+        self.assertIn("*.ndjson.xz", filters[2])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
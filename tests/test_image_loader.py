@@ -0,0 +1,88 @@
+import sys
+import tempfile
+import os
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtGui import QImage, QColor
+from thumbnail_cache import ThumbnailCache
+from image_loader import ImageLoader
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestImageLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.loader = ImageLoader(
+            ThumbnailCache(os.path.join(self.directory.name, "thumbnails"))
+        )
+        self.image_path = os.path.join(self.directory.name, "image.jpg")
+        image = QImage(800, 400, QImage.Format.Format_RGB32)
+        image.fill(QColor("red"))
+        image.save(self.image_path)
+
+    def wait(self):
+        self.loader.thread_pool.waitForDone()
+        # deliver the queued results from the worker threads
+        QCoreApplication.processEvents()
+
+    def test_load(self):
+        owner_key = self.loader.new_owner_key()
+        results = []
+        self.assertIsNone(
+            self.loader.load(owner_key, self.image_path, 100, results.append)
+        )
+        self.wait()
+
+        # Check that the image was decoded at the requested size
+        self.assertEqual(len(results), 1)
+        self.assertEqual((results[0].width(), results[0].height()), (100, 50))
+
+        # Check that the next request is answered from memory
+        image = self.loader.load(owner_key, self.image_path, 100, results.append)
+        self.assertEqual(image.width(), 100)
+        self.wait()
+        self.assertEqual(len(results), 1)
+
+    def test_load_missing_image(self):
+        results = []
+        self.loader.load(
+            self.loader.new_owner_key(),
+            os.path.join(self.directory.name, "missing.png"),
+            100,
+            results.append,
+        )
+        self.wait()
+        self.assertEqual(results, [None])
+
+    def test_cancel(self):
+        owner_key = self.loader.new_owner_key()
+        results = []
+        self.loader.load(owner_key, self.image_path, 100, results.append)
+        self.loader.cancel(owner_key)
+        self.wait()
+        self.assertEqual(results, [])
+
+    def test_new_request_replaces_old(self):
+        owner_key = self.loader.new_owner_key()
+        old_results = []
+        new_results = []
+        self.loader.load(owner_key, self.image_path, 100, old_results.append)
+        self.loader.load(owner_key, self.image_path, 50, new_results.append)
+        self.wait()
+
+        self.assertEqual(old_results, [])
+        self.assertEqual(new_results[0].width(), 50)
+
+    def tearDown(self):
+        self.loader.thread_pool.waitForDone()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
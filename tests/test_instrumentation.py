@@ -0,0 +1,141 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import instrumentation
+from instrumentation import LatencyHistogram
+from database_client import DatabaseClient, Task
+
+
+class Counter:
+    def __init__(self):
+        self._value = 0
+
+    def add(self, amount=1):
+        self._value += amount
+        return self._value
+
+    def values(self, count):
+        yield from range(count)
+
+    @staticmethod
+    def double(value):
+        return value * 2
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        instrumentation.reset()
+
+    def test_histogram(self):
+        histogram = LatencyHistogram()
+        for microseconds in [1, 3, 3, 100, 5000]:
+            histogram.add(microseconds / 1_000_000)
+        values = histogram.to_dict()
+        self.assertEqual(values["count"], 5)
+        self.assertAlmostEqual(values["total_ms"], 5.107)
+        self.assertAlmostEqual(values["min_ms"], 0.001)
+        self.assertAlmostEqual(values["max_ms"], 5.0)
+        self.assertEqual(values["histogram_us"], {"<2": 1, "<4": 2, "<128": 1, "<8192": 1})
+        # percentiles are bucket upper bounds, capped at the maximum
+        self.assertAlmostEqual(values["p50_ms"], 0.004)
+        self.assertAlmostEqual(values["p99_ms"], 5.0)
+
+    def test_instrument_methods(self):
+        class InstrumentedCounter(Counter):
+            add = Counter.add
+            values = Counter.values
+            double = Counter.__dict__["double"]
+            value = Counter.__dict__["value"]
+
+        instrumentation.instrument_methods(InstrumentedCounter)
+        instrumentation.instrument_property(InstrumentedCounter, "value")
+
+        counter = InstrumentedCounter()
+        self.assertEqual(counter.add(), 1)
+        # Check that extra positional arguments are dropped, like for slots
+        self.assertEqual(counter.add(2, "from a signal"), 3)
+        self.assertEqual(list(counter.values(3)), [0, 1, 2])
+        self.assertEqual(InstrumentedCounter.double(2), 4)
+        counter.value = 10
+        self.assertEqual(counter.value, 10)
+
+        timings = instrumentation.report()["methods"]
+        self.assertEqual(timings["InstrumentedCounter.add"]["count"], 2)
+        self.assertEqual(timings["InstrumentedCounter.values"]["count"], 1)
+        self.assertEqual(timings["InstrumentedCounter.double"]["count"], 1)
+        self.assertEqual(timings["InstrumentedCounter.value.setter"]["count"], 1)
+
+    def test_normalize_statement(self):
+        self.assertEqual(
+            instrumentation.normalize_statement(
+                "SELECT * FROM todo_fts WHERE a = 'it''s'\n  AND b = -1.5e3 AND c = x'0a' LIMIT 50"
+            ),
+            "SELECT * FROM todo_fts WHERE a = ? AND b = ? AND c = ? LIMIT ?",
+        )
+
+    def test_trace_connection(self):
+        # characters that mean something in a URI
+        db_name = os.path.join(self.directory.name, "tasks ?#%.db")
+        instrumentation.enable()
+        try:
+            client = DatabaseClient(db_name)
+        finally:
+            instrumentation.enabled = False
+        for i in range(3):
+            client.add_task(Task(f"uuid{i}", "", f"description {i}", "2024-01-01"))
+        client.lazy_load_tasks_after(None, 10, complete=False)
+        client.close()
+
+        statements = {
+            values["statement"]: values
+            for values in instrumentation.report()["statements"]
+        }
+        query = (
+            "SELECT todo.uuid, todo.image_uri, todo.task_desc, todo.due_date, "
+            "todo.complete FROM todo WHERE complete = ? "
+            "ORDER BY due_ordinal ASC, uuid ASC LIMIT ?"
+        )
+        self.assertEqual(statements[query]["count"], 1)
+        self.assertTrue(
+            any(
+                "idx_todo_complete_due_ordinal_uuid" in step
+                for step in statements[query]["plan"]
+            )
+        )
+        self.assertIsNone(statements["BEGIN"]["plan"])
+
+        # Check that nothing is traced while disabled
+        instrumentation.reset()
+        DatabaseClient(db_name).close()
+        self.assertEqual(instrumentation.report()["statements"], [])
+
+    def test_dump(self):
+        instrumentation.record("DatabaseClient.add_task", 0.001)
+        file_path = instrumentation.dump(self.directory.name)
+        with open(file_path) as f:
+            data = json.load(f)
+        self.assertEqual(data["methods"]["DatabaseClient.add_task"]["count"], 1)
+        with open(file_path[: -len(".json")] + ".txt") as f:
+            self.assertIn("DatabaseClient.add_task", f.read())
+
+    def tearDown(self):
+        instrumentation.reset()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import os
+import copy
+import unittest
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from task import Task
+
+
+class TestTask(unittest.TestCase):
+    def test_slots(self):
+        task = Task("uuid", "", "description", "2024-01-01")
+        self.assertFalse(hasattr(task, "__dict__"))
+        with self.assertRaises(AttributeError):
+            task.due = "2024-01-01"
+
+    def test_due_ordinal(self):
+        task = Task("uuid", "", "description", "2024-01-01")
+        self.assertEqual(task.due_ordinal, date(2024, 1, 1).toordinal())
+
+        # Check that the ordinal follows the date string
+        task.due_date = "2024-02-01"
+        self.assertEqual(task.due_date, "2024-02-01")
+        self.assertEqual(task.due_ordinal, date(2024, 2, 1).toordinal())
+
+        # Check that dates that can't be parsed are kept as they are
+        for due_date in ["due_date", "2024-02-30", "20240101"]:
+            task.due_date = due_date
+            self.assertEqual(task.due_date, due_date)
+            self.assertIsNone(task.due_ordinal)
+            self.assertFalse(task.is_overdue())
+            self.assertEqual(task.sort_key, (0, "uuid"))
+
+    def test_default_due_date(self):
+        self.assertEqual(Task().due_date, date.today().isoformat())
+
+        # Check that a task stored without a due date keeps none
+        task = Task("uuid", "", "description", None)
+        self.assertIsNone(task.due_date)
+        self.assertEqual(task.sort_key, (0, "uuid"))
+
+    def test_is_overdue(self):
+        today = date(2024, 1, 10)
+        self.assertTrue(Task(due_date="2024-01-09").is_overdue(today))
+        self.assertTrue(Task(due_date="2024-01-10").is_overdue(today))
+        self.assertFalse(Task(due_date="2024-01-11").is_overdue(today))
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        self.assertFalse(Task(due_date=tomorrow).is_overdue())
+
+    def test_copy(self):
+        task = Task("uuid", "image_uri", "description", "2024-01-01", True)
+        copied_task = copy.copy(task)
+        copied_task.complete = False
+        self.assertEqual(copied_task.uuid, task.uuid)
+        self.assertEqual(copied_task.due_ordinal, task.due_ordinal)
+        self.assertTrue(task.complete)
+
+    def test_from_row(self):
+        task = Task.from_row(
+            None, ("uuid", "image_uri", "description", "2024-01-01", 1)
+        )
+        self.assertEqual(task.uuid, "uuid")
+        self.assertEqual(task.image_uri, "image_uri")
+        self.assertEqual(task.description, "description")
+        self.assertEqual(task.due_date, "2024-01-01")
+        self.assertIs(task.complete, True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+import random
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from task import Task
+from task_index import SortedTaskIndex
+
+
+class TestSortedTaskIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SortedTaskIndex()
+        self.tasks = [
+            Task(f"uuid{i:02d}", "", f"description{i}", f"2024-01-{i % 7 + 1:02d}")
+            for i in range(20)
+        ]
+        shuffled = self.tasks[:]
+        random.Random(0).shuffle(shuffled)
+        for task in shuffled:
+            self.index.add(task.uuid, task.sort_key, task)
+
+    def test_add_keeps_order(self):
+        self.assertEqual(len(self.index), 20)
+        self.assertEqual(
+            [task.sort_key for task in self.index],
+            sorted(task.sort_key for task in self.tasks),
+        )
+
+    def test_get_and_position(self):
+        ordered = sorted(self.tasks, key=lambda task: task.sort_key)
+        for position, task in enumerate(ordered):
+            self.assertIs(self.index.get(task.uuid), task)
+            self.assertEqual(self.index.position(task.uuid), position)
+        self.assertIsNone(self.index.get("missing"))
+        self.assertIsNone(self.index.position("missing"))
+        self.assertIn("uuid00", self.index)
+
+    def test_remove(self):
+        ordered = sorted(self.tasks, key=lambda task: task.sort_key)
+        self.assertEqual(self.index.remove(ordered[3].uuid), 3)
+        self.assertIsNone(self.index.remove(ordered[3].uuid))
+        self.assertEqual(len(self.index), 19)
+        self.assertNotIn(ordered[3].uuid, self.index)
+        self.assertEqual(list(self.index), ordered[:3] + ordered[4:])
+
+    def test_add_existing_uuid_moves_item(self):
+        task = Task("uuid05", "", "moved", "2030-01-01")
+        self.assertEqual(self.index.add(task.uuid, task.sort_key, task), 19)
+        self.assertEqual(len(self.index), 20)
+        self.assertIs(list(self.index)[-1], task)
+
+    def test_insertion_point(self):
+        self.assertEqual(self.index.insertion_point((0, "")), 0)
+        self.assertEqual(
+            self.index.insertion_point(Task(due_date="2030-01-01").sort_key), 20
+        )
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual(len(self.index), 0)
+        self.assertIsNone(self.index.get("uuid00"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import tempfile
+import os
+import unittest
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QCoreApplication, Qt
+from database_client import DatabaseClient, Task
+from thumbnail_cache import ThumbnailCache
+from image_loader import ImageLoader
+from widgets.TaskListView import TaskListModel, TaskRole
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestTaskListModel(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = DatabaseClient(":memory:")
+        with self.client.batch():
+            for i in range(25):
+                self.client.add_task(
+                    Task(f"uuid{i:02d}", "", f"description{i}", f"2024-01-{i + 1:02d}", i % 5 == 0)
+                )
+        self.shared_state = SimpleNamespace(
+            database_client=self.client,
+            image_loader=ImageLoader(ThumbnailCache(self.directory.name)),
+        )
+
+    def test_row_count_is_total(self):
+        model = TaskListModel(self.shared_state, False, page_size=4)
+        self.assertEqual(model.rowCount(), 20)
+        # nothing is loaded until a row is looked at
+        self.assertEqual(len(model.pages), 0)
+
+    def test_rows_are_newest_first(self):
+        model = TaskListModel(self.shared_state, False, page_size=4)
+        tasks = [model.data(model.index(row), TaskRole) for row in range(model.rowCount())]
+
+        self.assertEqual(len({task.uuid for task in tasks}), 20)
+        self.assertEqual(
+            [task.sort_key for task in tasks],
+            sorted((task.sort_key for task in tasks), reverse=True),
+        )
+        self.assertFalse(any(task.complete for task in tasks))
+        self.assertEqual(
+            model.data(model.index(0), Qt.ItemDataRole.DisplayRole), "description24"
+        )
+
+    def test_page_cache_is_bounded(self):
+        model = TaskListModel(self.shared_state, False, page_size=2, max_pages=3)
+        for row in range(model.rowCount()):
+            model.data(model.index(row), TaskRole)
+        self.assertEqual(len(model.pages), 3)
+
+        # Jumping back to an evicted page loads it again
+        task = model.data(model.index(model.rowCount() - 1), TaskRole)
+        self.assertEqual(task.uuid, "uuid01")
+
+    def test_reload(self):
+        model = TaskListModel(self.shared_state, True)
+        self.assertEqual(model.rowCount(), 5)
+        self.client.add_task(Task("new", "", "new", "2030-01-01", True))
+        model.reload()
+        self.assertEqual(model.rowCount(), 6)
+        self.assertEqual(model.data(model.index(0), TaskRole).uuid, "new")
+        self.assertEqual(model.row_of("new"), 0)
+
+    def tearDown(self):
+        self.shared_state.image_loader.thread_pool.waitForDone()
+        self.client.close()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import tempfile
+import os
+import unittest
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from database_client import DatabaseClient, Task
+from thumbnail_cache import ThumbnailCache
+from image_loader import ImageLoader
+from widgets.TasksWidget import TaskWidgetPool
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestTaskWidgetPool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.shared_state = SimpleNamespace(
+            database_client=DatabaseClient(":memory:"),
+            image_loader=ImageLoader(ThumbnailCache(self.directory.name)),
+        )
+
+    def test_acquire_reuses_released_widgets(self):
+        pool = TaskWidgetPool(self.shared_state)
+        task_widget = pool.acquire(Task("uuid1", "", "description1", "2024-01-01"))
+        self.assertEqual((pool.hits, pool.misses), (0, 1))
+
+        pool.release(task_widget)
+        reused_widget = pool.acquire(Task("uuid2", "", "description2", "2024-01-02"))
+
+        # Check that the same widget was rebound to the new task
+        self.assertIs(reused_widget, task_widget)
+        self.assertEqual(reused_widget.task.uuid, "uuid2")
+        self.assertEqual(reused_widget.label.text(), "description2")
+        self.assertEqual((pool.hits, pool.misses), (1, 1))
+        self.assertEqual(pool.hit_rate, 0.5)
+
+    def test_max_size(self):
+        pool = TaskWidgetPool(self.shared_state, max_size=2)
+        task_widgets = [
+            pool.acquire(Task(f"uuid{i}", "", f"description{i}", "2024-01-01"))
+            for i in range(3)
+        ]
+        for task_widget in task_widgets:
+            pool.release(task_widget)
+        self.assertEqual(len(pool.widgets), 2)
+
+    def tearDown(self):
+        self.shared_state.image_loader.thread_pool.waitForDone()
+        self.shared_state.database_client.close()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+import sys
+import copy
+import tempfile
+import os
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QCoreApplication, QEvent
+from database_client import DatabaseClient, Task
+from thumbnail_cache import ThumbnailCache
+from image_loader import ImageLoader
+from main import SharedState
+from widgets.TasksWidget import TasksWidget
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestTasksWidget(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.clients = []
+        self.tasks_widget = None
+
+    def create_tasks_widget(self, db_name=":memory:", tasks=10, lazy_limit=30):
+        # Setup: Incomplete tasks due on consecutive days, every third one
+        # finished
+        client = DatabaseClient(db_name)
+        self.clients.append(client)
+        with client.batch():
+            for i in range(tasks):
+                client.add_task(
+                    Task(
+                        f"uuid{i:02d}",
+                        "",
+                        f"description{i}",
+                        f"2024-01-{i + 1:02d}",
+                        i % 3 == 0,
+                    )
+                )
+        shared_state = SharedState(client)
+        shared_state.thumbnail_cache = ThumbnailCache(self.directory.name)
+        shared_state.image_loader = ImageLoader(shared_state.thumbnail_cache)
+
+        tasks_widget = TasksWidget(shared_state, load=False)
+        tasks_widget.scroll_area_complete.lazy_limit = lazy_limit
+        tasks_widget.scroll_area_incomplete.lazy_limit = lazy_limit
+        tasks_widget.reload_tasks()
+        self.tasks_widget = tasks_widget
+        return tasks_widget, client
+
+    def layout_widgets(self, tasks_widget, complete):
+        layout = tasks_widget.content_layout(complete)
+        return [layout.itemAt(i).widget() for i in range(layout.count())]
+
+    def assert_in_sync(self, tasks_widget):
+        # the layouts list the widgets of the registry newest first
+        task_widgets = tasks_widget.shared_state.task_widgets
+        for complete in [True, False]:
+            widgets = self.layout_widgets(tasks_widget, complete)
+            index = task_widgets.index_of(complete)
+            self.assertEqual(widgets, list(reversed(index.items)))
+            keys = [widget.task.sort_key for widget in widgets]
+            self.assertEqual(keys, sorted(keys, reverse=True))
+            self.assertTrue(all(widget.task.complete == complete for widget in widgets))
+
+    def uuids(self, tasks_widget, complete):
+        return [
+            widget.task.uuid for widget in self.layout_widgets(tasks_widget, complete)
+        ]
+
+    def test_edit_task_in_place(self):
+        tasks_widget, client = self.create_tasks_widget()
+        task_widget = tasks_widget.shared_state.task_widgets.get("uuid04")
+
+        task = copy.copy(task_widget.task)
+        task.description = "edited"
+        client.edit_task(task)
+
+        # Check that the same widget was rebound without moving it
+        self.assertIs(tasks_widget.shared_state.task_widgets.get("uuid04"), task_widget)
+        self.assertEqual(task_widget.label.text(), "edited")
+        self.assertEqual(
+            self.uuids(tasks_widget, False),
+            ["uuid08", "uuid07", "uuid05", "uuid04", "uuid02", "uuid01"],
+        )
+        self.assert_in_sync(tasks_widget)
+
+    def test_toggle_task_moves_between_tabs(self):
+        tasks_widget, client = self.create_tasks_widget()
+        tasks_widget.load_more_tasks(all_tabs=True)
+        self.assert_in_sync(tasks_widget)
+
+        tasks_widget.shared_state.task_widgets.get("uuid04").checkbox.click()
+
+        # Check that the task left the to do tab for its place in the other
+        self.assertNotIn("uuid04", self.uuids(tasks_widget, False))
+        self.assertEqual(
+            self.uuids(tasks_widget, True), ["uuid09", "uuid06", "uuid04", "uuid03", "uuid00"]
+        )
+        self.assertTrue(client.get_task("uuid04").complete)
+        self.assert_in_sync(tasks_widget)
+
+        # Check that moving the due date moves the widget within its tab
+        task = copy.copy(tasks_widget.shared_state.task_widgets.get("uuid04").task)
+        task.due_date = "2024-02-01"
+        client.edit_task(task)
+        self.assertEqual(self.uuids(tasks_widget, True)[0], "uuid04")
+        self.assert_in_sync(tasks_widget)
+
+    def test_toggle_task_into_unloaded_tab(self):
+        tasks_widget, client = self.create_tasks_widget()
+
+        # Check that a task toggled into a tab without loaded pages is left
+        # to its first page instead of being loaded twice
+        tasks_widget.shared_state.task_widgets.get("uuid04").checkbox.click()
+        self.assertEqual(self.uuids(tasks_widget, True), [])
+        tasks_widget.load_more_tasks(all_tabs=True)
+        self.assertEqual(
+            self.uuids(tasks_widget, True), ["uuid09", "uuid06", "uuid04", "uuid03", "uuid00"]
+        )
+        self.assert_in_sync(tasks_widget)
+
+    def test_insert_and_delete_keep_order(self):
+        tasks_widget, client = self.create_tasks_widget()
+
+        # tasks between, before and after the loaded ones, new4 shares its
+        # due date with uuid01 and goes first by uuid
+        for uuid, due_date in [
+            ("new1", "2024-01-05"),
+            ("new2", "2023-12-31"),
+            ("new3", "2024-02-01"),
+            ("new4", "2024-01-02"),
+        ]:
+            client.add_task(Task(uuid, "", uuid, due_date, False))
+            self.assert_in_sync(tasks_widget)
+        self.assertEqual(
+            self.uuids(tasks_widget, False),
+            ["new3", "uuid08", "uuid07", "uuid05", "uuid04", "new1",
+             "uuid02", "uuid01", "new4", "new2"],
+        )
+
+        for uuid in ["new1", "new3", "new2", "uuid05"]:
+            client.delete_task(uuid)
+            self.assert_in_sync(tasks_widget)
+        self.assertEqual(
+            self.uuids(tasks_widget, False),
+            ["uuid08", "uuid07", "uuid04", "uuid02", "uuid01", "new4"],
+        )
+        self.assertEqual(tasks_widget.tab_widget.tabText(1), "To Do (6 Tasks)")
+
+    def test_insert_task_past_unloaded_page(self):
+        tasks_widget, client = self.create_tasks_widget(tasks=30, lazy_limit=5)
+
+        # Check that a task after the loaded page is left to the next page
+        client.add_task(Task("new", "", "new", "2024-02-01", False))
+        self.assertNotIn("new", self.uuids(tasks_widget, False))
+        while not tasks_widget.scroll_area_incomplete.lazy_exhausted:
+            tasks_widget.load_more_tasks()
+        uuids = self.uuids(tasks_widget, False)
+        self.assertEqual(uuids[0], "new")
+        self.assertEqual(len(uuids), len(set(uuids)))
+        self.assertEqual(len(uuids), client.count_tasks(False))
+        self.assert_in_sync(tasks_widget)
+
+    def test_search_filters_added_and_edited_tasks(self):
+        tasks_widget, client = self.create_tasks_widget()
+        tasks_widget.search_box.setText("description4")
+        tasks_widget.apply_search()
+        self.assertEqual(self.uuids(tasks_widget, False), ["uuid04"])
+
+        # Check that only added tasks matching the search show up
+        client.add_task(Task("match", "", "description4 again", "2024-01-20", False))
+        client.add_task(Task("other", "", "something else", "2024-01-21", False))
+        self.assertEqual(self.uuids(tasks_widget, False), ["match", "uuid04"])
+
+        # Check that tasks are edited out of and into the results
+        task = copy.copy(tasks_widget.shared_state.task_widgets.get("match").task)
+        task.description = "no longer"
+        client.edit_task(task)
+        task = client.get_task("other")
+        task.description = "description4 now"
+        client.edit_task(task)
+        self.assertEqual(self.uuids(tasks_widget, False), ["other", "uuid04"])
+        self.assert_in_sync(tasks_widget)
+
+    def test_load_page_takes_prefetched_tasks(self):
+        tasks_widget, client = self.create_tasks_widget(
+            os.path.join(self.directory.name, "tasks.db"), tasks=30, lazy_limit=5
+        )
+        prefetcher = tasks_widget.prefetcher
+        queried = []
+        client.loaded_tasks.connect(queried.append)
+
+        prefetcher.prefetch(False, 8)
+        deadline = time.monotonic() + 10
+        while prefetcher.streams[False].pending and time.monotonic() < deadline:
+            QCoreApplication.processEvents()
+            time.sleep(0.001)
+
+        # Check that a page is taken from the buffer without a query
+        tasks_widget.load_more_tasks()
+        self.assertEqual(queried, [])
+        self.assertEqual(len(prefetcher.streams[False].buffer), 3)
+
+        # Check that the rest of a short buffer is queried
+        tasks_widget.load_more_tasks()
+        self.assertEqual(len(queried), 1)
+        self.assertEqual(len(queried[0]), 2)
+
+        # Check that the pages follow each other without gaps
+        while not tasks_widget.scroll_area_incomplete.lazy_exhausted:
+            tasks_widget.load_more_tasks()
+        uuids = self.uuids(tasks_widget, False)
+        self.assertEqual(
+            uuids,
+            [f"uuid{i:02d}" for i in reversed(range(30)) if i % 3 != 0],
+        )
+        self.assert_in_sync(tasks_widget)
+
+        # Check that deleting the widget stops the prefetch thread
+        thread = prefetcher.thread.thread
+        self.assertTrue(thread.is_alive())
+        self.delete_tasks_widget()
+        self.assertFalse(thread.is_alive())
+
+    def delete_tasks_widget(self):
+        if self.tasks_widget is not None:
+            self.tasks_widget.shared_state.image_loader.thread_pool.waitForDone()
+            self.tasks_widget.deleteLater()
+            QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+            self.tasks_widget = None
+
+    def tearDown(self):
+        self.delete_tasks_widget()
+        for client in self.clients:
+            client.close()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
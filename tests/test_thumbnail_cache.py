@@ -0,0 +1,104 @@
+import sys
+import tempfile
+import os
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from PyQt6.QtGui import QImage, QColor
+from thumbnail_cache import ThumbnailCache
+
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, "thumbnails")
+        self.image_path = self.create_image("image.png", 400, 200)
+
+    def create_image(self, name, width, height):
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        image.fill(QColor("red"))
+        path = os.path.join(self.directory.name, name)
+        image.save(path)
+        return path
+
+    def count_decodes(self, cache):
+        decodes = []
+        decode = cache.decode
+        cache.decode = lambda *args: decodes.append(args) or decode(*args)
+        return decodes
+
+    def test_get_scales_and_caches(self):
+        cache = ThumbnailCache(self.cache_dir)
+        decodes = self.count_decodes(cache)
+
+        image = cache.get(self.image_path, 100)
+        self.assertEqual((image.width(), image.height()), (100, 50))
+
+        # Check that the second lookup is served from memory
+        cache.get(self.image_path, 100)
+        self.assertEqual(len(decodes), 1)
+        self.assertEqual(cache.memory_hits, 1)
+        self.assertIsNotNone(cache.lookup(self.image_path, 100))
+
+    def test_get_from_disk(self):
+        ThumbnailCache(self.cache_dir).get(self.image_path, 100)
+
+        # A new cache has an empty memory layer but shares the directory
+        cache = ThumbnailCache(self.cache_dir)
+        decodes = self.count_decodes(cache)
+        self.assertIsNone(cache.lookup(self.image_path, 100))
+        image = cache.get(self.image_path, 100)
+        self.assertEqual((image.width(), image.height()), (100, 50))
+        self.assertEqual(decodes, [])
+        self.assertEqual(cache.disk_hits, 1)
+
+    def test_changed_image_is_decoded_again(self):
+        cache = ThumbnailCache(self.cache_dir)
+        decodes = self.count_decodes(cache)
+        cache.get(self.image_path, 100)
+
+        # Replace the image with one of a different size
+        stat = os.stat(self.image_path)
+        self.create_image("image.png", 200, 400)
+        os.utime(self.image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        image = cache.get(self.image_path, 100)
+        self.assertEqual((image.width(), image.height()), (50, 100))
+        self.assertEqual(len(decodes), 2)
+
+    def test_missing_or_invalid_image(self):
+        cache = ThumbnailCache(self.cache_dir)
+        self.assertIsNone(cache.get(os.path.join(self.directory.name, "missing.png")))
+
+        invalid_path = os.path.join(self.directory.name, "invalid.png")
+        with open(invalid_path, "w") as f:
+            f.write("not an image")
+        self.assertIsNone(cache.get(invalid_path))
+
+    def test_memory_budget(self):
+        # 100x50 RGB32 thumbnails take 20000 bytes each
+        cache = ThumbnailCache(self.cache_dir, memory_budget=50000)
+        paths = [self.create_image(f"image{i}.png", 400, 200) for i in range(4)]
+        for path in paths:
+            cache.get(path, 100)
+
+        self.assertLessEqual(cache.memory_usage, 50000)
+        self.assertIsNone(cache.lookup(paths[0], 100))
+        self.assertIsNotNone(cache.lookup(paths[3], 100))
+
+    def test_disk_budget(self):
+        cache = ThumbnailCache(self.cache_dir, disk_budget=1)
+        for i in range(3):
+            cache.get(self.create_image(f"image{i}.png", 400, 200), 100)
+
+        # Every write pushes the cache over budget and evicts all entries
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self.assertEqual(cache.disk_usage, 0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
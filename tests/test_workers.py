@@ -0,0 +1,181 @@
+import sys
+import tempfile
+import os
+import unittest
+import json
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QCoreApplication, QThreadPool
+from database_client import DatabaseClient, Task
+from workers import (
+    ImportWorker,
+    ExportWorker,
+    BackupWorker,
+    RestoreWorker,
+    BackupScheduler,
+    TaskPrefetcher,
+)
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestWorkers(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.directory.name, "tasks.db")
+        self.client = DatabaseClient(self.db_name)
+
+    def run_worker(self, worker):
+        events = []
+        worker.signals.progress.connect(lambda *args: events.append(("progress", args)))
+        worker.signals.finished.connect(lambda result: events.append(("finished", result)))
+        worker.signals.failed.connect(lambda error: events.append(("failed", error)))
+        worker.signals.cancelled.connect(lambda: events.append(("cancelled", None)))
+
+        QThreadPool.globalInstance().start(worker)
+        QThreadPool.globalInstance().waitForDone()
+        # deliver the queued signals from the worker thread
+        QCoreApplication.processEvents()
+        return events
+
+    def test_import_worker(self):
+        file_path = os.path.join(self.directory.name, "tasks.json")
+        tasks = [
+            {"description": f"description{i}", "due_date": "2024-01-01", "complete": False}
+            for i in range(3)
+        ]
+        with open(file_path, "w") as f:
+            json.dump(tasks, f)
+
+        events = self.run_worker(ImportWorker(self.db_name, file_path))
+
+        # Check that the import finished and is visible to other connections
+        self.assertEqual(events[-1][0], "finished")
+        self.assertEqual(events[-1][1].imported, 3)
+        self.assertIn(("progress", (3, 0)), events)
+        self.assertEqual(self.client.count_tasks(), 3)
+
+    def test_export_worker_cancelled(self):
+        self.client.add_task(Task("uuid1", "", "description1", "2024-01-01", False))
+        file_path = os.path.join(self.directory.name, "tasks.json")
+        worker = ExportWorker(self.db_name, file_path)
+        worker.cancel()
+
+        # Check that the cancelled export left no file behind
+        events = self.run_worker(worker)
+        self.assertEqual(events[-1][0], "cancelled")
+        self.assertFalse(os.path.exists(file_path))
+
+    def test_import_worker_failed(self):
+        file_path = os.path.join(self.directory.name, "missing.json")
+        events = self.run_worker(ImportWorker(self.db_name, file_path))
+        self.assertEqual(events[-1][0], "failed")
+
+    def test_worker_database_not_opened(self):
+        # Check that a database that can't be opened fails the job
+        db_name = os.path.join(self.directory.name, "missing", "tasks.db")
+        file_path = os.path.join(self.directory.name, "tasks.json")
+        events = self.run_worker(ExportWorker(db_name, file_path))
+        self.assertEqual(events[-1][0], "failed")
+
+    def test_backup_and_restore_worker(self):
+        self.client.add_task(Task("uuid1", "", "description1", "2024-01-01", False))
+        file_path = os.path.join(self.directory.name, "backup.db")
+
+        events = self.run_worker(BackupWorker(self.db_name, file_path))
+        self.assertEqual(events[-1][0], "finished")
+        self.assertEqual(events[-2][0], "progress")
+        pages, total = events[-2][1]
+        self.assertEqual(pages, total)
+
+        # Check that the restore brings back the tasks of the backup
+        self.client.delete_task("uuid1")
+        self.client.add_task(Task("uuid2", "", "description2", "2024-01-01", False))
+        events = self.run_worker(RestoreWorker(self.db_name, file_path))
+        self.assertEqual(events[-1][0], "finished")
+        self.assertEqual([task.uuid for task in self.client.get_all_tasks()], ["uuid1"])
+
+    def test_backup_scheduler(self):
+        backup_dir = os.path.join(self.directory.name, "backups")
+        scheduler = BackupScheduler(self.db_name, backup_dir, keep=2)
+        for i in range(3):
+            # Setup: Older backups, the timestamps in the names order them
+            os.makedirs(backup_dir, exist_ok=True)
+            file_name = f"tasks_2000-01-0{i + 1}_00_00_00.db"
+            open(os.path.join(backup_dir, file_name), "w").close()
+
+        backed_up = []
+        scheduler.backed_up.connect(backed_up.append)
+        scheduler.backup()
+        QThreadPool.globalInstance().waitForDone()
+        QCoreApplication.processEvents()
+
+        # Check that the new backup was made and only the newest were kept
+        self.assertEqual(len(backed_up), 1)
+        self.assertEqual(
+            scheduler.backups(),
+            [os.path.join(backup_dir, "tasks_2000-01-03_00_00_00.db"), backed_up[0]],
+        )
+        self.assertIsNone(scheduler.worker)
+
+        # Check that keeping no backups at all is rejected
+        with self.assertRaises(ValueError):
+            BackupScheduler(self.db_name, backup_dir, keep=0)
+
+    def wait_for_prefetch(self, prefetcher, complete):
+        # deliver the page from the prefetch thread
+        deadline = time.monotonic() + 10
+        while prefetcher.streams[complete].pending and time.monotonic() < deadline:
+            QCoreApplication.processEvents()
+            time.sleep(0.001)
+
+    def test_task_prefetcher(self):
+        for i in range(5):
+            self.client.add_task(
+                Task(f"uuid{i}", "", f"description{i}", f"2024-01-0{i + 1}", False)
+            )
+        prefetcher = TaskPrefetcher(self.db_name)
+        prefetched = []
+        prefetcher.prefetched.connect(prefetched.append)
+
+        # Setup: The first two tasks are loaded
+        loaded = self.client.lazy_load_tasks_after(None, 2, complete=False)
+        prefetcher.reset(False, "", loaded[-1].sort_key)
+        prefetcher.prefetch(False, 2)
+        self.wait_for_prefetch(prefetcher, False)
+        self.assertEqual(prefetched, [False])
+        self.assertFalse(prefetcher.exhausted(False))
+
+        # Check that the buffered tasks follow the loaded ones, in order
+        tasks = prefetcher.take(False, "", 3)
+        self.assertEqual([task.uuid for task in tasks], ["uuid2", "uuid3"])
+
+        # Check that a short page marks the tab exhausted once it is taken
+        prefetcher.prefetch(False, 2)
+        self.wait_for_prefetch(prefetcher, False)
+        self.assertFalse(prefetcher.exhausted(False))
+        self.assertEqual([task.uuid for task in prefetcher.take(False, "", 2)], ["uuid4"])
+        self.assertTrue(prefetcher.exhausted(False))
+
+        # Check that pages fetched before an invalidation are dropped
+        prefetcher.reset(False, "", loaded[-1].sort_key)
+        prefetcher.prefetch(False, 2)
+        prefetcher.invalidate()
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            QCoreApplication.processEvents()
+        self.assertEqual(prefetcher.take(False, "", 2), [])
+        self.assertEqual(len(prefetched), 2)
+        prefetcher.close()
+
+    def tearDown(self):
+        self.client.conn.close()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()